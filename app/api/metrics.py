@@ -0,0 +1,22 @@
+"""
+Route /metrics cho Prometheus.
+
+Chạy nhiều worker (uvicorn --workers) thì đặt PROMETHEUS_MULTIPROC_DIR để
+gộp metric của mọi process (chế độ multiprocess của prometheus_client).
+"""
+import os
+
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+from prometheus_client import multiprocess
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    registry = REGISTRY
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
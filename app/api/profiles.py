@@ -0,0 +1,134 @@
+"""
+Profile từng request trong production, không cần deploy lại.
+
+Request được profile (app.core.profiler) khi:
+  - có header X-Profile bằng PROFILE_TOKEN (người vận hành bật cho một request), hoặc
+  - được chọn ngẫu nhiên theo PROFILE_SAMPLE_RATE.
+
+Profile phủ cả lúc gửi response (stream ndjson / SSE cũng vậy, tối đa
+PROFILE_MAX_SECONDS) và được ghi ra PROFILE_DIR dưới dạng file speedscope;
+response mang header X-Profile-Id. Route /profiles liệt kê các profile gần đây,
+/profiles/<id> tải file về (mở bằng https://www.speedscope.app); cả hai cũng
+cần header X-Profile, không có PROFILE_TOKEN thì trả 404.
+
+    curl -H "X-Profile: $PROFILE_TOKEN" localhost:8000/v1/utoday_news -D - -o /dev/null
+    curl -H "X-Profile: $PROFILE_TOKEN" localhost:8000/profiles
+"""
+import asyncio
+import hmac
+import os
+import random
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
+
+from app.core import config, metrics
+from app.core.profiler import (
+    SUFFIX,
+    SamplingProfiler,
+    is_profile_id,
+    list_profiles,
+    new_profile_id,
+    profile_path,
+    save_profile,
+)
+
+PROFILE_HEADER = b"x-profile"
+
+# Không profile chính các route vận hành
+_SKIP_PREFIXES = ("/profiles", "/metrics")
+
+
+def _has_token(headers) -> bool:
+    """
+    Header X-Profile khớp PROFILE_TOKEN (luôn False khi chưa đặt token).
+    """
+    if not config.PROFILE_TOKEN:
+        return False
+    value = dict(headers).get(PROFILE_HEADER)
+    return value is not None and hmac.compare_digest(value, config.PROFILE_TOKEN.encode())
+
+
+def _require_token(request: Request) -> None:
+    # 404 thay vì 401/403: không để lộ là route này tồn tại
+    if not _has_token(request.scope["headers"]):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+router = APIRouter(dependencies=[Depends(_require_token)])
+
+
+def _trigger(scope) -> str:
+    """
+    "header" / "sampled" nếu request cần được profile, "" nếu không.
+    """
+    if scope["path"].startswith(_SKIP_PREFIXES):
+        return ""
+    if _has_token(scope["headers"]):
+        return "header"
+    if config.PROFILE_SAMPLE_RATE > 0 and random.random() < config.PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return ""
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI: lấy mẫu stack trong suốt request (tới khi gửi xong body).
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.running = 0
+
+    async def __call__(self, scope, receive, send):
+        trigger = _trigger(scope) if scope["type"] == "http" else ""
+        if not trigger:
+            return await self.app(scope, receive, send)
+        if self.running >= config.PROFILE_MAX_CONCURRENT:
+            metrics.PROFILES.labels("busy").inc()
+            return await self.app(scope, receive, send)
+
+        metrics.PROFILES.labels(trigger).inc()
+        profile_id = new_profile_id(scope["method"], scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self.running += 1
+        profiler = SamplingProfiler().start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.stop()
+            self.running -= 1
+            query = scope.get("query_string", b"").decode("latin-1")
+            name = f"{scope['method']} {scope['path']}{'?' + query if query else ''} ({trigger})"
+            await asyncio.to_thread(save_profile, profiler, profile_id, name)
+
+
+@router.get("/profiles", include_in_schema=False)
+async def profiles(limit: int = Query(50, ge=1, le=1000)):
+    recent = await asyncio.to_thread(list_profiles)
+    return {
+        "profiles": [
+            {
+                **profile,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(profile["created"])),
+                "url": f"/profiles/{profile['id']}",
+            }
+            for profile in recent[:limit]
+        ],
+    }
+
+
+@router.get("/profiles/{profile_id}", include_in_schema=False)
+def profile(profile_id: str):
+    path = profile_path(profile_id)
+    if not is_profile_id(profile_id) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=profile_id + SUFFIX)
@@ -0,0 +1,19 @@
+"""
+Route /upstreams: trạng thái circuit breaker và token bucket của từng host,
+cho người vận hành xem nhanh site nào đang bị chặn / đang chờ.
+"""
+from fastapi import APIRouter
+
+from app.core import circuit_breaker, rate_limit
+
+router = APIRouter()
+
+
+# async: bucket / breaker chỉ được đọc và sửa trên event loop (không có lock),
+# route sync sẽ chạy trong threadpool
+@router.get("/upstreams", include_in_schema=False)
+async def upstreams():
+    return {
+        "circuit_breakers": circuit_breaker.snapshot(),
+        "rate_limits": rate_limit.snapshot(),
+    }
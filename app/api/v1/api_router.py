@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import coindesk, cryptonews, cointelegraph, utoday, theblock, coingape
+from app.api.v1.endpoints import coindesk, cryptonews, cointelegraph, utoday, theblock, coingape, news, search
 
 router = APIRouter()
 
@@ -8,4 +8,6 @@ router.include_router(cryptonews.router, prefix="/v1", tags=["cryptonews_news"])
 router.include_router(cointelegraph.router, prefix="/v1", tags=["cointelegraph_news"])
 router.include_router(utoday.router, prefix="/v1", tags=["utoday_news"])
 router.include_router(theblock.router, prefix="/v1", tags=["theblock_news"])
-router.include_router(coingape.router, prefix="/v1", tags=["coingape_news"])
\ No newline at end of file
+router.include_router(coingape.router, prefix="/v1", tags=["coingape_news"])
+router.include_router(news.router, prefix="/v1", tags=["news"])
+router.include_router(search.router, prefix="/v1", tags=["search"])
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Deadline của request cho các route bài viết của từng nguồn.
+
+Thời gian tối đa lấy từ tham số ?timeout= hoặc header X-Request-Timeout
+(giây), mặc định REQUEST_TIMEOUT. Công việc của request chạy trong deadline đó
+(app.core.deadline); client ngắt kết nối thì công việc bị huỷ ngay, kể cả các
+lượt chờ trình duyệt đang chạy trong thread.
+"""
+import asyncio
+from typing import Awaitable, Optional, TypeVar
+
+from fastapi import HTTPException, Query, Request
+
+from app.core import config, deadline
+from app.core.deadline import Deadline
+
+T = TypeVar("T")
+
+TIMEOUT_HEADER = "x-request-timeout"
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+def _header_timeout(request: Request) -> Optional[float]:
+    value = request.headers.get(TIMEOUT_HEADER)
+    if value is None:
+        return None
+    try:
+        timeout = float(value)
+    except ValueError:
+        timeout = 0.0
+    if not 0 < timeout <= config.REQUEST_TIMEOUT_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"X-Request-Timeout must be a number of seconds in (0, {config.REQUEST_TIMEOUT_MAX:g}]",
+        )
+    return timeout
+
+
+def request_deadline(
+    request: Request,
+    timeout: Optional[float] = Query(
+        None, gt=0, le=config.REQUEST_TIMEOUT_MAX,
+        description="Thời gian tối đa cho request (giây); hết giờ thì trả các bài đã xong kèm danh sách bài bị bỏ",
+    ),
+) -> Deadline:
+    if timeout is None:
+        timeout = _header_timeout(request)
+    if timeout is None and config.REQUEST_TIMEOUT > 0:
+        timeout = config.REQUEST_TIMEOUT
+    return Deadline(timeout)
+
+
+async def _disconnected(request: Request) -> None:
+    # Route GET không đọc body: receive() chỉ trả về khi client ngắt kết nối
+    while (await request.receive())["type"] != "http.disconnect":
+        pass
+
+
+async def run_within(request: Request, request_deadline: Deadline, work: Awaitable[T]) -> T:
+    """
+    await `work` trong deadline của request. Client ngắt kết nối trước khi
+    xong -> huỷ work và raise ClientDisconnected.
+    """
+    with deadline.scope(request_deadline):
+        task = asyncio.ensure_future(work)
+    watcher = asyncio.create_task(_disconnected(request))
+    try:
+        await asyncio.wait((task, watcher), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            request_deadline.cancel()
+            task.cancel()
+    if not task.done():
+        raise ClientDisconnected("client disconnected")
+    return task.result()
@@ -1,15 +1,24 @@
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
 
-from app.services.coingape_service import get_news_links, scrape_article
+from app.api.v1.deadlines import request_deadline, run_within
+from app.api.v1.params import article_query
+from app.api.v1.responses import articles_response
+from app.api.v1.streaming import StreamFormat, stream_response
+from app.core.deadline import Deadline
+from app.services.query import ArticleQuery
+from app.services.sources import get_source_articles, stream_source_articles
 
 router = APIRouter()
 
-COINGAPE_RSS_FEED_URL = "https://coingape.com/category/news/"
-
 @router.get("/coingape_news")
-def get_news():
-    news = []
-    links = get_news_links(COINGAPE_RSS_FEED_URL)
-    for link in links:
-        news.append(scrape_article(link))
-    return {"data": news}
\ No newline at end of file
+async def get_news(
+    request: Request,
+    stream: Optional[StreamFormat] = None,
+    query: ArticleQuery = Depends(article_query),
+    deadline: Deadline = Depends(request_deadline),
+):
+    if stream:
+        return stream_response(stream_source_articles("coingape", query), stream, deadline)
+    entry = await run_within(request, deadline, get_source_articles("coingape", query))
+    return articles_response(request, "coingape", query, entry, deadline.skipped)
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, FastAPI
-from app.services.cointelegraph_service import get_article_links, scrape_article
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
+from app.api.v1.deadlines import request_deadline, run_within
+from app.api.v1.params import article_query
+from app.api.v1.responses import articles_response
+from app.api.v1.streaming import StreamFormat, stream_response
+from app.core.deadline import Deadline
+from app.services.query import ArticleQuery
+from app.services.sources import get_source_articles, stream_source_articles
 
 router = APIRouter()
 
-COINTELEGRAPH_URL = "https://cointelegraph.com/rss"
-
 @router.get('/cointelegraph_news')
-def crawl_articles():
-    try:
-        links = get_article_links(COINTELEGRAPH_URL)
-        articles = [scrape_article(link) for link in links]
-        return {
-            "data": articles
-        }
-    except Exception as e:
-        return {
-            "error": str(e)
-        }
-            
\ No newline at end of file
+async def crawl_articles(
+    request: Request,
+    stream: Optional[StreamFormat] = None,
+    query: ArticleQuery = Depends(article_query),
+    deadline: Deadline = Depends(request_deadline),
+):
+    if stream:
+        return stream_response(stream_source_articles("cointelegraph", query), stream, deadline)
+    entry = await run_within(request, deadline, get_source_articles("cointelegraph", query))
+    return articles_response(request, "cointelegraph", query, entry, deadline.skipped)
@@ -1,36 +1,24 @@
-from datetime import datetime
-from zoneinfo import ZoneInfo
-import feedparser
-from bs4 import BeautifulSoup
-from fastapi import APIRouter
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
 
-router = APIRouter()
+from app.api.v1.deadlines import request_deadline, run_within
+from app.api.v1.params import article_query
+from app.api.v1.responses import articles_response
+from app.api.v1.streaming import StreamFormat, stream_response
+from app.core.deadline import Deadline
+from app.services.query import ArticleQuery
+from app.services.sources import get_source_articles, stream_source_articles
 
-CRYPTONEWS_RSS_FEED_URL = "https://cryptonews.com/news/feed/"
+router = APIRouter()
 
 @router.get("/cryptonews_news")
-def get_news():
-    feed = feedparser.parse(CRYPTONEWS_RSS_FEED_URL)
-    news_items = []
-    
-    for entry in feed.entries:
-
-        content_html = entry.get("content", [{}])[0].get("value", "")
-        content_text = BeautifulSoup(content_html, "html.parser").getText()
-
-        dt_str = entry.get("published","")
-        dt = datetime.strptime(dt_str, "%a, %d %b %Y %H:%M:%S %z")
-
-        news_items.append(
-            {
-                "url": entry.get("link", ""),
-                "title": entry.get("title", ""),
-                "media": entry.get("links", [{}])[1].get("href",""),
-                "published_time": dt.astimezone(ZoneInfo("Asia/Ho_Chi_Minh")),
-                # "description": entry.get("title_detail", {}).get("value",""),
-                "author": entry.get("authors", ""),
-                "content": content_text
-            }
-        )
-    
-    return {"data": news_items}
\ No newline at end of file
+async def get_news(
+    request: Request,
+    stream: Optional[StreamFormat] = None,
+    query: ArticleQuery = Depends(article_query),
+    deadline: Deadline = Depends(request_deadline),
+):
+    if stream:
+        return stream_response(stream_source_articles("cryptonews", query), stream, deadline)
+    entry = await run_within(request, deadline, get_source_articles("cryptonews", query))
+    return articles_response(request, "cryptonews", query, entry, deadline.skipped)
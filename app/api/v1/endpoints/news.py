@@ -0,0 +1,26 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.v1.params import article_query
+from app.api.v1.responses import json_response
+from app.core import config
+from app.services.aggregate import aggregate_sources
+from app.services.query import ArticleQuery
+from app.services.sources import SOURCES
+
+router = APIRouter()
+
+@router.get("/news")
+async def get_news(
+    sources: Optional[str] = Query(None, description="Danh sách nguồn, cách nhau bởi dấu phẩy (mặc định: tất cả)"),
+    deadline: float = Query(config.AGGREGATE_SOURCE_DEADLINE, gt=0, le=300, description="Deadline cho mỗi nguồn (giây)"),
+    collapse: bool = Query(False, description="Mỗi cụm bài gần trùng chỉ trả bài canonical, kèm danh sách bản trùng"),
+    query: ArticleQuery = Depends(article_query),
+):
+    names = [s.strip() for s in sources.split(",") if s.strip()] if sources else list(SOURCES)
+    unknown = [name for name in names if name not in SOURCES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown sources: {', '.join(unknown)}")
+
+    articles, statuses = await aggregate_sources(dict.fromkeys(names), deadline, query, collapse)
+    return json_response({"data": articles, "sources": statuses}, "news")
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.api.v1.params import article_query
+from app.api.v1.responses import json_response
+from app.core.article_store import get_article_store
+from app.services.query import ArticleQuery
+from app.services.search_index import get_search_index
+from app.services.sources import SOURCES
+
+router = APIRouter()
+
+DEFAULT_LIMIT = 20
+
+
+def _search(q: str, sources, query: ArticleQuery, offset: int):
+    hits = get_search_index().search(
+        q, sources, query.window(), limit=query.limit or DEFAULT_LIMIT, offset=offset,
+    )
+    articles = get_article_store().get_many(url for url, _, _ in hits)
+    return [
+        query.project_row({**articles[url].to_dict(), "score": score})
+        for url, _, score in hits
+        if url in articles
+    ]
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description='Từ khoá, vd: ETF approval hoặc "Solana outage" (cụm từ)'),
+    sources: Optional[str] = Query(None, description="Danh sách nguồn, cách nhau bởi dấu phẩy (mặc định: tất cả)"),
+    offset: int = Query(0, ge=0, le=10000, description="Bỏ qua bao nhiêu kết quả đầu (phân trang)"),
+    query: ArticleQuery = Depends(article_query),
+):
+    names = None
+    if sources:
+        names = [s.strip() for s in sources.split(",") if s.strip()]
+        unknown = [name for name in names if name not in SOURCES]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown sources: {', '.join(unknown)}")
+
+    articles = await asyncio.to_thread(_search, q, names, query, offset)
+    return json_response({"data": articles}, "search")
@@ -1,40 +1,23 @@
-from fastapi import APIRouter, FastAPI
-from app.services.theblock_service import get_article_links, scrape_article
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
+from app.api.v1.deadlines import request_deadline, run_within
+from app.api.v1.params import article_query
+from app.api.v1.responses import articles_response
+from app.api.v1.streaming import StreamFormat, stream_response
+from app.core.deadline import Deadline
+from app.services.query import ArticleQuery
+from app.services.sources import get_source_articles, stream_source_articles
 
-THEBLOCK_URL = "https://www.theblock.co/category/policy"
 router = APIRouter()
 
 @router.get('/theblock_news')
-def crawl_articles():
-    try:
-        # Lấy và khử trùng lặp link (giữ nguyên thứ tự xuất hiện)
-        links_raw = get_article_links(THEBLOCK_URL)
-        links = list(dict.fromkeys(links_raw))
-
-        results_by_url = {}
-        errors = []
-
-        # Tối đa 5 luồng
-        with ThreadPoolExecutor(max_workers=5, thread_name_prefix="scraper") as executor:
-            future_to_url = {executor.submit(scrape_article, link): link for link in links}
-
-            for future in as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    article = future.result()  # future đã hoàn thành nên không cần timeout ở đây
-                    results_by_url[url] = article
-                except Exception as e:
-                    # Không để văng cả job chỉ vì 1 link hỏng
-                    errors.append({"url": url, "error": str(e)})
-
-        # Giữ thứ tự kết quả theo thứ tự links ban đầu
-        articles = [results_by_url[u] for u in links if u in results_by_url]
-
-        return {
-            "data": articles,
-        }
-
-    except Exception as e:
-        return {"error": str(e)}
-            
\ No newline at end of file
+async def crawl_articles(
+    request: Request,
+    stream: Optional[StreamFormat] = None,
+    query: ArticleQuery = Depends(article_query),
+    deadline: Deadline = Depends(request_deadline),
+):
+    if stream:
+        return stream_response(stream_source_articles("theblock", query), stream, deadline)
+    entry = await run_within(request, deadline, get_source_articles("theblock", query))
+    return articles_response(request, "theblock", query, entry, deadline.skipped)
@@ -0,0 +1,39 @@
+"""
+Tham số truy vấn dùng chung cho các route bài viết: limit, since/until, fields.
+"""
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Query
+
+from app.core.article import ARTICLE_FIELDS
+from app.services.query import VN_TZ, ArticleQuery
+
+# /v1/news gắn thêm tên nguồn và cụm bài gần trùng vào mỗi bài, /v1/search
+# gắn tên nguồn và điểm
+_KNOWN_FIELDS = frozenset(ARTICLE_FIELDS + ("cluster", "canonical", "duplicates", "score"))
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # Không ghi múi giờ -> hiểu là giờ VN
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=VN_TZ)
+    return value
+
+
+def article_query(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Số bài tối đa"),
+    since: Optional[datetime] = Query(None, description="Chỉ lấy bài đăng từ thời điểm này (ISO 8601, mặc định giờ VN)"),
+    until: Optional[datetime] = Query(None, description="Chỉ lấy bài đăng trước thời điểm này (ISO 8601, mặc định giờ VN)"),
+    fields: Optional[str] = Query(None, description="Các field cần trả về, cách nhau bởi dấu phẩy (vd: url,title)"),
+) -> ArticleQuery:
+    selected = None
+    if fields:
+        selected = frozenset(f.strip() for f in fields.split(",") if f.strip())
+        unknown = selected - _KNOWN_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    since, until = _aware(since), _aware(until)
+    if since is not None and until is not None and since >= until:
+        raise HTTPException(status_code=400, detail="since must be earlier than until")
+    return ArticleQuery(limit=limit, since=since, until=until, fields=selected)
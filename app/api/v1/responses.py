@@ -0,0 +1,133 @@
+"""
+Response JSON cho các endpoint bài viết.
+
+  - FastJSONResponse: encode bằng orjson (nhanh hơn nhiều so với
+    jsonable_encoder + json), là response class mặc định của app.
+  - cached_json_response(): body đã encode (và bản gzip) được giữ lại theo
+    phiên bản dữ liệu; request sau với cùng dữ liệu chỉ trả lại bytes có sẵn,
+    kèm ETag để client nhận 304 nếu đã có.
+
+Endpoint trả về Response đã render sẵn thay vì dict: FastAPI bỏ qua bước
+serialize của nó, và toàn bộ chi phí encode được đo vào metric "serialize".
+"""
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence
+
+import orjson
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core import config, metrics
+from app.core.cache import CacheEntry
+from app.services.query import ArticleQuery
+
+# Body nhỏ hơn mức này không đáng nén
+_GZIP_MIN_SIZE = 1024
+
+
+def dumps(content: Any) -> bytes:
+    # Kiểu orjson không biết (hiếm) thì để jsonable_encoder xử lý
+    return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class _Encoded:
+    __slots__ = ("body", "etag", "_gzipped")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self._gzipped: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        # Chỉ nén khi có client nhận gzip, và chỉ nén một lần
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+# LRU: key -> body đã encode (chỉ dùng trong event loop)
+_encoded: "OrderedDict[Hashable, _Encoded]" = OrderedDict()
+
+
+def _encode(key: Hashable, build: Callable[[], Any], source: str) -> _Encoded:
+    encoded = _encoded.get(key)
+    if encoded is not None:
+        _encoded.move_to_end(key)
+        return encoded
+    with metrics.timed("serialize", source):
+        encoded = _encoded[key] = _Encoded(dumps(build()))
+    while len(_encoded) > config.RESPONSE_CACHE_SIZE:
+        _encoded.popitem(last=False)
+    return encoded
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (t.strip().removeprefix("W/") for t in header.split(","))
+
+
+def cached_json_response(
+    request: Request,
+    key: Hashable,
+    build: Callable[[], Any],
+    source: str,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    `key` phải đổi mỗi khi nội dung đổi (vd. gồm thời điểm fetch của dữ liệu
+    trong cache và tham số truy vấn); build() chỉ được gọi khi chưa có bytes
+    cho key đó.
+    """
+    encoded = _encode(key, build, source)
+    headers = {**(headers or {}), "ETag": encoded.etag, "Vary": "Accept-Encoding"}
+
+    if _etag_matches(request, encoded.etag):
+        return Response(status_code=304, headers=headers)
+
+    body = encoded.body
+    if len(body) >= _GZIP_MIN_SIZE and "gzip" in request.headers.get("accept-encoding", ""):
+        body = encoded.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def articles_response(
+    request: Request, source: str, query: ArticleQuery, entry: CacheEntry, skipped: Sequence[str] = (),
+) -> Response:
+    """
+    Response {"data", "fetched_at", "stale"} cho bài của một nguồn, thêm
+    "skipped" (link bài bị bỏ vì hết deadline) nếu có. Tuổi dữ liệu nằm ở
+    header Age (để body giữ nguyên và dùng lại được bytes đã encode).
+    """
+    meta = entry.meta()
+    skipped = tuple(skipped)
+    key = (source, query, entry.fetched_at, meta["stale"], skipped)
+
+    def build() -> Dict[str, Any]:
+        body = {"data": entry.data, "fetched_at": meta["fetched_at"], "stale": meta["stale"]}
+        if skipped:
+            body["skipped"] = list(skipped)
+        return body
+
+    return cached_json_response(
+        request,
+        key,
+        build,
+        source,
+        headers={"Age": str(int(entry.age))},
+    )
+
+
+def json_response(content, source: str) -> Response:
+    with metrics.timed("serialize", source):
+        return Response(dumps(content), media_type="application/json")
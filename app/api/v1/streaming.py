@@ -0,0 +1,74 @@
+"""
+Response streaming cho các endpoint bài viết: mỗi bài được gửi ngay khi có,
+dạng NDJSON (một JSON mỗi dòng) hoặc Server-Sent Events.
+
+Có deadline thì các bài bị bỏ vì hết giờ được gửi cuối stream: dòng
+{"skipped": [...]} (NDJSON) hoặc event "skipped" (SSE).
+"""
+import logging
+from enum import Enum
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+from app.api.v1.responses import dumps
+from app.core import deadline, metrics
+from app.core.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+class StreamFormat(str, Enum):
+    ndjson = "ndjson"
+    sse = "sse"
+
+
+def _dumps(obj) -> str:
+    with metrics.timed("serialize"):
+        return dumps(obj).decode()
+
+
+async def _ndjson(articles: AsyncIterator[Dict], request_deadline: Deadline) -> AsyncIterator[str]:
+    # Stream chạy sau khi endpoint đã trả về: gắn deadline ở đây để các bước
+    # scrape bên dưới thấy nó
+    deadline.attach(request_deadline)
+    try:
+        async for article in articles:
+            yield _dumps(article) + "\n"
+    except Exception as e:
+        logger.warning("Stream aborted: %s", e)
+        yield _dumps({"error": str(e)}) + "\n"
+    finally:
+        # Client ngắt kết nối giữa chừng -> dừng cả các lượt render trong thread
+        request_deadline.cancel()
+    if request_deadline.skipped:
+        yield _dumps({"skipped": request_deadline.skipped}) + "\n"
+
+
+async def _sse(articles: AsyncIterator[Dict], request_deadline: Deadline) -> AsyncIterator[str]:
+    deadline.attach(request_deadline)
+    try:
+        async for article in articles:
+            yield f"event: article\ndata: {_dumps(article)}\n\n"
+    except Exception as e:
+        logger.warning("Stream aborted: %s", e)
+        yield f"event: error\ndata: {_dumps({'error': str(e)})}\n\n"
+        return
+    finally:
+        request_deadline.cancel()
+    if request_deadline.skipped:
+        yield f"event: skipped\ndata: {_dumps(request_deadline.skipped)}\n\n"
+    yield "event: end\ndata: {}\n\n"
+
+
+def stream_response(
+    articles: AsyncIterator[Dict], fmt: StreamFormat, request_deadline: Optional[Deadline] = None,
+) -> StreamingResponse:
+    request_deadline = request_deadline or Deadline()
+    if fmt is StreamFormat.sse:
+        return StreamingResponse(
+            _sse(articles, request_deadline),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+    return StreamingResponse(_ndjson(articles, request_deadline), media_type="application/x-ndjson")
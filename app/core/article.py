@@ -0,0 +1,84 @@
+"""
+Kiểu dữ liệu bài viết dùng chung cho mọi nguồn.
+
+Article là dataclass có __slots__: nhỏ hơn nhiều so với dict cùng nội dung
+(không có dict riêng cho mỗi bài), và orjson serialize trực tiếp được.
+published_time luôn là datetime giờ VN (hoặc None) nên sắp xếp / lọc theo
+ngày không phải parse lại chuỗi. Mọi extractor tạo bài qua make_article() để
+được chuẩn hoá giống nhau (app.core.normalize).
+"""
+import sys
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from app.core.normalize import author_name, parse_datetime
+
+
+@dataclass(slots=True)
+class Article:
+    url: str
+    title: Optional[str] = None
+    media: Optional[str] = None
+    published_time: Optional[datetime] = None
+    author: Optional[str] = None
+    content: Optional[str] = None
+    source: str = ""
+
+    def to_dict(self, only: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        names = ARTICLE_FIELDS if only is None else [f for f in ARTICLE_FIELDS if f in only]
+        return {name: getattr(self, name) for name in names}
+
+    def __reduce__(self):
+        # Bài đi từ process parse về: intern lại ở process nhận
+        return _restore, tuple(getattr(self, name) for name in ARTICLE_FIELDS)
+
+
+ARTICLE_FIELDS = tuple(f.name for f in fields(Article))
+
+
+def _restore(url, title, media, published_time, author, content, source) -> Article:
+    return Article(
+        url, title, media, published_time,
+        sys.intern(author) if author else author, content, sys.intern(source),
+    )
+
+
+def make_article(
+    source: str,
+    url: str,
+    title: Optional[str] = None,
+    media: Optional[str] = None,
+    published=None,
+    author=None,
+    content: Optional[str] = None,
+) -> Article:
+    """
+    `published`: datetime / chuỗi ISO / RFC 822; `author`: chuỗi hoặc list
+    tác giả của feedparser.
+    """
+    return Article(
+        url=url,
+        title=title.strip() if title else None,
+        media=media or None,
+        published_time=parse_datetime(published),
+        author=author_name(author),
+        content=content,
+        source=sys.intern(source),
+    )
+
+
+def from_dict(data: Dict[str, Any], source: Optional[str] = None) -> Article:
+    """
+    Bài đã lưu dạng JSON (kể cả bản ghi cũ: published_time là chuỗi, author
+    là list...).
+    """
+    return make_article(
+        source or data.get("source") or "",
+        data.get("url", ""),
+        title=data.get("title"),
+        media=data.get("media"),
+        published=data.get("published_time"),
+        author=data.get("author"),
+        content=data.get("content"),
+    )
@@ -0,0 +1,199 @@
+"""
+Kho bài viết SQLite (WAL) dùng chung cho mọi nguồn, khoá theo URL chuẩn hoá.
+
+Trước khi scrape, crawler hỏi kho xem link nào đã có để chỉ fetch link mới;
+bài mới được ghi theo lô (upsert_many). Bài được lưu dạng JSON (orjson) và đọc
+lại thành Article.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import orjson
+
+from app.core import config
+from app.core.article import Article, from_dict
+
+_TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid"}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url            TEXT PRIMARY KEY,
+    source         TEXT NOT NULL,
+    published_time TEXT,
+    scraped_at     REAL NOT NULL,
+    data           TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_articles_source_published ON articles (source, published_time);
+CREATE INDEX IF NOT EXISTS idx_articles_published ON articles (published_time);
+
+CREATE TABLE IF NOT EXISTS feed_state (
+    url           TEXT PRIMARY KEY,
+    etag          TEXT,
+    last_modified TEXT,
+    guids         TEXT NOT NULL,
+    updated_at    REAL NOT NULL
+);
+"""
+
+# SQLite giới hạn số tham số trong một câu lệnh
+_BATCH = 500
+
+
+def canonical_url(url: str) -> str:
+    """
+    Chuẩn hoá URL làm khoá: host chữ thường, bỏ fragment, bỏ tham số tracking
+    (utm_*, fbclid, ...) và dấu "/" ở cuối path.
+    """
+    parts = urlsplit(url.strip())
+    query = urlencode(
+        [
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not (k.lower().startswith("utm_") or k.lower() in _TRACKING_PARAMS)
+        ]
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+
+def _sort_key(published_time: Optional[datetime]) -> Optional[str]:
+    # Lưu published_time dạng ISO UTC để index sắp xếp đúng giữa các múi giờ
+    if published_time is None:
+        return None
+    return published_time.astimezone(timezone.utc).isoformat()
+
+
+class ArticleStore:
+    def __init__(self, path: str = config.ARTICLE_DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def get_many(self, urls: Iterable[str]) -> Dict[str, Article]:
+        """
+        Trả về {canonical_url: article} cho các URL đã có trong kho.
+        """
+        keys = list(dict.fromkeys(canonical_url(u) for u in urls))
+        rows: List[Tuple[str, str, str]] = []
+        with self._lock:
+            for i in range(0, len(keys), _BATCH):
+                batch = keys[i:i + _BATCH]
+                rows.extend(self._conn.execute(
+                    f"SELECT url, source, data FROM articles WHERE url IN ({','.join('?' * len(batch))})",
+                    batch,
+                ))
+        return {url: from_dict(orjson.loads(data), source) for url, source, data in rows}
+
+    def upsert_many(self, articles: Iterable[Article]) -> int:
+        now = time.time()
+        rows = [
+            (
+                canonical_url(a.url),
+                a.source,
+                _sort_key(a.published_time),
+                now,
+                orjson.dumps(a).decode(),
+            )
+            for a in articles
+            if a.url
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO articles (url, source, published_time, scraped_at, data)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    source = excluded.source,
+                    published_time = excluded.published_time,
+                    scraped_at = excluded.scraped_at,
+                    data = excluded.data
+                """,
+                rows,
+            )
+        return len(rows)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM articles").fetchone()[0]
+
+    def iter_articles(self) -> Iterator[Article]:
+        """
+        Mọi bài trong kho, đọc theo lô để không giữ lock lâu.
+        """
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT url, source, data FROM articles WHERE url > ? ORDER BY url LIMIT ?",
+                    (last, _BATCH),
+                ).fetchall()
+            if not rows:
+                return
+            for _, source, data in rows:
+                yield from_dict(orjson.loads(data), source)
+            last = rows[-1][0]
+
+    def load_feed_state(self, url: str) -> Optional[Tuple[Optional[str], Optional[str], List[str]]]:
+        """
+        (etag, last_modified, guids) của lần fetch feed gần nhất.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, guids FROM feed_state WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def save_feed_state(
+        self, url: str, etag: Optional[str], last_modified: Optional[str], guids: List[str]
+    ) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO feed_state (url, etag, last_modified, guids, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    guids = excluded.guids,
+                    updated_at = excluded.updated_at
+                """,
+                (url, etag, last_modified, json.dumps(guids), time.time()),
+            )
+
+
+_store: Optional[ArticleStore] = None
+_store_lock = threading.Lock()
+
+
+def get_article_store() -> ArticleStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+        return _store
+
+
+def close_article_store() -> None:
+    global _store
+    with _store_lock:
+        store, _store = _store, None
+    if store is not None:
+        store.close()
@@ -0,0 +1,343 @@
+"""
+Pool trình duyệt Chrome headless dùng chung cho các service cần Selenium.
+
+Thay vì khởi động Chrome cho mỗi bài viết, pool giữ sẵn tối đa
+BROWSER_POOL_SIZE trình duyệt. Mỗi lần mượn (lease) sẽ mở một tab mới; khi
+trả lại thì tab bị đóng và cookie bị xoá. Một trình duyệt được khởi động lại
+sau BROWSER_MAX_PAGES trang hoặc khi nó bị crash.
+
+    with get_browser_pool().lease() as driver:
+        driver.get(url)
+        html = driver.page_source
+
+hoặc gọn hơn, lấy page_source ngay khi selector cần chờ xuất hiện:
+
+    html = get_browser_pool().render(url, (By.TAG_NAME, "h1"), timeout=15)
+
+Trình duyệt chạy theo một FetchProfile. Profile mặc định (xem
+configured_profile) dùng page load strategy "eager" và chặn ảnh, media, font,
+stylesheet, các domain tracker/quảng cáo (Network.setBlockedURLs của DevTools,
+áp cho từng tab): trang chỉ cần có HTML chứa các phần extractor đọc.
+"""
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from app.core import config, deadline, metrics
+
+logger = logging.getLogger(__name__)
+
+# Khoảng giữa các lần thử giữ chỗ khi đang chờ trình duyệt rảnh
+_ACQUIRE_POLL = 0.1
+
+
+class BrowserPoolClosed(RuntimeError):
+    pass
+
+
+class BrowserPoolExhausted(RuntimeError):
+    pass
+
+
+class _Browser:
+    __slots__ = ("driver", "base_handle", "pages")
+
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.base_handle = driver.current_window_handle
+        self.pages = 0
+
+
+# (By, selector), vd. (By.TAG_NAME, "h1")
+Locator = Tuple[str, str]
+
+# Tài nguyên không cần cho việc lấy HTML
+BLOCKED_RESOURCES = (
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+)
+# Tracker, quảng cáo, video nhúng
+BLOCKED_HOSTS = (
+    "*googletagmanager.com*", "*google-analytics.com*", "*googlesyndication.com*",
+    "*doubleclick.net*", "*adservice.google.com*", "*connect.facebook.net*",
+    "*hotjar.com*", "*scorecardresearch.com*", "*quantserve.com*", "*chartbeat.com*",
+    "*taboola.com*", "*outbrain.com*", "*amazon-adsystem.com*", "*adnxs.com*",
+    "*criteo.com*", "*segment.com*", "*sentry.io*", "*intercom.io*",
+    "*youtube.com/embed*", "*player.vimeo.com*", "*platform.twitter.com*",
+)
+
+# Tổng transferSize của document + mọi tài nguyên đã tải (Resource Timing)
+_TRANSFERRED_BYTES_JS = """
+return performance.getEntriesByType("navigation").concat(performance.getEntriesByType("resource"))
+    .reduce((total, entry) => total + (entry.transferSize || 0), 0);
+"""
+
+
+@dataclass(frozen=True)
+class FetchProfile:
+    # "normal" | "eager" | "none" (WebDriver pageLoadStrategy)
+    page_load_strategy: str = "normal"
+    # Tắt tải ảnh ở mức trình duyệt (kể cả ảnh không khớp pattern nào)
+    block_images: bool = False
+    # Pattern URL bị chặn qua DevTools (Network.setBlockedURLs, "*" là wildcard)
+    blocked_urls: Tuple[str, ...] = ()
+
+
+# Hành vi cũ: chờ load xong toàn bộ trang, không chặn gì (dùng để so sánh)
+FULL_PROFILE = FetchProfile()
+
+
+def configured_profile() -> FetchProfile:
+    if not config.BROWSER_BLOCK_RESOURCES:
+        return FetchProfile(config.BROWSER_PAGE_LOAD_STRATEGY, blocked_urls=config.BROWSER_BLOCKED_URLS)
+    return FetchProfile(
+        config.BROWSER_PAGE_LOAD_STRATEGY,
+        block_images=True,
+        blocked_urls=BLOCKED_RESOURCES + BLOCKED_HOSTS + config.BROWSER_BLOCKED_URLS,
+    )
+
+
+def _chrome_options(profile: FetchProfile) -> Options:
+    options = Options()
+    options.add_argument("--headless=new")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument(f"user-agent={config.BROWSER_USER_AGENT}")
+    options.page_load_strategy = profile.page_load_strategy
+    if profile.block_images:
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+    return options
+
+
+def _transferred_bytes(driver: webdriver.Chrome) -> Optional[int]:
+    try:
+        return int(driver.execute_script(_TRANSFERRED_BYTES_JS) or 0)
+    except WebDriverException:
+        return None
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        size: int = config.BROWSER_POOL_SIZE,
+        max_pages: int = config.BROWSER_MAX_PAGES,
+        acquire_timeout: float = config.BROWSER_ACQUIRE_TIMEOUT,
+        profile: Optional[FetchProfile] = None,
+    ):
+        self.profile = profile or configured_profile()
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.LifoQueue[_Browser]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._browsers: List[Optional[_Browser]] = []
+        self._closed = False
+
+    # --- vòng đời trình duyệt ---
+    def _launch(self) -> _Browser:
+        driver = webdriver.Chrome(options=_chrome_options(self.profile))
+        driver.set_page_load_timeout(config.BROWSER_PAGE_LOAD_TIMEOUT)
+        return _Browser(driver)
+
+    def _discard(self, browser: _Browser) -> None:
+        with self._lock:
+            if browser in self._browsers:
+                self._browsers.remove(browser)
+        try:
+            browser.driver.quit()
+        except Exception:
+            pass
+
+    def _try_reserve(self) -> bool:
+        with self._lock:
+            if self._closed:
+                raise BrowserPoolClosed("browser pool is shut down")
+            if len(self._browsers) < self.size:
+                self._browsers.append(None)  # giữ chỗ trong lúc khởi động Chrome
+                return True
+            return False
+
+    def _launch_reserved(self) -> _Browser:
+        try:
+            browser = self._launch()
+        except Exception:
+            with self._lock:
+                self._browsers.remove(None)
+            raise
+        with self._lock:
+            self._browsers[self._browsers.index(None)] = browser
+        return browser
+
+    def _acquire(self) -> _Browser:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        give_up = time.monotonic() + deadline.budget(self.acquire_timeout, "a browser is free")
+        while True:
+            # Trình duyệt bị bỏ (hết max_pages / chết) không đưa gì vào _idle
+            # mà trả lại chỗ trống: phải thử giữ chỗ lại sau mỗi lượt chờ
+            if self._try_reserve():
+                return self._launch_reserved()
+            remaining = give_up - time.monotonic()
+            if remaining <= 0:
+                deadline.check("a browser is free")
+                raise BrowserPoolExhausted(f"no browser available after {self.acquire_timeout:.0f}s")
+            try:
+                return self._idle.get(timeout=min(remaining, _ACQUIRE_POLL))
+            except queue.Empty:
+                deadline.check("a browser is free")
+
+    def _release(self, browser: _Browser) -> None:
+        browser.pages += 1
+        if self._closed or browser.pages >= self.max_pages:
+            self._discard(browser)
+            return
+        try:
+            # Reset: đóng tab vừa dùng, quay về tab gốc, xoá cookie
+            driver = browser.driver
+            for handle in driver.window_handles:
+                if handle != browser.base_handle:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            driver.switch_to.window(browser.base_handle)
+            driver.delete_all_cookies()
+        except WebDriverException:
+            # Trình duyệt đã chết/treo -> bỏ, lần sau sẽ khởi động cái mới
+            logger.warning("Browser crashed, recycling it")
+            self._discard(browser)
+            return
+        self._idle.put(browser)
+
+    def _open_tab(self) -> _Browser:
+        for attempt in (1, 2):
+            browser = self._acquire()
+            try:
+                browser.driver.switch_to.new_window("tab")
+                if self.profile.blocked_urls:
+                    # Danh sách chặn của DevTools áp theo từng tab
+                    browser.driver.execute_cdp_cmd("Network.enable", {})
+                    browser.driver.execute_cdp_cmd(
+                        "Network.setBlockedURLs", {"urls": list(self.profile.blocked_urls)}
+                    )
+                return browser
+            except WebDriverException:
+                # Trình duyệt idle đã chết -> bỏ và thử lại với cái khác
+                self._discard(browser)
+                if attempt == 2:
+                    raise
+                metrics.RETRIES.labels(metrics.current_source(), "browser_tab").inc()
+
+    @contextmanager
+    def lease(self) -> Iterator[webdriver.Chrome]:
+        """
+        Mượn một tab mới trong một trình duyệt của pool.
+        """
+        with metrics.timed("browser_acquire"):
+            browser = self._open_tab()
+        try:
+            yield browser.driver
+        finally:
+            self._release(browser)
+
+    def render(self, url: str, ready: Locator, timeout: float, every: bool = False) -> Optional[str]:
+        """
+        Mở `url` và trả page_source ngay khi phần tử `ready` xuất hiện (không
+        chờ phần còn lại của trang load xong); None nếu quá `timeout` giây.
+        every=True: chờ mọi phần tử khớp selector có mặt lúc kiểm tra.
+
+        Thời gian chờ bị cắt theo deadline của request; hết deadline hoặc
+        request bị huỷ -> DeadlineExceeded (trình duyệt vẫn được trả về pool).
+        """
+        what = f"rendering {url}"
+        condition = EC.presence_of_all_elements_located(ready) if every else EC.presence_of_element_located(ready)
+
+        def ready_or_cancelled(driver):
+            deadline.check(what)
+            return condition(driver)
+
+        with self.lease() as driver:
+            page_load = deadline.budget(config.BROWSER_PAGE_LOAD_TIMEOUT, what)
+            if page_load < config.BROWSER_PAGE_LOAD_TIMEOUT:
+                driver.set_page_load_timeout(max(page_load, 0.1))
+            try:
+                with metrics.timed("browser_render"):
+                    try:
+                        driver.get(url)
+                    except TimeoutException:
+                        deadline.check(what)
+                        raise
+                    try:
+                        WebDriverWait(
+                            driver, deadline.budget(timeout, what), poll_frequency=config.BROWSER_WAIT_POLL,
+                        ).until(ready_or_cancelled)
+                    except TimeoutException:
+                        deadline.check(what)
+                        return None
+                    html = driver.page_source
+            finally:
+                if page_load < config.BROWSER_PAGE_LOAD_TIMEOUT:
+                    driver.set_page_load_timeout(config.BROWSER_PAGE_LOAD_TIMEOUT)
+            transferred = _transferred_bytes(driver)
+            if transferred is not None:
+                metrics.BROWSER_PAGE_BYTES.labels(metrics.current_source()).observe(transferred)
+            return html
+
+    def prewarm(self, count: Optional[int] = None) -> None:
+        """
+        Khởi động sẵn `count` trình duyệt (mặc định: cả pool).
+        """
+        for _ in range(min(count or self.size, self.size)):
+            try:
+                if not self._try_reserve():
+                    break
+                self._idle.put(self._launch_reserved())
+            except BrowserPoolClosed:
+                break
+            except Exception as e:
+                logger.warning("Could not prewarm browser: %s", e)
+                break
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(browser)
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+        return _pool
+
+
+def shutdown_browser_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,108 @@
+"""
+Cache in-memory theo key (mỗi nguồn tin một key) với TTL và
+stale-while-revalidate:
+
+  - tuổi < ttl                 -> fresh, trả về ngay
+  - ttl <= tuổi < ttl + stale  -> stale, trả về ngay + làm mới ở nền
+  - không có / quá cũ          -> gọi loader và chờ kết quả (cold start)
+
+Mỗi key chỉ có tối đa một lần làm mới chạy cùng lúc. Loader trả về
+Published (dữ liệu do worker khác scrape, xem app.core.single_flight) thì tuổi
+của entry tính từ lúc dữ liệu đó được scrape.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.single_flight import Published
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class CacheEntry:
+    data: Any
+    ttl: float
+    stale_window: float
+    fetched_at: float = field(default_factory=time.time)
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.age < self.ttl
+
+    @property
+    def is_usable(self) -> bool:
+        return self.age < self.ttl + self.stale_window
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "fetched_at": datetime.fromtimestamp(self.fetched_at, timezone.utc).isoformat(),
+            "age_seconds": round(self.age, 3),
+            "stale": not self.is_fresh,
+        }
+
+
+class SWRCache:
+    def __init__(self, stale_window: float):
+        self.stale_window = stale_window
+        self._entries: Dict[str, CacheEntry] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        return self._entries.get(key)
+
+    def set(self, key: str, data: Any, ttl: float, fetched_at: Optional[float] = None) -> CacheEntry:
+        entry = CacheEntry(data, ttl, self.stale_window)
+        if fetched_at is not None:
+            entry.fetched_at = fetched_at
+        current = self._entries.get(key)
+        if current is not None and current.fetched_at > entry.fetched_at:
+            # Không ghi đè dữ liệu mới hơn bằng kết quả cũ hơn
+            return current
+        self._entries[key] = entry
+        return entry
+
+    def refresh(self, key: str, loader: Loader, ttl: float) -> "asyncio.Task[CacheEntry]":
+        """
+        Chạy loader và lưu kết quả. Nếu key đang được làm mới thì dùng lại
+        task đang chạy.
+        """
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key, loader, ttl))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+            task.add_done_callback(_log_failure(key))
+        return task
+
+    async def _load(self, key: str, loader: Loader, ttl: float) -> CacheEntry:
+        data = await loader()
+        if isinstance(data, Published):
+            return self.set(key, data.data, ttl, data.fetched_at)
+        return self.set(key, data, ttl)
+
+    async def get(self, key: str, loader: Loader, ttl: float) -> CacheEntry:
+        entry = self._entries.get(key)
+        if entry is not None and entry.is_fresh:
+            return entry
+        if entry is not None and entry.is_usable:
+            self.refresh(key, loader, ttl)
+            return entry
+        # shield: client ngắt kết nối không huỷ lần scrape mà request khác cũng chờ
+        return await asyncio.shield(self.refresh(key, loader, ttl))
+
+
+def _log_failure(key: str) -> Callable[[asyncio.Task], None]:
+    def callback(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Refresh of %s failed: %s", key, task.exception())
+    return callback
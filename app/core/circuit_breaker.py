@@ -0,0 +1,103 @@
+"""
+Circuit breaker theo host cho các site nguồn.
+
+    closed     -> bình thường; đếm số request lỗi liên tiếp (5xx, 429, lỗi
+                  kết nối / timeout, trình duyệt không load được trang)
+    open       -> lỗi liên tiếp >= BREAKER_FAILURE_THRESHOLD: mọi request tới
+                  host bị từ chối ngay (CircuitOpenError) trong
+                  BREAKER_RESET_TIMEOUT giây, không chiếm worker / trình duyệt
+    half_open  -> hết thời gian chờ: cho một request thử; thành công thì
+                  đóng lại, lỗi thì mở tiếp
+
+Một request được tính một lần sau khi đã hết lượt retry.
+"""
+import time
+from typing import Any, Dict, Optional
+
+from app.core import config, metrics
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_started: Optional[float] = None
+        self._publish()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def _publish(self) -> None:
+        metrics.CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[self.state])
+
+    def before_call(self) -> None:
+        """
+        Raise CircuitOpenError nếu request phải bị từ chối.
+        """
+        state = self.state
+        if state == CLOSED:
+            return
+        now = time.monotonic()
+        if state == HALF_OPEN:
+            # Chỉ một request thử tại một thời điểm (request thử bị huỷ giữa
+            # chừng thì sau reset_timeout cho thử lại)
+            if self._trial_started is None or now - self._trial_started >= self.reset_timeout:
+                self._trial_started = now
+                self._publish()
+                return
+        metrics.CIRCUIT_REJECTIONS.labels(self.name).inc()
+        retry_in = max(0.0, self._opened_at + self.reset_timeout - now)
+        raise CircuitOpenError(f"{self.name}: circuit open, retry in {retry_in:.0f}s")
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = self._trial_started = None
+        self._publish()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._trial_started = None
+        self._publish()
+
+    def snapshot(self) -> Dict[str, Any]:
+        state = self.state
+        snapshot: Dict[str, Any] = {"state": state, "consecutive_failures": self.failures}
+        if state == OPEN:
+            snapshot["retry_in_seconds"] = round(self._opened_at + self.reset_timeout - time.monotonic(), 1)
+        return snapshot
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    breaker = _breakers.get(host)
+    if breaker is None:
+        breaker = _breakers[host] = CircuitBreaker(
+            host, config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_TIMEOUT
+        )
+    return breaker
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return {host: breaker.snapshot() for host, breaker in sorted(_breakers.items())}
@@ -0,0 +1,183 @@
+"""
+Cấu hình runtime của app, đọc từ biến môi trường (có giá trị mặc định).
+"""
+import os
+import re
+from typing import Tuple
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# --- HTTP client dùng chung ---
+HTTP_TIMEOUT = _env_float("HTTP_TIMEOUT", 20.0)
+HTTP_MAX_CONNECTIONS = _env_int("HTTP_MAX_CONNECTIONS", 100)
+HTTP_MAX_KEEPALIVE = _env_int("HTTP_MAX_KEEPALIVE", 20)
+# Số request đồng thời tối đa tới cùng một host
+HTTP_PER_HOST_LIMIT = _env_int("HTTP_PER_HOST_LIMIT", 24)
+HTTP2_ENABLED = _env_bool("HTTP2_ENABLED", True)
+
+# Token bucket cho mỗi host: số request/giây và số request được dồn tối đa
+HTTP_RATE_LIMIT = _env_float("HTTP_RATE_LIMIT", 8.0)
+HTTP_RATE_BURST = _env_float("HTTP_RATE_BURST", 16.0)
+# Retry (5xx, 429, lỗi kết nối) với exponential backoff + jitter
+HTTP_RETRIES = _env_int("HTTP_RETRIES", 3)
+HTTP_RETRY_BACKOFF = _env_float("HTTP_RETRY_BACKOFF", 0.5)
+# Retry-After dài hơn mức này thì không chờ mà báo lỗi luôn
+HTTP_RETRY_MAX_DELAY = _env_float("HTTP_RETRY_MAX_DELAY", 30.0)
+
+# Circuit breaker theo host
+BREAKER_FAILURE_THRESHOLD = _env_int("BREAKER_FAILURE_THRESHOLD", 5)
+BREAKER_RESET_TIMEOUT = _env_float("BREAKER_RESET_TIMEOUT", 60.0)
+
+
+def host_rate_limit(host: str) -> Tuple[float, float]:
+    """
+    (rate, burst) cho một host, override bằng RATE_LIMIT_<HOST> /
+    RATE_BURST_<HOST>, vd. RATE_LIMIT_U_TODAY=2 cho u.today (0 = không giới hạn).
+    """
+    key = re.sub(r"[^A-Z0-9]+", "_", host.upper().removeprefix("WWW."))
+    return (
+        _env_float(f"RATE_LIMIT_{key}", HTTP_RATE_LIMIT),
+        _env_float(f"RATE_BURST_{key}", HTTP_RATE_BURST),
+    )
+
+# --- Selenium browser pool ---
+BROWSER_POOL_SIZE = _env_int("BROWSER_POOL_SIZE", 3)
+# Số trang tối đa một trình duyệt phục vụ trước khi bị khởi động lại
+BROWSER_MAX_PAGES = _env_int("BROWSER_MAX_PAGES", 50)
+# Thời gian tối đa chờ mượn một trình duyệt khi pool đang bận hết
+BROWSER_ACQUIRE_TIMEOUT = _env_float("BROWSER_ACQUIRE_TIMEOUT", 60.0)
+BROWSER_PAGE_LOAD_TIMEOUT = _env_float("BROWSER_PAGE_LOAD_TIMEOUT", 30.0)
+# Khởi động sẵn trình duyệt khi app start
+BROWSER_PREWARM = _env_bool("BROWSER_PREWARM", True)
+# "eager": driver.get() trả về ngay khi có DOM, không chờ ảnh / iframe / script
+# async; "normal" = chờ load xong cả trang như trước
+BROWSER_PAGE_LOAD_STRATEGY = os.getenv("BROWSER_PAGE_LOAD_STRATEGY", "eager")
+# Chặn ảnh, media, font, stylesheet và các domain tracker/quảng cáo quen thuộc
+BROWSER_BLOCK_RESOURCES = _env_bool("BROWSER_BLOCK_RESOURCES", True)
+# Thêm pattern URL cần chặn (cú pháp Network.setBlockedURLs, cách nhau bởi dấu phẩy)
+BROWSER_BLOCKED_URLS = tuple(
+    p.strip() for p in os.getenv("BROWSER_BLOCKED_URLS", "").split(",") if p.strip()
+)
+# Khoảng giữa các lần kiểm tra selector chờ (WebDriverWait mặc định 0.5s)
+BROWSER_WAIT_POLL = _env_float("BROWSER_WAIT_POLL", 0.1)
+BROWSER_USER_AGENT = os.getenv(
+    "BROWSER_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36",
+)
+
+# --- Fetch tĩnh trước, trình duyệt sau (TheBlock, CoinGape) ---
+# Tắt để luôn dùng trình duyệt
+STATIC_FETCH_ENABLED = _env_bool("STATIC_FETCH_ENABLED", True)
+STATIC_FETCH_TIMEOUT = _env_float("STATIC_FETCH_TIMEOUT", 10.0)
+
+# --- Ingestion scheduler / cache ---
+SCHEDULER_ENABLED = _env_bool("SCHEDULER_ENABLED", True)
+# Sau khi hết TTL, dữ liệu cũ vẫn được trả về (và làm mới ở nền) trong khoảng này
+CACHE_STALE_WINDOW = _env_float("CACHE_STALE_WINDOW", 3600.0)
+
+
+def poll_interval(source: str, default: float) -> float:
+    """
+    Chu kỳ poll (giây) của một nguồn, override bằng POLL_INTERVAL_<SOURCE>.
+    """
+    return _env_float(f"POLL_INTERVAL_{source.upper()}", default)
+
+
+def source_url(source: str, default: str) -> str:
+    """
+    URL feed / trang listing của một nguồn, override bằng SOURCE_URL_<SOURCE>
+    (vd. trỏ vào mock server khi load test, xem benchmarks.loadtest).
+    """
+    return os.getenv(f"SOURCE_URL_{source.upper()}") or default
+
+# --- Lưu trữ cục bộ ---
+DATA_DIR = os.getenv("DATA_DIR", "data")
+ARTICLE_DB_PATH = os.getenv("ARTICLE_DB_PATH", os.path.join(DATA_DIR, "articles.db"))
+
+# Index full-text (FTS5) cho /v1/search
+SEARCH_DB_PATH = os.getenv("SEARCH_DB_PATH", os.path.join(DATA_DIR, "search.db"))
+# Chỉ chấm điểm BM25 cho chừng này bài khớp mới nhất của mỗi truy vấn
+SEARCH_MAX_CANDIDATES = _env_int("SEARCH_MAX_CANDIDATES", 1000)
+# Số bài tối đa của mỗi segment index: segment nhỏ -> truy vấn từ phổ biến nhanh
+# hơn, nhưng truy vấn từ hiếm phải đi qua nhiều segment hơn
+SEARCH_SEGMENT_SIZE = _env_int("SEARCH_SEGMENT_SIZE", 50000)
+
+# Trang thô (HTML, body feed) đã fetch, nén trên đĩa, để chạy lại extractor
+# (python -m app.services.reextract) mà không phải crawl lại
+PAGE_CACHE_ENABLED = _env_bool("PAGE_CACHE_ENABLED", True)
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", os.path.join(DATA_DIR, "pages.db"))
+# Dung lượng tối đa (MB, sau khi nén); vượt quá thì xoá trang lâu nhất không được fetch lại
+PAGE_CACHE_MAX_MB = _env_int("PAGE_CACHE_MAX_MB", 2048)
+# Mức nén zlib (1 nhanh nhất - 9 nhỏ nhất)
+PAGE_CACHE_LEVEL = _env_int("PAGE_CACHE_LEVEL", 6)
+# Số trang chờ ghi tối đa; đầy thì trang mới bị bỏ thay vì làm chậm việc scrape
+PAGE_CACHE_QUEUE = _env_int("PAGE_CACHE_QUEUE", 512)
+
+# --- Phát hiện bài gần trùng giữa các nguồn ---
+DEDUP_DB_PATH = os.getenv("DEDUP_DB_PATH", os.path.join(DATA_DIR, "near_duplicates.db"))
+# Độ tương đồng (Jaccard ước lượng) tối thiểu để hai bài vào cùng một cụm
+DEDUP_THRESHOLD = _env_float("DEDUP_THRESHOLD", 0.5)
+# Chỉ băm tiêu đề + chừng này từ đầu tiên của nội dung
+DEDUP_MAX_WORDS = _env_int("DEDUP_MAX_WORDS", 400)
+
+# --- Single-flight giữa các worker process (uvicorn --workers N) ---
+# Kết quả scrape mới nhất + file lock của từng nguồn; tắt thì mỗi worker tự scrape
+SHARED_RESULTS_ENABLED = _env_bool("SHARED_RESULTS_ENABLED", True)
+SHARED_RESULTS_DIR = os.getenv("SHARED_RESULTS_DIR", os.path.join(DATA_DIR, "shared"))
+# Khoảng nghỉ giữa các lần thử lấy lock khi worker khác đang scrape
+SHARED_LOCK_POLL = _env_float("SHARED_LOCK_POLL", 0.1)
+# Kết quả của các truy vấn có tham số (limit/since/until...) được giữ chừng này giây
+SHARED_QUERY_RESULT_TTL = _env_float("SHARED_QUERY_RESULT_TTL", 3600.0)
+
+# --- Response ---
+# Số body JSON đã encode (theo nguồn + tham số + phiên bản dữ liệu) được giữ lại
+RESPONSE_CACHE_SIZE = _env_int("RESPONSE_CACHE_SIZE", 256)
+
+# --- Deadline của request (?timeout= / header X-Request-Timeout) ---
+# Mặc định cho request không ghi timeout (giây, 0 = không giới hạn)
+REQUEST_TIMEOUT = _env_float("REQUEST_TIMEOUT", 0.0)
+REQUEST_TIMEOUT_MAX = _env_float("REQUEST_TIMEOUT_MAX", 300.0)
+
+# --- Profile từng request (app.core.profiler), xem danh sách ở /profiles ---
+# Request có header X-Profile bằng giá trị này thì được profile (trống = tắt)
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+# Tỉ lệ request được profile ngẫu nhiên (0..1)
+PROFILE_SAMPLE_RATE = _env_float("PROFILE_SAMPLE_RATE", 0.0)
+# Khoảng giữa hai lần lấy mẫu stack (giây)
+PROFILE_INTERVAL = _env_float("PROFILE_INTERVAL", 0.005)
+# Request dài hơn (vd. stream) chỉ được lấy mẫu chừng này giây đầu
+PROFILE_MAX_SECONDS = _env_float("PROFILE_MAX_SECONDS", 120.0)
+# Số request được profile cùng lúc tối đa trong một process
+PROFILE_MAX_CONCURRENT = _env_int("PROFILE_MAX_CONCURRENT", 2)
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+# Số file profile được giữ lại (xoá file cũ nhất)
+PROFILE_KEEP = _env_int("PROFILE_KEEP", 200)
+
+# --- /v1/news ---
+# Thời gian tối đa (giây) chờ mỗi nguồn trước khi trả kết quả một phần
+AGGREGATE_SOURCE_DEADLINE = _env_float("AGGREGATE_SOURCE_DEADLINE", 10.0)
+
+# --- Pipeline fetch -> parse ---
+# Số process parse HTML (0 = parse ngay trong event loop, dùng khi debug)
+PARSE_WORKERS = _env_int("PARSE_WORKERS", os.cpu_count() or 1)
+# Số trang đã tải nhưng chưa parse tối đa được giữ trong hàng đợi
+PIPELINE_QUEUE_SIZE = _env_int("PIPELINE_QUEUE_SIZE", 32)
+# Số fetch HTTP đồng thời tối đa của một lượt crawl
+PIPELINE_FETCH_CONCURRENCY = _env_int("PIPELINE_FETCH_CONCURRENCY", 32)
@@ -0,0 +1,137 @@
+"""
+Deadline theo request, truyền xuống mọi bước scrape qua ContextVar.
+
+Endpoint mở một Deadline (scope) cho request; các bước bên dưới (task con,
+asyncio.to_thread, thread Selenium) đều thấy nó vì context được copy theo:
+
+  - HTTP client: timeout của mỗi request và khoảng chờ retry không vượt quá
+    thời gian còn lại.
+  - Trình duyệt: page load timeout và WebDriverWait bị cắt theo deadline, và
+    dừng ngay khi request bị huỷ (client ngắt kết nối) -> trình duyệt được trả
+    về pool thay vì chờ hết 15-20s.
+  - Pipeline: hết giờ thì huỷ các trang chưa xong; link của chúng được ghi vào
+    deadline.skipped để response liệt kê bài bị bỏ.
+
+Việc dùng chung (refresh cache, lượt scrape single-flight) chạy ngoài deadline
+của request (scope(None)): một client vội không được làm hỏng kết quả của
+người khác.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds: Optional[float] = None):
+        # None = không giới hạn thời gian (vẫn huỷ được)
+        self.expires = time.monotonic() + seconds if seconds is not None else None
+        # Set từ event loop, đọc từ thread trình duyệt
+        self.cancelled = threading.Event()
+        # Link bài bị bỏ vì hết giờ / bị huỷ
+        self.skipped: List[str] = []
+
+    @property
+    def bounded(self) -> bool:
+        return self.expires is not None
+
+    def remaining(self) -> Optional[float]:
+        if self.expires is None:
+            return None
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.cancelled.is_set() or (self.expires is not None and time.monotonic() >= self.expires)
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+
+    def skip(self, url: str) -> None:
+        self.skipped.append(url)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def attach(deadline: Optional[Deadline]) -> None:
+    """
+    Gán deadline cho context hiện tại mà không reset (dùng trong async
+    generator, như metrics.set_source).
+    """
+    _current.set(deadline)
+
+
+def is_bounded() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.bounded
+
+
+def expired() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.expired
+
+
+def check(what: str = "request") -> None:
+    if expired():
+        raise DeadlineExceeded(f"deadline exceeded before {what}")
+
+
+def budget(timeout: Optional[float], what: str = "request") -> Optional[float]:
+    """
+    `timeout` cắt theo thời gian còn lại của deadline; raise DeadlineExceeded
+    nếu đã hết giờ.
+    """
+    check(what)
+    deadline = _current.get()
+    remaining = deadline.remaining() if deadline is not None else None
+    if remaining is None:
+        return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+async def bounded(awaitable: Awaitable[T], what: str = "request") -> T:
+    """
+    await `awaitable` trong thời gian còn lại (huỷ nó nếu hết giờ).
+    """
+    try:
+        remaining = budget(None, what)
+    except DeadlineExceeded:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise
+    if remaining is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, remaining)
+    except DeadlineExceeded:
+        raise
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"deadline exceeded during {what}") from None
+
+
+def skip(url: str) -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.skip(url)
@@ -0,0 +1,355 @@
+"""
+Engine trích field từ trang bài viết theo khai báo, duyệt cây một lần.
+
+Mỗi site khai báo các field bằng luật (thay vì gọi find()/select_one() nhiều
+lần, mỗi lần lại duyệt cả cây):
+
+    EXTRACTOR = Extractor(
+        ARTICLE_PARTS,
+        title=Field(Rule(Match("h1"), text)),
+        author=Field(
+            Rule(Match("meta", attrs={"name": "author"}), attr("content")),
+            Rule(Match("a", within=Match(classes=("author-brief__name",))), text),
+        ),
+        content=Collect(Match(("p", "li")), containers=(BODY, Match("main")), skip=ADS),
+    )
+    values = EXTRACTOR.extract(html, skip=("content",))
+
+  - Match: tên thẻ / class (có ít nhất một) / attribute, và tuỳ chọn
+    `within`: phải nằm trong một thẻ khớp Match khác (như "div.x a" của CSS).
+  - Field: chuỗi fallback các Rule theo thứ tự ưu tiên. Lúc duyệt cây chỉ ghi
+    lại thẻ khớp; giá trị (get_text, parse...) chỉ được tính ở cuối, lần
+    lượt từng Rule cho tới khi có giá trị, nên fallback phía sau không tốn gì
+    khi luật đầu đã có kết quả. `fallback(soup)` là bước cuối cùng (vd. quét
+    toàn bộ text), chỉ chạy khi mọi Rule đều không ra giá trị.
+  - Collect: gom mọi thẻ khớp (vd. đoạn văn) nằm trong container đầu tiên có
+    trong trang của chuỗi `containers`, bỏ đoạn khớp `skip` (một regex đã
+    compile cho mọi cụm quảng cáo / điều khoản, xem phrases()).
+
+Toàn bộ field được thu trong MỘT lần duyệt cây: mỗi thẻ chỉ được so với các
+luật có cùng tên thẻ hoặc class. Field có giá trị từ luật đầu tiên thì thôi so
+các luật còn lại; khi mọi field đã xong (và không có Collect) thì dừng duyệt.
+"""
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+from bs4 import BeautifulSoup, PageElement, SoupStrainer, Tag
+
+from app.core.parsing import make_soup
+
+Value = Callable[[Tag], Any]
+
+
+@dataclass(frozen=True)
+class Match:
+    names: Union[str, Tuple[str, ...], None] = None
+    classes: Tuple[str, ...] = ()
+    # attribute -> giá trị cần bằng, True (phải có, khác rỗng) hoặc hàm kiểm
+    # tra; dict được đổi thành tuple để Match hash được
+    attrs: Any = ()
+    within: Optional["Match"] = None
+
+    def __post_init__(self):
+        if isinstance(self.attrs, dict):
+            object.__setattr__(self, "attrs", tuple(self.attrs.items()))
+
+    def tag_names(self) -> Optional[Tuple[str, ...]]:
+        if self.names is None:
+            return None
+        return (self.names,) if isinstance(self.names, str) else tuple(self.names)
+
+    def test(self, tag: Tag) -> bool:
+        if self.classes and not any(c in self.classes for c in tag.get("class") or ()):
+            return False
+        for key, expected in self.attrs:
+            value = tag.get(key)
+            if expected is True:
+                if not value:
+                    return False
+            elif callable(expected):
+                if not expected(value):
+                    return False
+            elif value != expected:
+                return False
+        return True
+
+
+def text(tag: Tag) -> Optional[str]:
+    return tag.get_text(strip=True) or None
+
+
+def spaced_text(tag: Tag) -> Optional[str]:
+    return tag.get_text(" ", strip=True) or None
+
+
+def attr(name: str) -> Value:
+    def value(tag: Tag) -> Optional[str]:
+        found = tag.get(name)
+        return found.strip() or None if isinstance(found, str) else None
+    return value
+
+
+def phrases(*items: str) -> "re.Pattern[str]":
+    """
+    Một regex (không phân biệt hoa thường) khớp bất kỳ cụm nào trong `items`:
+    mỗi đoạn văn chỉ cần quét một lần thay vì lower() + so từng cụm.
+    """
+    return re.compile("|".join(re.escape(item) for item in items), re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Rule:
+    match: Match
+    value: Value = text
+
+
+class Field:
+    def __init__(
+        self,
+        *rules: Rule,
+        parse: Optional[Callable[[Any], Any]] = None,
+        fallback: Optional[Callable[[BeautifulSoup], Any]] = None,
+    ):
+        self.rules = rules
+        self.parse = parse
+        self.fallback = fallback
+
+    def parsed(self, raw: Any) -> Any:
+        if raw is None or self.parse is None:
+            return raw
+        return self.parse(raw)
+
+    def resolve(self, found: Sequence[List[Tag]], soup: BeautifulSoup) -> Any:
+        for rule, tags in zip(self.rules, found):
+            for tag in tags:
+                value = self.parsed(rule.value(tag))
+                if value is not None:
+                    return value
+        if self.fallback is not None:
+            return self.parsed(self.fallback(soup))
+        return None
+
+
+class Collect:
+    """
+    Nối giá trị các thẻ khớp `items` (theo thứ tự trong trang) bằng `sep`.
+    Nhiều `items`: dùng Match đầu tiên ra được ít nhất một giá trị. Không thấy
+    container nào thì gom trong cả trang (whole_page=True) hoặc trả None.
+    """
+
+    def __init__(
+        self,
+        *items: Match,
+        containers: Sequence[Union[Match, Tuple[Match, ...]]] = (),
+        value: Value = spaced_text,
+        skip: Optional["re.Pattern[str]"] = None,
+        sep: str = "\n\n",
+        whole_page: bool = True,
+    ):
+        self.items = items
+        # Mỗi phần tử là một nhóm Match: thẻ đầu tiên (theo thứ tự trong
+        # trang) khớp bất kỳ Match nào của nhóm là container
+        self.containers = tuple(c if isinstance(c, tuple) else (c,) for c in containers)
+        self.value = value
+        self.skip = skip
+        self.sep = sep
+        self.whole_page = whole_page
+
+
+# Thẻ khớp một scope (Match được dùng làm `within` / container) cùng chuỗi
+# scope bao quanh nó: ((scope id, thẻ), ...)
+Chain = Tuple[Tuple[int, Tag], ...]
+
+
+class _Index:
+    """
+    Luật (và scope) đánh chỉ mục theo tên thẻ, hoặc theo class nếu Match
+    không chỉ định tên thẻ: phần lớn thẻ trong trang không phải so với Match
+    nào. Phần tử: (là scope?, slot / id scope, Match, id scope phải nằm trong
+    hoặc -1).
+    """
+
+    def __init__(self):
+        self.by_name: Dict[str, list] = {}
+        self.by_class: Dict[str, list] = {}
+        self.any_tag: list = []
+        self.for_name: Dict[str, list] = {}
+
+    def add(self, entry: Tuple[bool, int, Match, int]) -> None:
+        match = entry[2]
+        names = match.tag_names()
+        if names is not None:
+            for name in names:
+                self.by_name.setdefault(name, []).append(entry)
+        elif match.classes:
+            for cls in match.classes:
+                self.by_class.setdefault(cls, []).append(entry)
+        else:
+            self.any_tag.append(entry)
+
+    def candidates(self, tag: Tag) -> list:
+        entries = self.for_name.get(tag.name)
+        if entries is None:
+            entries = self.for_name[tag.name] = self.by_name.get(tag.name, []) + self.any_tag
+        if self.by_class:
+            classes = tag.attrs.get("class")
+            if classes:
+                extra = [e for cls in classes for e in self.by_class.get(cls, ())]
+                if extra:
+                    # Match có nhiều class chỉ được so một lần
+                    return entries + (list(dict.fromkeys(extra)) if len(classes) > 1 else extra)
+        return entries
+
+
+class _Plan:
+    """
+    Các luật của một tập field, đánh chỉ mục để mỗi thẻ chỉ so với các luật
+    có thể khớp.
+    """
+
+    def __init__(self, fields: Dict[str, Union[Field, Collect]]):
+        self.fields = fields
+        self.index = _Index()
+        self.scope_ids: Dict[Match, int] = {}
+        # (field, thứ tự luật) -> slot; slot -> field với luật đầu tiên của Field
+        self.slots: Dict[Tuple[str, int], int] = {}
+        self.leads: Dict[int, str] = {}
+        self.field_slots: Dict[str, FrozenSet[int]] = {}
+        self.collecting = any(isinstance(spec, Collect) for spec in fields.values())
+
+        for name, spec in fields.items():
+            matches = spec.items if isinstance(spec, Collect) else [r.match for r in spec.rules]
+            for i, match in enumerate(matches):
+                slot = self.slots[(name, i)] = len(self.slots)
+                self.index.add((False, slot, match, self._within(match)))
+            self.field_slots[name] = frozenset(self.slots[(name, i)] for i in range(len(matches)))
+            if isinstance(spec, Collect):
+                for group in spec.containers:
+                    for match in group:
+                        self._scope(match)
+            elif matches:
+                self.leads[self.slots[(name, 0)]] = name
+
+    def _within(self, match: Match) -> int:
+        return self._scope(match.within) if match.within is not None else -1
+
+    def _scope(self, match: Match) -> int:
+        scope = self.scope_ids.get(match)
+        if scope is None:
+            scope = self.scope_ids[match] = len(self.scope_ids)
+            self.index.add((True, scope, match, self._within(match)))
+        return scope
+
+
+class Extractor:
+    def __init__(self, parse_only: Optional[SoupStrainer] = None, **fields: Union[Field, Collect]):
+        self.parse_only = parse_only
+        self.fields = fields
+        self._plans: Dict[FrozenSet[str], _Plan] = {}
+
+    def _plan(self, skip: Iterable[str]) -> _Plan:
+        key = frozenset(skip)
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = _Plan({n: f for n, f in self.fields.items() if n not in key})
+        return plan
+
+    def extract(self, html, skip: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Giá trị của mọi field (trừ các field trong `skip`, trả None).
+        """
+        return self.run(make_soup(html, self.parse_only), skip)
+
+    def run(self, soup: BeautifulSoup, skip: Iterable[str] = ()) -> Dict[str, Any]:
+        plan = self._plan(skip)
+        values: Dict[str, Any] = dict.fromkeys(self.fields)
+        found: List[list] = [[] for _ in plan.slots]
+        # scope id -> thẻ đầu tiên khớp (thứ tự duyệt, thẻ)
+        first_scope: Dict[int, Tuple[int, Tag]] = {}
+        # Field đã có giá trị từ luật đầu tiên: các luật còn lại không cần so
+        resolved: set = set()
+        dead: set = set()
+        pending = sum(1 for spec in plan.fields.values() if isinstance(spec, Field))
+
+        # Duyệt theo thứ tự trong trang (next_element). Scope đang bao quanh
+        # thẻ hiện tại: inside (tập id) + chain; được trả lại trạng thái cũ khi
+        # đi qua phần tử cuối cùng bên trong thẻ scope.
+        inside: FrozenSet[int] = frozenset()
+        chain: Chain = ()
+        open_scopes: List[Tuple[PageElement, FrozenSet[int], Chain]] = []
+        index = plan.index
+        for_name, by_class = index.for_name, index.by_class
+        order = 0
+        for node in soup.descendants:
+            if isinstance(node, Tag):
+                order += 1
+                entries = for_name.get(node.name)
+                if entries is None or (by_class and node.attrs.get("class")):
+                    entries = index.candidates(node)
+                entered = None
+                for is_scope, key, match, within in entries:
+                    if not (within < 0 or within in inside) or not match.test(node):
+                        continue
+                    if is_scope:
+                        first_scope.setdefault(key, (order, node))
+                        scopes, scope_chain = entered or (inside, chain)
+                        entered = (scopes | {key}, scope_chain + ((key, node),))
+                        continue
+                    if key in dead:
+                        continue
+                    name = plan.leads.get(key)
+                    if name is None:
+                        found[key].append((node, chain))
+                        continue
+                    # Luật đầu tiên của Field: tính giá trị ngay, có thì xong field
+                    spec = plan.fields[name]
+                    value = spec.parsed(spec.rules[0].value(node))
+                    if value is not None:
+                        values[name] = value
+                        resolved.add(name)
+                        dead |= plan.field_slots[name]
+                        pending -= 1
+                if not pending and not plan.collecting:
+                    break
+                if entered is not None:
+                    open_scopes.append((node._last_descendant(), inside, chain))
+                    inside, chain = entered
+            while open_scopes and node is open_scopes[-1][0]:
+                _, inside, chain = open_scopes.pop()
+
+        for name, spec in plan.fields.items():
+            if name in resolved:
+                continue
+            count = len(spec.items) if isinstance(spec, Collect) else len(spec.rules)
+            slots = [found[plan.slots[(name, i)]] for i in range(count)]
+            if isinstance(spec, Collect):
+                values[name] = _collect(spec, slots, plan, first_scope)
+            else:
+                values[name] = spec.resolve([[t for t, _ in tags] for tags in slots], soup)
+        return values
+
+
+def _collect(
+    spec: Collect, slots: List[List[Tuple[Tag, Chain]]], plan: _Plan, first_scope: Dict[int, Tuple[int, Tag]],
+) -> Optional[str]:
+    container: Optional[Tag] = None
+    for group in spec.containers:
+        hits = [first_scope[plan.scope_ids[m]] for m in group if plan.scope_ids[m] in first_scope]
+        if hits:
+            container = min(hits, key=lambda hit: hit[0])[1]
+            break
+    if container is None and spec.containers and not spec.whole_page:
+        return None
+
+    for tags in slots:
+        parts = []
+        for tag, chain in tags:
+            if container is not None and not any(scope_tag is container for _, scope_tag in chain):
+                continue
+            value = spec.value(tag)
+            if value and not (spec.skip is not None and spec.skip.search(value)):
+                parts.append(value)
+        if parts:
+            return spec.sep.join(parts)
+    return None
@@ -0,0 +1,106 @@
+"""
+Lớp fetch RSS dùng chung: conditional GET + so sánh GUID.
+
+  - Nhớ ETag / Last-Modified của từng feed và gửi If-None-Match /
+    If-Modified-Since; server trả 304 thì dùng lại các entry đã parse lần trước
+    (không tải lại, không chạy feedparser).
+  - Nhớ tập GUID đã thấy để chỉ entry mới (new_entries) phải đi qua các bước
+    tốn kém (BeautifulSoup, scrape). Trạng thái được lưu trong kho SQLite nên
+    vẫn còn sau khi khởi động lại.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+import feedparser
+
+from app.core import deadline, metrics
+from app.core.article_store import get_article_store
+from app.core.http_client import fetch
+from app.core.page_cache import FEED, record_page
+
+
+@dataclass
+class FeedResult:
+    # Toàn bộ entry hiện có trong feed
+    entries: List[dict]
+    # Entry có GUID chưa thấy ở các lần fetch trước
+    new_entries: List[dict]
+    not_modified: bool = False
+
+
+@dataclass
+class _FeedState:
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    seen: Set[str] = field(default_factory=set)
+    entries: Optional[List[dict]] = None
+
+
+_states: Dict[str, _FeedState] = {}
+_locks: Dict[str, asyncio.Lock] = {}
+
+
+def entry_guid(entry: dict) -> str:
+    return entry.get("id") or entry.get("guid") or entry.get("link", "")
+
+
+def entry_published(entry: dict) -> Optional[datetime]:
+    """
+    Thời gian đăng (UTC) của entry, từ pubDate đã được feedparser parse sẵn.
+    """
+    parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed:
+        return None
+    return datetime(*parsed[:6], tzinfo=timezone.utc)
+
+
+def _state(url: str) -> _FeedState:
+    state = _states.get(url)
+    if state is None:
+        saved = get_article_store().load_feed_state(url)
+        state = _FeedState()
+        if saved is not None:
+            # ETag chỉ dùng được khi còn giữ entry đã parse trong bộ nhớ
+            state.seen = set(saved[2])
+        _states[url] = state
+    return state
+
+
+async def fetch_feed(url: str, timeout: Optional[float] = None) -> FeedResult:
+    lock = _locks.setdefault(url, asyncio.Lock())
+    async with lock:
+        state = _state(url)
+
+        headers = {}
+        if state.entries is not None:
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+
+        with metrics.timed("feed_fetch"):
+            response = await fetch(url, timeout=timeout, headers=headers or None)
+        if response.status_code == 304:
+            return FeedResult(entries=state.entries, new_entries=[], not_modified=True)
+        record_page(url, response.content, FEED)
+
+        with metrics.timed("feed_parse"):
+            # Trong thread để không chặn event loop và dừng chờ được khi hết deadline
+            parsed = await deadline.bounded(
+                asyncio.to_thread(feedparser.parse, response.content), f"parsing feed {url}"
+            )
+            entries = parsed.entries
+        new_entries = [e for e in entries if entry_guid(e) not in state.seen]
+
+        state.etag = response.headers.get("ETag")
+        state.last_modified = response.headers.get("Last-Modified")
+        state.entries = entries
+        # Chỉ giữ GUID của các entry còn trong feed để tập này không phình mãi
+        state.seen = {entry_guid(e) for e in entries}
+        get_article_store().save_feed_state(
+            url, state.etag, state.last_modified, sorted(state.seen)
+        )
+
+        return FeedResult(entries=entries, new_entries=new_entries)
@@ -0,0 +1,178 @@
+"""
+HTTP client bất đồng bộ dùng chung cho tất cả scraper service.
+
+Chỉ có một httpx.AsyncClient cho cả app: giữ kết nối keep-alive giữa các lần
+fetch (không phải DNS + TCP + TLS lại cho từng bài), dùng HTTP/2 khi server hỗ
+trợ và giới hạn số request đồng thời tới mỗi host. Client được đóng trong
+lifespan của FastAPI (main.py).
+
+Mỗi request còn đi qua token bucket (rate_limit) và circuit breaker
+(circuit_breaker) của host; 5xx / 429 / lỗi kết nối được retry với
+exponential backoff có jitter, tôn trọng Retry-After. Cả lượt fetch (kể cả
+các lần retry) không vượt quá deadline của request (app.core.deadline).
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core import config, deadline, metrics, rate_limit
+from app.core.circuit_breaker import get_breaker
+
+logger = logging.getLogger(__name__)
+
+# Status đáng retry (và tính là host đang gặp sự cố)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (X11; Linux x86_64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/116.0 Safari/537.36"
+    )
+}
+
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_available() -> bool:
+    # httpx chỉ bật được HTTP/2 khi có package h2 (httpx[http2])
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            headers=HEADERS,
+            http2=config.HTTP2_ENABLED and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=config.HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(config.HTTP_TIMEOUT, connect=10.0),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    _host_slots.clear()
+
+
+def _host_slot(host: str) -> asyncio.Semaphore:
+    slot = _host_slots.get(host)
+    if slot is None:
+        slot = _host_slots[host] = asyncio.Semaphore(config.HTTP_PER_HOST_LIMIT)
+    return slot
+
+
+def retry_after(response: httpx.Response) -> Optional[float]:
+    """
+    Số giây trong header Retry-After (dạng giây hoặc HTTP-date), nếu có.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter: ngẫu nhiên trong [0, base * 2^attempt]
+    return random.uniform(0, min(config.HTTP_RETRY_MAX_DELAY, config.HTTP_RETRY_BACKOFF * 2 ** attempt))
+
+
+async def _get(host: str, url: str, headers: Optional[Dict[str, str]], kwargs) -> httpx.Response:
+    await rate_limit.wait_for_slot(host)
+    async with _host_slot(host):
+        try:
+            response = await get_client().get(url, headers=headers, **kwargs)
+        except httpx.TransportError:
+            metrics.HTTP_RESPONSES.labels(host, "error").inc()
+            raise
+    metrics.HTTP_RESPONSES.labels(host, str(response.status_code)).inc()
+    return response
+
+
+async def fetch(
+    url: str,
+    timeout: Optional[float] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> httpx.Response:
+    """
+    GET url qua client dùng chung, raise nếu status lỗi (4xx/5xx).
+    304 Not Modified (khi gửi conditional headers) không bị coi là lỗi.
+
+    Raise CircuitOpenError ngay (không gửi request) khi breaker của host mở.
+    """
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    host = urlsplit(url).hostname or ""
+    breaker = get_breaker(host)
+    breaker.before_call()
+
+    attempt = 0
+    while True:
+        try:
+            response = await deadline.bounded(_get(host, url, headers, kwargs), f"GET {url}")
+        except httpx.TransportError as e:
+            if attempt >= config.HTTP_RETRIES:
+                breaker.record_failure()
+                raise
+            delay = _backoff(attempt)
+            reason = type(e).__name__
+        else:
+            if response.status_code not in RETRY_STATUSES:
+                break
+            delay = retry_after(response)
+            if delay is None:
+                delay = _backoff(attempt)
+            if attempt >= config.HTTP_RETRIES or delay > config.HTTP_RETRY_MAX_DELAY:
+                breaker.record_failure()
+                response.raise_for_status()
+            reason = str(response.status_code)
+            if response.status_code == 429:
+                # Chặn cả host trong khoảng chờ (không chỉ request này);
+                # lần thử lại sẽ tự chờ ở token bucket
+                rate_limit.get_bucket(host).pause(delay)
+                delay = 0.0
+
+        attempt += 1
+        metrics.RETRIES.labels(metrics.current_source(), "http").inc()
+        logger.debug("Retrying %s (%s, attempt %d)", url, reason, attempt)
+        if delay:
+            await deadline.bounded(asyncio.sleep(delay), f"GET {url}")
+
+    breaker.record_success()
+    if response.status_code != 304:
+        response.raise_for_status()
+    return response
+
+
+async def fetch_text(url: str, timeout: Optional[float] = None) -> str:
+    return (await fetch(url, timeout=timeout)).text
+
+
+async def fetch_bytes(url: str, timeout: Optional[float] = None) -> bytes:
+    return (await fetch(url, timeout=timeout)).content
@@ -0,0 +1,139 @@
+"""
+Metric Prometheus cho các bước scrape, xuất ở route /metrics.
+
+Mỗi bước (feed_fetch, link_discovery, page_fetch, browser_acquire, parse,
+extract, serialize...) được đo bằng timed() và gắn nhãn theo nguồn tin. Nguồn
+hiện tại nằm trong một ContextVar (source_scope) nên các lớp dùng chung
+(http_client, pipeline, browser_pool) không cần truyền tên nguồn qua tham số;
+asyncio task và asyncio.to_thread đều mang theo context này.
+
+Chi phí mỗi lần đo chỉ là perf_counter + một lần observe (vài µs), đủ nhẹ để
+luôn bật trong production.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from prometheus_client import Counter, Gauge, Histogram
+
+_current_source: ContextVar[str] = ContextVar("scrape_source", default="unknown")
+
+STAGE_SECONDS = Histogram(
+    "scraper_stage_seconds",
+    "Thời gian của từng bước scrape",
+    ["source", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+HTTP_RESPONSES = Counter(
+    "scraper_http_responses_total",
+    "Response HTTP nhận từ các site nguồn, theo host và status ('error' = lỗi kết nối)",
+    ["host", "status"],
+)
+RETRIES = Counter(
+    "scraper_retries_total",
+    "Số lần thử lại",
+    ["source", "operation"],
+)
+RATE_LIMIT_WAIT = Histogram(
+    "scraper_rate_limit_wait_seconds",
+    "Thời gian request phải chờ token bucket của host",
+    ["host"],
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+CIRCUIT_STATE = Gauge(
+    "scraper_circuit_state",
+    "Trạng thái circuit breaker của host (0 = closed, 1 = half_open, 2 = open)",
+    ["host"],
+)
+CIRCUIT_REJECTIONS = Counter(
+    "scraper_circuit_rejections_total",
+    "Request bị từ chối ngay vì circuit breaker đang mở",
+    ["host"],
+)
+BROWSER_PAGE_BYTES = Histogram(
+    "scraper_browser_page_bytes",
+    "Số byte trình duyệt tải về cho một trang (document + tài nguyên), tới lúc lấy page_source",
+    ["source"],
+    buckets=(16e3, 64e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6, 16e6),
+)
+FETCH_TIER = Counter(
+    "scraper_fetch_tier_total",
+    "Trang được lấy bằng HTTP tĩnh hay phải render bằng trình duyệt",
+    ["source", "page", "tier"],
+)
+FETCH_FAILURES = Counter(
+    "scraper_fetch_failures_total",
+    "Trang bài viết không tải được",
+    ["source"],
+)
+EXTRACTION_FAILURES = Counter(
+    "scraper_extraction_failures_total",
+    "Trang tải được nhưng không trích được bài (exception / không có tiêu đề)",
+    ["source", "reason"],
+)
+ARTICLES = Counter(
+    "scraper_articles_total",
+    "Bài mới được scrape và lưu vào kho",
+    ["source"],
+)
+SINGLE_FLIGHT = Counter(
+    "scraper_single_flight_total",
+    "Lượt lấy dữ liệu nguồn: tự scrape (leader), dùng kết quả worker khác đã ghi"
+    " (published), hoặc chờ lượt scrape đang chạy trong process (coalesced)",
+    ["source", "outcome"],
+)
+PAGE_CACHE = Counter(
+    "scraper_page_cache_total",
+    "Trang thô đưa vào page cache: nội dung mới (stored), trùng nội dung đã lưu"
+    " (duplicate), bị bỏ vì hàng đợi ghi đầy (dropped), bị xoá khi vượt dung lượng (evicted)",
+    ["outcome"],
+)
+NEAR_DUPLICATES = Counter(
+    "scraper_near_duplicates_total",
+    "Bài mới được xếp vào cụm của một bài gần trùng đã có",
+    ["source"],
+)
+PROFILES = Counter(
+    "scraper_profiles_total",
+    "Request được profile, theo cách kích hoạt (header / sampled); 'busy' = bị bỏ"
+    " vì đã đủ PROFILE_MAX_CONCURRENT profile đang chạy",
+    ["trigger"],
+)
+
+
+def current_source() -> str:
+    return _current_source.get()
+
+
+def set_source(name: str) -> None:
+    """
+    Gán nguồn cho context hiện tại (dùng trong async generator, nơi không
+    reset được ContextVar một cách an toàn; xem source_scope).
+    """
+    _current_source.set(name)
+
+
+@contextmanager
+def source_scope(name: str) -> Iterator[None]:
+    token = _current_source.set(name)
+    try:
+        yield
+    finally:
+        _current_source.reset(token)
+
+
+def observe(stage: str, seconds: float, source: Optional[str] = None) -> None:
+    STAGE_SECONDS.labels(source or _current_source.get(), stage).observe(seconds)
+
+
+@contextmanager
+def timed(stage: str, source: Optional[str] = None) -> Iterator[None]:
+    """
+    Đo thời gian khối lệnh vào scraper_stage_seconds (kể cả khi raise).
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start, source)
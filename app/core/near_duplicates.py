@@ -0,0 +1,222 @@
+"""
+Index bài gần trùng nhau giữa các nguồn (MinHash + LSH banding).
+
+Cùng một tin (vd. một sàn bị hack) thường xuất hiện trên nhiều site trong vài
+phút. Mỗi bài được biến thành tập shingle (cụm 3 từ liên tiếp của tiêu đề +
+phần đầu nội dung) rồi tóm tắt thành chữ ký MinHash NUM_PERM số: tỉ lệ vị trí
+trùng nhau của hai chữ ký xấp xỉ độ tương đồng Jaccard của hai tập shingle.
+
+Chữ ký được chia thành BANDS dải, mỗi dải băm vào một bucket. Hai bài chỉ được
+so sánh khi trùng ít nhất một bucket, nên tra cứu chỉ tốn BANDS lần đọc index
+SQLite thay vì so với mọi bài đã có. Bài mới có độ tương đồng ước lượng
+>= DEDUP_THRESHOLD với một bài cũ thì vào cụm (cluster) của bài đó, nếu không
+thì tự lập cụm mới. Index tăng dần: mỗi URL chỉ được băm một lần, khi bài đã
+có nội dung (bài chưa có nội dung chỉ được so, không được ghi).
+
+Đổi NUM_PERM / BANDS / SHINGLE_SIZE thì phải xoá file index cũ.
+"""
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core import config, metrics
+from app.core.article import Article
+from app.core.article_store import canonical_url
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MASK = (1 << 64) - 1
+# Hoán vị dạng (a*x + b) mod 2^64, lấy 32 bit cao; seed cố định để chữ ký
+# giống nhau giữa các process / lần chạy
+_rng = random.Random(20250818)
+_PERMUTATIONS = [(_rng.getrandbits(64) | 1, _rng.getrandbits(64)) for _ in range(NUM_PERM)]
+
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS signatures (
+    url       TEXT PRIMARY KEY,
+    source    TEXT NOT NULL,
+    cluster   TEXT NOT NULL,
+    signature BLOB
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band   INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    url    TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, url)
+) WITHOUT ROWID;
+"""
+
+_BATCH = 500
+
+Signature = Tuple[int, ...]
+
+
+def _text(article: Article) -> str:
+    return f"{article.title or ''} {article.content or ''}"
+
+
+def shingles(text: str, max_words: Optional[int] = None) -> List[bytes]:
+    words = _WORD.findall(text.lower())
+    if max_words is not None:
+        words = words[:max_words]
+    if len(words) < SHINGLE_SIZE:
+        return [w.encode() for w in words]
+    grams = zip(*(words[i:] for i in range(SHINGLE_SIZE)))
+    return list({" ".join(gram).encode() for gram in grams})
+
+
+def minhash(features: Sequence[bytes]) -> Optional[Signature]:
+    """
+    Chữ ký MinHash của tập shingle; None nếu tập rỗng.
+    """
+    if not features:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(f, digest_size=8).digest(), "little") for f in features]
+    return tuple(min([(a * h + b) & _MASK for h in hashes]) >> 32 for a, b in _PERMUTATIONS)
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _buckets(signature: Signature) -> List[Tuple[int, int]]:
+    buckets = []
+    for band in range(BANDS):
+        rows = array("I", signature[band * ROWS:(band + 1) * ROWS]).tobytes()
+        digest = hashlib.blake2b(rows, digest_size=8).digest()
+        buckets.append((band, int.from_bytes(digest, "little", signed=True)))
+    return buckets
+
+
+class NearDuplicateIndex:
+    def __init__(self, path: str = config.DEDUP_DB_PATH, threshold: float = config.DEDUP_THRESHOLD):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _clusters_of(self, keys: List[str]) -> Dict[str, str]:
+        found: Dict[str, str] = {}
+        for i in range(0, len(keys), _BATCH):
+            batch = keys[i:i + _BATCH]
+            rows = self._conn.execute(
+                f"SELECT url, cluster FROM signatures WHERE url IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            found.update(rows)
+        return found
+
+    def _best_match(self, signature: Signature, buckets: List[Tuple[int, int]]) -> Optional[str]:
+        # Các điều kiện OR (không dùng row value IN) để SQLite tra theo primary key
+        rows = self._conn.execute(
+            f"""
+            SELECT s.cluster, s.signature FROM signatures s
+            WHERE s.url IN (
+                SELECT url FROM lsh_buckets
+                WHERE {' OR '.join(['(band = ? AND bucket = ?)'] * len(buckets))}
+            )
+            """,
+            [value for bucket in buckets for value in bucket],
+        )
+        best, best_score = None, self.threshold
+        for cluster, blob in rows:
+            score = similarity(signature, tuple(array("I", blob)))
+            if score >= best_score:
+                best, best_score = cluster, score
+        return best
+
+    def _add(self, key: str, article: Article) -> str:
+        signature = minhash(shingles(_text(article), config.DEDUP_MAX_WORDS))
+        if not article.content:
+            # Chưa có nội dung (vd. extract với with_content=False): chỉ so theo
+            # tiêu đề, không ghi vào index để lần có nội dung được băm lại
+            if signature is None:
+                return key
+            return self._best_match(signature, _buckets(signature)) or key
+        if signature is None:
+            # Không có chữ để so: bài tự thành một cụm
+            self._conn.execute(
+                "INSERT OR IGNORE INTO signatures (url, source, cluster, signature) VALUES (?, ?, ?, NULL)",
+                (key, article.source, key),
+            )
+            return key
+
+        buckets = _buckets(signature)
+        cluster = self._best_match(signature, buckets)
+        if cluster is not None:
+            metrics.NEAR_DUPLICATES.labels(article.source).inc()
+        else:
+            cluster = key
+        self._conn.execute(
+            "INSERT OR IGNORE INTO signatures (url, source, cluster, signature) VALUES (?, ?, ?, ?)",
+            (key, article.source, cluster, array("I", signature).tobytes()),
+        )
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO lsh_buckets (band, bucket, url) VALUES (?, ?, ?)",
+            [(band, bucket, key) for band, bucket in buckets],
+        )
+        return cluster
+
+    def assign(self, articles: Iterable[Article]) -> Dict[str, str]:
+        """
+        Trả về {canonical_url: cluster} cho mọi bài.
+        Bài có nội dung mà chưa có trong index được thêm vào (theo thứ tự
+        truyền vào, nên các bản trùng trong cùng một lô cũng gom được vào một
+        cụm). Cluster là URL chuẩn hoá của bài đầu tiên trong cụm mà index thấy.
+        """
+        pending: Dict[str, Article] = {}
+        for article in articles:
+            if article.url:
+                pending.setdefault(canonical_url(article.url), article)
+        if not pending:
+            return {}
+
+        with self._lock, self._conn:
+            clusters = self._clusters_of(list(pending))
+            new = [(key, item) for key, item in pending.items() if key not in clusters]
+            if new:
+                with metrics.timed("dedup_index"):
+                    for key, article in new:
+                        clusters[key] = self._add(key, article)
+        return clusters
+
+    def add_many(self, articles: Iterable[Article]) -> int:
+        return len(self.assign(articles))
+
+
+_index: Optional[NearDuplicateIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_near_duplicate_index() -> NearDuplicateIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NearDuplicateIndex()
+        return _index
+
+
+def close_near_duplicate_index() -> None:
+    global _index
+    with _index_lock:
+        index, _index = _index, None
+    if index is not None:
+        index.close()
@@ -0,0 +1,123 @@
+"""
+Chuẩn hoá dữ liệu bài viết dùng chung cho mọi nguồn.
+
+  - Múi giờ được cache: mỗi offset / tên múi giờ chỉ tạo một object tzinfo.
+  - parse_datetime(): datetime, chuỗi ISO 8601 hoặc RFC 822 (pubDate của RSS)
+    -> datetime giờ VN; không parse được -> None (không trả lại chuỗi thô).
+  - Tên nguồn và tác giả được intern: các bài trong cache dùng chung một
+    object chuỗi thay vì mỗi bài một bản.
+"""
+import sys
+from datetime import datetime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+VN_TZ = ZoneInfo("Asia/Ho_Chi_Minh")
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Tên múi giờ RFC 822 -> offset (phút)
+_ZONE_OFFSETS = {
+    "UT": 0, "UTC": 0, "GMT": 0, "Z": 0,
+    "EST": -300, "EDT": -240, "CST": -360, "CDT": -300,
+    "MST": -420, "MDT": -360, "PST": -480, "PDT": -420,
+}
+
+
+@lru_cache(maxsize=None)
+def fixed_offset(minutes: int) -> tzinfo:
+    return timezone.utc if minutes == 0 else timezone(timedelta(minutes=minutes))
+
+
+@lru_cache(maxsize=None)
+def zone(name: str) -> ZoneInfo:
+    return ZoneInfo(name)
+
+
+def parse_rfc822(value: str) -> Optional[datetime]:
+    """
+    vd. "Mon, 18 Aug 2025 07:31:09 +0000" (thứ, giây, múi giờ có thể thiếu).
+    Nhanh hơn strptime / email.utils nhiều vì chỉ split chuỗi.
+    """
+    parts = value.split()
+    if parts and parts[0].endswith(","):
+        parts = parts[1:]
+    try:
+        day, month, year, clock = parts[:4]
+        hour, minute, *second = clock.split(":")
+        zone_name = parts[4] if len(parts) > 4 else "GMT"
+        if zone_name[0] in "+-":
+            offset = int(zone_name[1:3]) * 60 + int(zone_name[3:5])
+            offset = -offset if zone_name[0] == "-" else offset
+        else:
+            offset = _ZONE_OFFSETS[zone_name.upper()]
+        return datetime(
+            int(year), _MONTHS[month[:3].lower()], int(day),
+            int(hour), int(minute), int(second[0]) if second else 0,
+            tzinfo=fixed_offset(offset),
+        )
+    except (ValueError, KeyError, IndexError):
+        return None
+
+
+def parse_iso(value: str) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def to_vn_time(value: datetime) -> datetime:
+    # Không có múi giờ -> coi là UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(VN_TZ)
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """
+    Thời gian đăng ở mọi dạng các nguồn trả về -> datetime giờ VN.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+        # RFC 822 không có thứ cũng bắt đầu bằng chữ số ("18 Aug 2025 ...")
+        parsed = parse_iso(value) if value[:1].isdigit() else None
+        value = parsed if parsed is not None else parse_rfc822(value)
+    if not isinstance(value, datetime):
+        return None
+    return to_vn_time(value)
+
+
+def parse_local(value: str, fmt: str, zone_name: str) -> Optional[datetime]:
+    """
+    Chuỗi theo định dạng riêng của site (strptime `fmt`), tính theo múi giờ
+    `zone_name` (có DST) -> datetime giờ VN.
+    """
+    try:
+        naive = datetime.strptime(value.strip(), fmt)
+    except ValueError:
+        return None
+    return naive.replace(tzinfo=zone(zone_name)).astimezone(VN_TZ)
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return sys.intern(value.strip()) or None
+
+
+def author_name(value) -> Optional[str]:
+    """
+    feedparser trả tác giả dạng list [{"name": ...}], các extractor HTML trả
+    chuỗi: đưa về một chuỗi (nhiều tác giả cách nhau bởi ", ").
+    """
+    if isinstance(value, (list, tuple)):
+        names = (a.get("name", "") if isinstance(a, dict) else str(a) for a in value)
+        value = ", ".join(name.strip() for name in names if name and name.strip())
+    elif isinstance(value, dict):
+        value = value.get("name")
+    return intern_text(value) if isinstance(value, str) else None
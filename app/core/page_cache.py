@@ -0,0 +1,290 @@
+"""
+Cache trang thô: mọi trang HTML (listing, bài) và body feed đã fetch được lưu
+nén trên đĩa, để khi sửa extractor có thể chạy lại trên trang đã lưu
+(app.services.reextract) thay vì crawl lại.
+
+  - Content-addressed: nội dung được lưu một lần theo blake2b của nó (bảng
+    blobs, nén zlib); fetch lại mà trang không đổi chỉ cập nhật thời điểm.
+  - Bảng pages là index theo (url, thời điểm fetch) -> digest, kèm nguồn và
+    loại trang (listing / article / feed); mỗi phiên bản khác nhau của một URL
+    là một dòng.
+  - Giới hạn dung lượng (PAGE_CACHE_MAX_MB, tính theo byte đã nén): vượt quá
+    thì xoá nội dung lâu nhất không được fetch lại (LRU) cùng các dòng trỏ tới.
+
+Việc nén + ghi chạy trong một thread nền theo lô: record() chỉ đưa trang vào
+hàng đợi, không chặn event loop. Hàng đợi đầy thì trang bị bỏ (cache chỉ là
+phương án dự phòng, không được làm chậm việc scrape).
+"""
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional, Tuple, Union
+
+from app.core import config, metrics
+
+logger = logging.getLogger(__name__)
+
+LISTING = "listing"
+ARTICLE = "article"
+FEED = "feed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest  TEXT PRIMARY KEY,
+    data    BLOB NOT NULL,
+    size    INTEGER NOT NULL,  -- byte gốc
+    stored  INTEGER NOT NULL,  -- byte sau khi nén
+    used_at REAL NOT NULL      -- lần gần nhất nội dung này được fetch
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_used ON blobs (used_at);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id         INTEGER PRIMARY KEY,
+    url        TEXT NOT NULL,
+    source     TEXT NOT NULL,
+    kind       TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    digest     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_url ON pages (url, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_pages_source ON pages (source, kind);
+CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages (digest);
+"""
+
+# (url, source, kind, fetched_at, digest)
+PageRow = Tuple[str, str, str, float, str]
+# (url, source, kind, fetched_at, body)
+_Pending = Tuple[str, str, str, float, bytes]
+
+# Số trang tối đa ghi trong một transaction
+_BATCH = 64
+# Xoá bớt tới mức này của giới hạn để không phải dọn sau mỗi lô
+_EVICT_TO = 0.9
+
+
+def digest_of(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=20).hexdigest()
+
+
+def connect(path: str, readonly: bool = False) -> sqlite3.Connection:
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    # Nhiều worker process có thể ghi cùng file
+    return sqlite3.connect(path, timeout=30, check_same_thread=False)
+
+
+def read_blob(conn: sqlite3.Connection, digest: str) -> Optional[bytes]:
+    row = conn.execute("SELECT data FROM blobs WHERE digest = ?", (digest,)).fetchone()
+    return zlib.decompress(row[0]) if row else None
+
+
+class PageCache:
+    def __init__(
+        self,
+        path: str = config.PAGE_CACHE_PATH,
+        max_bytes: int = config.PAGE_CACHE_MAX_MB * 1024 * 1024,
+        level: int = config.PAGE_CACHE_LEVEL,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.level = level
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Tổng byte đã nén theo hiểu biết của process này (process khác cũng
+        # có thể ghi): chỉ dùng để biết khi nào cần tính lại và dọn
+        self._stored = self._total_stored()
+        self._queue: "queue.Queue[Optional[_Pending]]" = queue.Queue(maxsize=config.PAGE_CACHE_QUEUE)
+        self._writer: Optional[threading.Thread] = None
+
+    # --- ghi ---
+    def record(self, url: str, body: Union[str, bytes], source: str, kind: str) -> None:
+        """
+        Đưa trang vào hàng đợi ghi (không chặn).
+        """
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if not body:
+            return
+        self._start_writer()
+        try:
+            self._queue.put_nowait((url, source, kind, time.time(), body))
+        except queue.Full:
+            metrics.PAGE_CACHE.labels("dropped").inc()
+
+    def put_many(self, pages: Iterable[_Pending]) -> None:
+        """
+        Nén + ghi các trang ngay (trong thread gọi), rồi dọn nếu vượt giới hạn.
+        """
+        rows = []
+        for url, source, kind, fetched_at, body in pages:
+            digest = digest_of(body)
+            rows.append((url, source, kind, fetched_at, digest, body))
+        with self._lock, self._conn:
+            for url, source, kind, fetched_at, digest, body in rows:
+                if self._conn.execute(
+                    "UPDATE blobs SET used_at = ? WHERE digest = ?", (fetched_at, digest)
+                ).rowcount:
+                    metrics.PAGE_CACHE.labels("duplicate").inc()
+                else:
+                    data = zlib.compress(body, self.level)
+                    self._conn.execute(
+                        "INSERT INTO blobs (digest, data, size, stored, used_at) VALUES (?, ?, ?, ?, ?)",
+                        (digest, data, len(body), len(data), fetched_at),
+                    )
+                    self._stored += len(data)
+                    metrics.PAGE_CACHE.labels("stored").inc()
+                # Trang không đổi so với lần fetch trước: chỉ cập nhật thời điểm
+                latest = self._conn.execute(
+                    "SELECT id, digest FROM pages WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+                ).fetchone()
+                if latest is not None and latest[1] == digest:
+                    self._conn.execute("UPDATE pages SET fetched_at = ? WHERE id = ?", (fetched_at, latest[0]))
+                else:
+                    self._conn.execute(
+                        "INSERT INTO pages (url, source, kind, fetched_at, digest) VALUES (?, ?, ?, ?, ?)",
+                        (url, source, kind, fetched_at, digest),
+                    )
+            self._evict()
+
+    def _total_stored(self) -> int:
+        return self._conn.execute("SELECT coalesce(sum(stored), 0) FROM blobs").fetchone()[0]
+
+    def _evict(self) -> None:
+        if self._stored <= self.max_bytes:
+            return
+        total = self._stored = self._total_stored()
+        if total <= self.max_bytes:
+            return
+        target = total - self.max_bytes * _EVICT_TO
+        freed, evicted = 0, []
+        for digest, stored in self._conn.execute("SELECT digest, stored FROM blobs ORDER BY used_at"):
+            evicted.append((digest,))
+            freed += stored
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM pages WHERE digest = ?", evicted)
+        self._conn.executemany("DELETE FROM blobs WHERE digest = ?", evicted)
+        self._stored -= freed
+        metrics.PAGE_CACHE.labels("evicted").inc(len(evicted))
+        logger.info("Page cache: evicted %d pages (%.1f MB)", len(evicted), freed / 1e6)
+
+    def _start_writer(self) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="page-cache", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[_Pending] = []
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= _BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.put_many(batch)
+                except sqlite3.Error as e:
+                    logger.warning("Page cache write failed: %s", e)
+            if item is None:
+                return
+
+    def flush(self) -> None:
+        """
+        Ghi hết các trang đang chờ và dừng thread ghi.
+        """
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    # --- đọc ---
+    def read(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            return read_blob(self._conn, digest)
+
+    def _select(self, kind: str, sources: Optional[Iterable[str]], latest: bool) -> List[PageRow]:
+        where, params = "kind = ?", [kind]
+        if sources is not None:
+            sources = list(sources)
+            where += f" AND source IN ({','.join('?' * len(sources))})"
+            params.extend(sources)
+        if latest:
+            # max() chọn luôn digest của dòng mới nhất trong nhóm (SQLite)
+            sql = f"SELECT url, source, kind, max(fetched_at), digest FROM pages WHERE {where} GROUP BY url"
+        else:
+            sql = f"SELECT url, source, kind, fetched_at, digest FROM pages WHERE {where} ORDER BY fetched_at DESC"
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def latest(self, kind: str, sources: Optional[Iterable[str]] = None) -> List[PageRow]:
+        """
+        Phiên bản mới nhất của mỗi URL thuộc loại `kind` (của các nguồn `sources`).
+        """
+        return self._select(kind, sources, latest=True)
+
+    def versions(self, kind: str, sources: Optional[Iterable[str]] = None) -> List[PageRow]:
+        """
+        Mọi phiên bản đã lưu, mới nhất trước (vd. các body feed qua thời gian).
+        """
+        return self._select(kind, sources, latest=False)
+
+    def stats(self) -> Tuple[int, int, int]:
+        """
+        (số phiên bản trang, byte gốc, byte đã nén).
+        """
+        with self._lock:
+            pages = self._conn.execute("SELECT count(*) FROM pages").fetchone()[0]
+            size, stored = self._conn.execute(
+                "SELECT coalesce(sum(size), 0), coalesce(sum(stored), 0) FROM blobs"
+            ).fetchone()
+        return pages, size, stored
+
+
+_cache: Optional[PageCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache()
+        return _cache
+
+
+def record_page(url: str, body: Union[str, bytes], kind: str) -> None:
+    """
+    Lưu trang vừa fetch (nguồn lấy từ context metric hiện tại).
+    """
+    if config.PAGE_CACHE_ENABLED and body:
+        get_page_cache().record(url, body, metrics.current_source(), kind)
+
+
+def close_page_cache() -> None:
+    global _cache
+    with _cache_lock:
+        cache, _cache = _cache, None
+    if cache is not None:
+        cache.close()
@@ -0,0 +1,112 @@
+"""
+Tiện ích parse HTML dùng chung cho các extractor.
+
+  - make_soup(): chọn backend nhanh nhất có sẵn (lxml, nếu không có thì
+    html.parser) và chỉ dựng cây cho các phần trang mà extractor cần
+    (parse_only).
+  - only(): khai báo các phần đó, ví dụ
+        only(names=("h1", "time"), classes=("imgthum", "keyfeatures"))
+    giữ lại mọi thẻ h1/time và mọi thẻ có class imgthum/keyfeatures (kèm toàn
+    bộ thẻ con). Các khai báo được OR với nhau.
+  - compile_selector(): CSS selector được compile sẵn một lần (soupsieve).
+
+Thời gian make_soup() được cộng dồn theo thread (take_parse_seconds) để
+pipeline tách được thời gian parse và thời gian trích field trong metric.
+"""
+import re
+import threading
+import time
+from typing import Iterable, List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+class _AnyOf(SoupStrainer):
+    """
+    SoupStrainer khớp một thẻ nếu BẤT KỲ strainer con nào khớp
+    (SoupStrainer gốc AND các điều kiện name/attrs với nhau).
+    """
+
+    def __init__(self, strainers: Iterable[SoupStrainer]):
+        super().__init__()
+        self.strainers = list(strainers)
+
+    # bs4 >= 4.13
+    def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+        return any(s.allow_tag_creation(nsprefix, name, attrs) for s in self.strainers)
+
+    def allow_string_creation(self, string) -> bool:
+        # Bỏ text nằm ngoài các phần được giữ lại
+        return False
+
+    @property
+    def includes_everything(self) -> bool:
+        return False
+
+    @property
+    def excludes_everything(self) -> bool:
+        return not self.strainers
+
+    # bs4 < 4.13
+    def search_tag(self, markup_name=None, markup_attrs={}):
+        for strainer in self.strainers:
+            found = strainer.search_tag(markup_name, markup_attrs)
+            if found:
+                return found
+        return None
+
+
+def _class_pattern(classes: Iterable[str]) -> "re.Pattern[str]":
+    # Lúc đang parse, class còn là chuỗi thô "a b c" nên phải khớp theo từ
+    alternatives = "|".join(re.escape(c) for c in classes)
+    return re.compile(rf"(?:^|\s)(?:{alternatives})(?:\s|$)")
+
+
+def only(
+    names: Iterable[str] = (),
+    classes: Iterable[str] = (),
+    extra: Iterable[SoupStrainer] = (),
+) -> SoupStrainer:
+    strainers: List[SoupStrainer] = []
+    names = list(names)
+    classes = list(classes)
+    if names:
+        strainers.append(SoupStrainer(names))
+    if classes:
+        strainers.append(SoupStrainer(attrs={"class": _class_pattern(classes)}))
+    strainers.extend(extra)
+    return _AnyOf(strainers)
+
+
+_parse_time = threading.local()
+
+
+def make_soup(html, parse_only: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    start = time.perf_counter()
+    soup = BeautifulSoup(html, PARSER, parse_only=parse_only)
+    _parse_time.seconds = getattr(_parse_time, "seconds", 0.0) + time.perf_counter() - start
+    return soup
+
+
+def take_parse_seconds() -> float:
+    """
+    Tổng thời gian make_soup() của thread hiện tại từ lần gọi trước (rồi reset).
+    """
+    seconds = getattr(_parse_time, "seconds", 0.0)
+    _parse_time.seconds = 0.0
+    return seconds
+
+
+def compile_selector(css: str) -> soupsieve.SoupSieve:
+    """
+    Compile CSS selector một lần (gọi ở mức module), dùng lại bằng
+    .select_one(soup) / .select(soup).
+    """
+    return soupsieve.compile(css)
@@ -0,0 +1,163 @@
+"""
+Pipeline hai tầng cho việc scrape bài viết:
+
+    fetch (async, I/O)  ->  hàng đợi có giới hạn  ->  extract (CPU, ProcessPool)
+
+BeautifulSoup là pure-Python nên parse trong thread vẫn bị GIL khoá; ở đây
+hàm extract của từng site chạy trong các process riêng và trả về dict. Khi
+tầng parse không theo kịp, hàng đợi đầy và fetcher phải chờ (backpressure),
+nên số trang thô nằm trong bộ nhớ luôn bị chặn trên.
+
+Hàm extract phải là hàm top-level (pickle được), nhận (html, url). run_extract
+cũng dùng được cho hàm parse khác (vd. build entry RSS, xem
+app.services.crawler.build_new_entries): tham số được gửi nguyên sang process parse.
+
+Mỗi trang tải về được lưu vào page cache (app.core.page_cache) trước khi parse.
+
+Khi request có deadline (app.core.deadline) hết giờ, các trang chưa xong bị
+huỷ và được trả về với lỗi DeadlineExceeded.
+"""
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple, Union
+
+from app.core import config, deadline, metrics
+from app.core.article import Article
+from app.core.page_cache import ARTICLE, record_page
+from app.core.parsing import take_parse_seconds
+
+Fetch = Callable[[str], Awaitable[str]]
+Extract = Callable[[str, str], Article]
+Result = Union[Article, BaseException]
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    global _executor
+    if config.PARSE_WORKERS <= 0:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: không fork process đang chạy event loop + thread Selenium
+            _executor = ProcessPoolExecutor(
+                max_workers=config.PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def _warm_worker() -> None:
+    import bs4  # noqa: F401
+
+
+def prewarm_parse_executor() -> None:
+    """
+    Khởi động sẵn các process parse (spawn + import bs4 mất ~1s mỗi process).
+    """
+    executor = get_parse_executor()
+    if executor is not None:
+        for future in [executor.submit(_warm_worker) for _ in range(config.PARSE_WORKERS)]:
+            future.result()
+
+
+def shutdown_parse_executor() -> None:
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _timed_extract(extract: Callable[..., Article], *args) -> Tuple[Article, float, float]:
+    # Chạy trong process parse: metric ở đó không tới được process chính nên
+    # trả thời gian (parse, extract) về cùng kết quả
+    take_parse_seconds()
+    start = time.perf_counter()
+    article = extract(*args)
+    parse = take_parse_seconds()
+    return article, parse, time.perf_counter() - start - parse
+
+
+async def run_extract(extract: Callable[..., Article], *args) -> Article:
+    executor = get_parse_executor()
+    if executor is None:
+        article, parse, rest = _timed_extract(extract, *args)
+    else:
+        article, parse, rest = await asyncio.get_running_loop().run_in_executor(
+            executor, _timed_extract, extract, *args
+        )
+    metrics.observe("parse", parse)
+    metrics.observe("extract", rest)
+    return article
+
+
+async def run_pipeline(
+    urls: Iterable[str],
+    fetch: Fetch,
+    extract: Extract,
+    fetch_concurrency: Optional[int] = None,
+) -> AsyncIterator[Tuple[str, Result]]:
+    """
+    Fetch + extract các url, trả (url, article) theo thứ tự xong trước.
+    Lỗi của từng url được trả về dưới dạng exception thay vì raise.
+    """
+    urls = list(urls)
+    if not urls:
+        return
+
+    raw: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue(maxsize=config.PIPELINE_QUEUE_SIZE)
+    done: "asyncio.Queue[Tuple[str, Result]]" = asyncio.Queue()
+    fetch_slots = asyncio.Semaphore(fetch_concurrency or config.PIPELINE_FETCH_CONCURRENCY)
+
+    async def fetch_one(url: str) -> None:
+        # Giữ slot cho tới khi trang được đưa vào hàng đợi -> backpressure
+        async with fetch_slots:
+            try:
+                with metrics.timed("page_fetch"):
+                    html = await fetch(url)
+            except Exception as e:
+                if not isinstance(e, deadline.DeadlineExceeded):
+                    metrics.FETCH_FAILURES.labels(metrics.current_source()).inc()
+                await done.put((url, e))
+                return
+            record_page(url, html, ARTICLE)
+            await raw.put((url, html))
+
+    async def parse_worker() -> None:
+        while True:
+            url, html = await raw.get()
+            try:
+                # Hết giờ thì không đưa thêm trang nào sang process parse
+                deadline.check(f"parsing {url}")
+                result: Result = await run_extract(extract, html, url)
+            except deadline.DeadlineExceeded as e:
+                result = e
+            except Exception as e:
+                metrics.EXTRACTION_FAILURES.labels(metrics.current_source(), "exception").inc()
+                result = e
+            await done.put((url, result))
+
+    fetchers = [asyncio.create_task(fetch_one(url)) for url in urls]
+    parsers = [asyncio.create_task(parse_worker()) for _ in range(max(1, config.PARSE_WORKERS))]
+    pending = dict.fromkeys(urls)
+    try:
+        while pending:
+            try:
+                url, result = await deadline.bounded(done.get(), "scraping")
+            except deadline.DeadlineExceeded as e:
+                # Hết giờ: huỷ phần còn lại, các url chưa xong trả về cùng lỗi
+                for task in fetchers + parsers:
+                    task.cancel()
+                for url in pending:
+                    yield url, e
+                return
+            pending.pop(url, None)
+            yield url, result
+    finally:
+        for task in fetchers + parsers:
+            task.cancel()
@@ -0,0 +1,195 @@
+"""
+Sampling profiler nhẹ cho từng request, xuất file speedscope
+(https://www.speedscope.app, kéo thả file vào là xem được flamegraph).
+
+Một thread nền lấy stack của mọi thread trong process (sys._current_frames)
+mỗi `interval` giây trong lúc request chạy: event loop, các thread của
+asyncio.to_thread (vd. trình duyệt của TheBlock / CoinGape), thread ghi page
+cache... Mỗi thread là một profile trong file. Không cần thư viện ngoài và
+không đổi code được đo; chi phí chỉ là một lần duyệt stack mỗi interval.
+
+Lưu ý:
+  - Event loop dùng chung: các request khác chạy cùng lúc cũng có mặt trong
+    profile của event loop.
+  - Process parse (ProcessPoolExecutor) không được lấy mẫu; thời gian parse
+    hiện ra là thời gian chờ kết quả trong event loop.
+  - Thread không làm gì suốt lượt đo (cùng một stack ở mọi mẫu) bị bỏ.
+"""
+import os
+import re
+import secrets
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from app.core import config
+
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+SUFFIX = ".speedscope.json"
+
+# Stack sâu hơn thì bỏ phần gần gốc
+_MAX_DEPTH = 256
+
+# Thread của các profiler đang chạy (không lấy mẫu lẫn nhau)
+_sampler_threads: set = set()
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = config.PROFILE_INTERVAL, max_seconds: float = config.PROFILE_MAX_SECONDS):
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self._frames: List[dict] = []
+        self._frame_index: Dict[object, int] = {}
+        # thread ident -> [(stack gốc trước, trọng số giây)]
+        self._samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = {}
+        self._names: Dict[int, str] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.started = 0.0
+        self.elapsed = 0.0
+
+    def start(self) -> "SamplingProfiler":
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _frame_id(self, code) -> int:
+        index = self._frame_index.get(code)
+        if index is None:
+            index = self._frame_index[code] = len(self._frames)
+            self._frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return index
+
+    def _stack(self, frame) -> Tuple[int, ...]:
+        stack = []
+        while frame is not None and len(stack) < _MAX_DEPTH:
+            stack.append(self._frame_id(frame.f_code))
+            frame = frame.f_back
+        stack.reverse()
+        return tuple(stack)
+
+    def _thread_name(self, ident: int) -> str:
+        name = self._names.get(ident)
+        if name is None:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            name = self._names[ident] = names.get(ident, f"thread-{ident}")
+        return name
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        _sampler_threads.add(own)
+        try:
+            last = self.started
+            while not self._stop.wait(self.interval):
+                now = time.perf_counter()
+                weight, last = now - last, now
+                for ident, frame in sys._current_frames().items():
+                    if ident == own or ident in _sampler_threads:
+                        continue
+                    self._thread_name(ident)
+                    self._samples.setdefault(ident, []).append((self._stack(frame), weight))
+                if now - self.started >= self.max_seconds:
+                    break
+        finally:
+            _sampler_threads.discard(own)
+
+    def sample_count(self) -> int:
+        return sum(len(samples) for samples in self._samples.values())
+
+    def speedscope(self, name: str) -> dict:
+        profiles = []
+        main = threading.main_thread().ident
+        # Event loop (main thread) đứng đầu, rồi theo số mẫu
+        idents = sorted(self._samples, key=lambda i: (i != main, -len(self._samples[i])))
+        for ident in idents:
+            samples = self._samples[ident]
+            if len({stack for stack, _ in samples}) <= 1:
+                continue
+            end = sum(weight for _, weight in samples)
+            profiles.append({
+                "type": "sampled",
+                "name": self._names[ident],
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": end,
+                "samples": [list(stack) for stack, _ in samples],
+                "weights": [weight for _, weight in samples],
+            })
+        return {
+            "$schema": SPEEDSCOPE_SCHEMA,
+            "name": name,
+            "activeProfileIndex": 0,
+            "exporter": "app.core.profiler",
+            "shared": {"frames": self._frames},
+            "profiles": profiles,
+        }
+
+
+# --- File profile ---
+
+def new_profile_id(method: str, path: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_")[:48] or "root"
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{slug}-{secrets.token_hex(3)}"
+
+
+def is_profile_id(value: str) -> bool:
+    return re.fullmatch(r"[A-Za-z0-9_-]+", value) is not None
+
+
+def profile_path(profile_id: str, directory: str = config.PROFILE_DIR) -> str:
+    return os.path.join(directory, profile_id + SUFFIX)
+
+
+def save_profile(profiler: SamplingProfiler, profile_id: str, name: str, directory: str = config.PROFILE_DIR) -> str:
+    """
+    Ghi profile ra file speedscope rồi xoá bớt file cũ (giữ PROFILE_KEEP file).
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = profile_path(profile_id, directory)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(orjson.dumps(profiler.speedscope(name)))
+    os.replace(tmp, path)
+    prune_profiles(config.PROFILE_KEEP, directory)
+    return path
+
+
+def list_profiles(directory: str = config.PROFILE_DIR) -> List[dict]:
+    """
+    Các profile đã ghi, mới nhất trước.
+    """
+    try:
+        entries = [e for e in os.scandir(directory) if e.name.endswith(SUFFIX)]
+    except FileNotFoundError:
+        return []
+    profiles = []
+    for entry in entries:
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        profiles.append({
+            "id": entry.name[: -len(SUFFIX)],
+            "created": stat.st_mtime,
+            "bytes": stat.st_size,
+        })
+    profiles.sort(key=lambda p: p["created"], reverse=True)
+    return profiles
+
+
+def prune_profiles(keep: int, directory: str = config.PROFILE_DIR) -> None:
+    for profile in list_profiles(directory)[keep:]:
+        try:
+            os.remove(profile_path(profile["id"], directory))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,81 @@
+"""
+Giới hạn tốc độ request tới từng host (token bucket).
+
+Mỗi host có một bucket `rate` token/giây, tối đa `burst` token. Request lấy
+một token; hết token thì chờ tới lượt. Token được "đặt trước" (bucket có thể
+âm) nên các request chờ được phục vụ theo thứ tự, không cần lock. Khi host trả
+429 + Retry-After, pause() chặn cả host trong khoảng đó.
+
+Tốc độ mặc định: HTTP_RATE_LIMIT / HTTP_RATE_BURST, override theo host bằng
+RATE_LIMIT_<HOST> (vd. RATE_LIMIT_U_TODAY=2).
+"""
+import asyncio
+import time
+from typing import Any, Dict
+
+from app.core import config, metrics
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Lấy một token, trả về số giây phải chờ trước khi được dùng nó.
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        self._refill(now)
+        self._tokens -= 1
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        return max(wait, self._blocked_until - now)
+
+    async def acquire(self) -> float:
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Chỉ đọc: số token tính tới lúc này, không refill (không đụng tới reserve())
+        now = time.monotonic()
+        tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(tokens, 2),
+            "blocked_seconds": round(max(0.0, self._blocked_until - now), 2),
+        }
+
+
+_buckets: Dict[str, TokenBucket] = {}
+
+
+def get_bucket(host: str) -> TokenBucket:
+    bucket = _buckets.get(host)
+    if bucket is None:
+        rate, burst = config.host_rate_limit(host)
+        bucket = _buckets[host] = TokenBucket(rate, burst)
+    return bucket
+
+
+async def wait_for_slot(host: str) -> None:
+    waited = await get_bucket(host).acquire()
+    metrics.RATE_LIMIT_WAIT.labels(host).observe(waited)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    return {host: bucket.snapshot() for host, bucket in sorted(_buckets.items())}
@@ -0,0 +1,47 @@
+"""
+Scheduler chạy nền: mỗi job được gọi lại theo chu kỳ riêng của nó.
+"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    interval: float
+    run: Callable[[], Awaitable[object]]
+
+
+class Scheduler:
+    def __init__(self, jobs: Iterable[Job]):
+        self.jobs = list(jobs)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def start(self) -> None:
+        for job in self.jobs:
+            if job.name not in self._tasks:
+                self._tasks[job.name] = asyncio.create_task(self._loop(job), name=f"poll-{job.name}")
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _loop(self, job: Job) -> None:
+        # Lệch pha ngẫu nhiên để các nguồn không cùng chạy một lúc
+        await asyncio.sleep(random.uniform(0, min(job.interval, 5.0)))
+        while True:
+            try:
+                await job.run()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Scheduled job %s failed: %s", job.name, e)
+            await asyncio.sleep(job.interval)
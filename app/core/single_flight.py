@@ -0,0 +1,173 @@
+"""
+Single-flight cho các lượt scrape: các yêu cầu giống nhau đang chờ cùng lúc
+dùng chung một lượt scrape.
+
+  - SingleFlight: trong một process, lời gọi run(key, ...) khi đã có lượt
+    cùng key đang chạy chỉ chờ lượt đó và nhận cùng kết quả.
+  - SharedResults: giữa các worker process trên cùng một máy (vd. uvicorn
+    --workers N). Mỗi key có một file lock (flock) trong SHARED_RESULTS_DIR:
+    chỉ worker giữ lock mới scrape, rồi ghi kết quả ra file (ghi vào file tạm
+    rồi os.replace, nên bên đọc không bao giờ thấy file dở). Worker khác chờ
+    lock xong thì đọc kết quả vừa ghi thay vì scrape lại; kết quả còn mới
+    (< max_age) thì dùng luôn không cần lock.
+
+Không cần dịch vụ ngoài. Trên hệ không có fcntl (Windows) chỉ còn phần trong
+process.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+import orjson
+
+from app.core import config, metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self):
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]], source: str = "") -> T:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            metrics.SINGLE_FLIGHT.labels(source or metrics.current_source(), "coalesced").inc()
+        # shield: một client ngắt kết nối không huỷ lượt scrape người khác cũng chờ
+        return await asyncio.shield(task)
+
+
+@dataclass
+class Published:
+    data: Any
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+def _file_name(key: str) -> str:
+    # Key tuỳ ý (vd. có tham số truy vấn) -> tên file an toàn, cố định
+    safe = "".join(c if c.isalnum() or c in "-_" else "_" for c in key)[:48]
+    return f"{safe}-{hashlib.blake2b(key.encode(), digest_size=8).hexdigest()}"
+
+
+class SharedResults:
+    def __init__(self, directory: str = config.SHARED_RESULTS_DIR, poll: float = config.SHARED_LOCK_POLL):
+        self.directory = directory
+        self.poll = poll
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, _file_name(key) + suffix)
+
+    def read(self, key: str, decode: Callable[[Any], Any]) -> Optional[Published]:
+        try:
+            with open(self._path(key, ".json"), "rb") as f:
+                raw = orjson.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, orjson.JSONDecodeError) as e:
+            logger.warning("Shared result %s unreadable: %s", key, e)
+            return None
+        return Published(decode(raw["data"]), raw["fetched_at"])
+
+    def write(self, key: str, data: Any, fetched_at: float) -> None:
+        path = self._path(key, ".json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(orjson.dumps({"fetched_at": fetched_at, "data": data}))
+        os.replace(tmp, path)
+
+    def prune(self, max_age: float) -> None:
+        """
+        Xoá kết quả đã ghi quá `max_age` giây (không xoá file lock: xoá file
+        đang bị lock sẽ phá tính loại trừ).
+        """
+        cutoff = time.time() - max_age
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json") and entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        """
+        Lock độc quyền giữa các process. Thử flock không chặn rồi ngủ
+        `poll` giây giữa các lần thử, nên task chờ huỷ được bất cứ lúc nào
+        (thread chặn trong flock() thì không huỷ được).
+        """
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self._path(key, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(self.poll)
+            yield
+        finally:
+            # Đóng fd là nhả lock
+            os.close(fd)
+
+    async def load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        decode: Callable[[Any], Any],
+        max_age: float,
+        lock: Optional[str] = None,
+    ) -> Published:
+        """
+        Kết quả đã ghi nếu còn mới (< max_age giây) hoặc do worker khác ghi
+        trong lúc đang chờ lock; nếu không thì chạy loader (khi giữ lock
+        `lock`, mặc định là key) và ghi kết quả cho các worker khác.
+        """
+        source = metrics.current_source()
+        published = await asyncio.to_thread(self.read, key, decode)
+        if published is not None and published.age < max_age:
+            metrics.SINGLE_FLIGHT.labels(source, "published").inc()
+            return published
+
+        started = time.time()
+        async with self.lock(lock or key):
+            published = await asyncio.to_thread(self.read, key, decode)
+            if published is not None and (published.fetched_at >= started or published.age < max_age):
+                metrics.SINGLE_FLIGHT.labels(source, "published").inc()
+                return published
+            metrics.SINGLE_FLIGHT.labels(source, "leader").inc()
+            data = await loader()
+            fetched_at = time.time()
+            await asyncio.to_thread(self.write, key, data, fetched_at)
+        return Published(data, fetched_at)
+
+
+_shared: Optional[SharedResults] = None
+
+
+def get_shared_results() -> SharedResults:
+    global _shared
+    if _shared is None:
+        _shared = SharedResults()
+    return _shared
@@ -0,0 +1,113 @@
+"""
+Fetch theo tầng cho các site trước đây luôn đi qua Selenium.
+
+    1. static:  GET thường qua HTTP client dùng chung (~200ms), dùng luôn HTML
+                server render nếu đã có đủ các phần extractor cần.
+    2. browser: chỉ khi bước 1 lỗi hoặc thiếu các phần đó (trang render bằng
+                JS, bị chặn...) mới mượn trình duyệt trong pool.
+
+Tầng mà mỗi trang cần được đếm trong metric scraper_fetch_tier_total. Lượt
+render bằng trình duyệt cũng đi qua circuit breaker của host: site đang lỗi bị
+từ chối ngay thay vì giữ trình duyệt tới khi timeout. Hết deadline của request
+(app.core.deadline) không bị tính là lỗi của host.
+"""
+import asyncio
+import contextvars
+import logging
+import re
+from typing import Callable, Iterable, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.core import config, deadline, metrics
+from app.core.circuit_breaker import get_breaker
+from app.core.http_client import fetch_text
+
+logger = logging.getLogger(__name__)
+
+STATIC = "static"
+BROWSER = "browser"
+
+_browser_slots: Optional[asyncio.Semaphore] = None
+
+
+def requires(names: Iterable[str] = (), classes: Iterable[str] = ()) -> Callable[[str], bool]:
+    """
+    Điều kiện "HTML đã đủ dùng": có mọi thẻ trong `names` và mọi class trong
+    `classes`. Chỉ dò bằng regex trên HTML thô, không dựng cây.
+    """
+    patterns = [re.compile(rf"<{re.escape(name)}[\s>]", re.I) for name in names] + [
+        re.compile(rf"""class\s*=\s*["'][^"']*(?<![\w-]){re.escape(cls)}(?![\w-])""")
+        for cls in classes
+    ]
+    return lambda html: all(pattern.search(html) for pattern in patterns)
+
+
+def _slots() -> asyncio.Semaphore:
+    # Không xếp hàng nhiều thread chờ trình duyệt hơn số trình duyệt trong pool
+    global _browser_slots
+    if _browser_slots is None:
+        _browser_slots = asyncio.Semaphore(config.BROWSER_POOL_SIZE)
+    return _browser_slots
+
+
+def _render_in_thread(slots: asyncio.Semaphore, render: Callable[[str], str], url: str) -> "asyncio.Future[str]":
+    """
+    Chạy render trong thread (như asyncio.to_thread, mang theo context) và
+    chỉ trả slot khi thread xong: task chờ bị huỷ (deadline, client ngắt kết
+    nối) thì thread vẫn đang giữ trình duyệt tới lúc đó.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(None, contextvars.copy_context().run, render, url)
+
+    def done(f: "asyncio.Future[str]") -> None:
+        slots.release()
+        # Không ai chờ nữa (task đã bị huỷ): đánh dấu lỗi là đã xem
+        if not f.cancelled():
+            f.exception()
+
+    future.add_done_callback(done)
+    # shield: huỷ task chờ không được đánh dấu future là xong khi thread còn chạy
+    return asyncio.shield(future)
+
+
+async def fetch_static_first(
+    url: str,
+    is_complete: Callable[[str], bool],
+    render: Callable[[str], str],
+    page: str = "article",
+) -> str:
+    """
+    Trả HTML của `url`: bản tĩnh nếu is_complete(html), nếu không thì bản do
+    `render(url)` (hàm blocking dùng browser pool, chạy trong thread) trả về.
+    """
+    if config.STATIC_FETCH_ENABLED:
+        try:
+            html = await fetch_text(url, timeout=config.STATIC_FETCH_TIMEOUT)
+        except httpx.HTTPError as e:
+            logger.debug("Static fetch of %s failed (%s), using browser", url, e)
+        else:
+            if is_complete(html):
+                metrics.FETCH_TIER.labels(metrics.current_source(), page, STATIC).inc()
+                return html
+            logger.debug("Static HTML of %s is incomplete, using browser", url)
+
+    breaker = get_breaker(urlsplit(url).hostname or "")
+    breaker.before_call()
+    slots = _slots()
+    await deadline.bounded(slots.acquire(), f"waiting for a browser for {url}")
+    try:
+        html = await _render_in_thread(slots, render, url)
+    except deadline.DeadlineExceeded:
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    # Trang không load xong trong thời gian chờ -> render trả về ""
+    if html:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    metrics.FETCH_TIER.labels(metrics.current_source(), page, BROWSER).inc()
+    return html
@@ -0,0 +1,81 @@
+"""
+Gộp bài viết từ nhiều nguồn: truy vấn song song, mỗi nguồn có deadline riêng,
+trả về phần đã xong kèm trạng thái + thời gian của từng nguồn.
+
+Mỗi bài được gắn cụm bài gần trùng (`cluster`, xem app.core.near_duplicates)
+và cờ `canonical`: bài đăng sớm nhất của cụm trong kết quả là bản gốc.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Tuple, Union
+
+from app.core.article import Article
+from app.core.article_store import canonical_url
+from app.core.near_duplicates import get_near_duplicate_index
+from app.services.query import ALL, ArticleQuery
+from app.services.sources import get_source_articles
+
+_MIN_TIME = datetime.min.replace(tzinfo=timezone.utc)
+
+
+async def _query_source(name: str, deadline: float, query: ArticleQuery) -> Tuple[List[Article], Dict]:
+    start = time.perf_counter()
+    articles: List[Article] = []
+    try:
+        entry = await asyncio.wait_for(get_source_articles(name, query, project=False), deadline)
+        articles = entry.data
+        status = {"status": "ok", "count": len(articles), **entry.meta()}
+    except asyncio.TimeoutError:
+        status = {"status": "timeout"}
+    except Exception as e:
+        status = {"status": "error", "error": str(e)}
+    status["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return articles, status
+
+
+def _mark_duplicates(articles: List[Dict], clusters: Dict[str, str], collapse: bool) -> List[Dict]:
+    """
+    `articles` đã xếp mới nhất trước. collapse=True: chỉ giữ bài canonical
+    của mỗi cụm, kèm `duplicates` là các bản còn lại.
+    """
+    groups: Dict[Union[str, int], List[Dict]] = {}
+    for article in articles:
+        cluster = clusters.get(canonical_url(article["url"])) if article.get("url") else None
+        article["cluster"] = cluster
+        groups.setdefault(cluster or id(article), []).append(article)
+
+    for members in groups.values():
+        canonical = ([a for a in members if a["published_time"]] or members)[-1]
+        for article in members:
+            article["canonical"] = article is canonical
+        if collapse:
+            canonical["duplicates"] = [
+                {"source": a["source"], "url": a["url"]} for a in members if a is not canonical
+            ]
+    return [a for a in articles if a["canonical"]] if collapse else articles
+
+
+async def aggregate_sources(
+    names: Iterable[str], deadline: float, query: ArticleQuery = ALL, collapse: bool = False,
+) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    limit áp dụng cho từng nguồn (trước khi scrape) rồi cho cả danh sách đã
+    gộp (sau khi gom cụm); fields được áp sau cùng.
+    """
+    names = list(names)
+    results = await asyncio.gather(*(_query_source(name, deadline, query) for name in names))
+
+    merged: List[Article] = []
+    statuses: Dict[str, Dict] = {}
+    for name, (articles, status) in zip(names, results):
+        statuses[name] = status
+        merged.extend(articles)
+
+    # Mới nhất trước; bài không có thời gian xếp cuối
+    merged.sort(key=lambda a: a.published_time or _MIN_TIME, reverse=True)
+
+    # Bài chưa có trong index (vd. scrape trực tiếp, không qua cache) được thêm luôn
+    clusters = await asyncio.to_thread(get_near_duplicate_index().assign, merged)
+    articles = _mark_duplicates([a.to_dict() for a in merged], clusters, collapse)
+    return [query.project_row(a) for a in query.take(articles)], statuses
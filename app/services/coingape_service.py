@@ -1,51 +1,76 @@
-from typing import Dict, Optional
-from bs4 import BeautifulSoup
+import asyncio
+from typing import AsyncIterator, List
 from urllib.parse import urljoin
-import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from datetime import datetime
-import pytz
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/116.0 Safari/537.36"
-    )
-}
-
-def get_news_links(url: str) -> list[str]:
+
+from app.core import config, metrics
+from app.core.article import Article, make_article
+from app.core.extraction import Collect, Extractor, Field, Match, Rule, attr, text
+from app.core.browser_pool import get_browser_pool
+from app.core.http_client import fetch_text
+from app.core.parsing import compile_selector, make_soup, only
+from app.core.page_cache import LISTING, record_page
+from app.core.pipeline import run_extract
+from app.core.tiered_fetch import fetch_static_first, requires
+from app.services.crawler import iter_new_links, scrape_new_links
+from app.services.query import ALL, ArticleQuery
+
+COINGAPE_RSS_FEED_URL = config.source_url("coingape", "https://coingape.com/category/news/")
+
+# Chỉ parse các phần trang mà extractor cần
+LISTING_PARTS = only(classes=("col-md-7", "NewsPre"))
+ARTICLE_PARTS = only(classes=("c-title", "imgthum", "arcg-timeago", "auth-name", "keyfeatures"))
+
+EXTRACTOR = Extractor(
+    ARTICLE_PARTS,
+    title=Field(Rule(Match("h1", classes=("c-title",)))),
+    media=Field(Rule(Match("img", within=Match("div", classes=("imgthum",))), attr("src"))),
+    published=Field(Rule(Match("time", classes=("arcg-timeago",)), attr("datetime"))),
+    author=Field(Rule(Match("a", within=Match("span", classes=("auth-name",))))),
+    # Các ý chính (li trong div.keyfeatures), nối liền
+    content=Collect(
+        Match("li"),
+        containers=(Match("div", classes=("keyfeatures",)),),
+        value=text,
+        sep="",
+        whole_page=False,
+    ),
+)
+
+LINK_CSS = "div.col-md-7.col-50.mb-4 a[href], .NewsPre .Newslists a[href]"
+LINK_SELECTOR = compile_selector(LINK_CSS)
+# HTML tĩnh dùng được khi đã có danh sách bên phải, nếu không phải render bằng trình duyệt
+LISTING_READY = requires(classes=("NewsPre", "Newslists"))
+
+async def get_news_links(url: str, query: ArticleQuery = ALL) -> list[str]:
     """
     Lấy toàn bộ link bài trong:
       - cột trái:  div.col-md-7.col-50.mb-4
       - danh sách phải: .NewsPre .Newslists
     Trả về list URL tuyệt đối, bỏ trùng và lọc link phụ (author/category/tag).
+
+    Trang listing không có ngày đăng: có since/until thì phải scrape hết rồi
+    mới lọc được, nên `limit` chỉ cắt link khi không lọc theo ngày.
     """
-    # --- Selenium (headless) ---
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-dev-shm-usage")
-
-    driver = webdriver.Chrome(options=opts)
-    try:
-        driver.get(url)
-        # Chờ khi các <a> ở 2 khu vực xuất hiện
-        selector = "div.col-md-7.col-50.mb-4 a[href], .NewsPre .Newslists a[href]"
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_all_elements_located((By.CSS_SELECTOR, selector))
-        )
-        html = driver.page_source
-    finally:
-        driver.quit()
+    with metrics.timed("link_discovery"):
+        html = await fetch_static_first(url, LISTING_READY, _fetch_listing, page="listing")
+        record_page(url, html, LISTING)
+        links = await asyncio.to_thread(extract_news_links, html, url)
+    return links if query.has_window else query.take(links)
 
+def _fetch_listing(url: str) -> str:
+    # --- Selenium (headless, mượn từ pool) ---
+    # Chờ khi các <a> ở 2 khu vực xuất hiện
+    html = get_browser_pool().render(url, (By.CSS_SELECTOR, LINK_CSS), timeout=20, every=True)
+    if html is None:
+        raise TimeoutException(f"no news links on {url}")
+    return html
+
+def extract_news_links(html: str, url: str) -> list[str]:
     # --- Parse & lấy link ---
-    soup = BeautifulSoup(html, "html.parser")
-    anchors = soup.select("div.col-md-7.col-50.mb-4 a[href], .NewsPre .Newslists a[href]")
+    soup = make_soup(html, LISTING_PARTS)
+    anchors = LINK_SELECTOR.select(soup)
 
     banlist = ("/author/", "/category/", "/tag/", "/companies.")
     links = [
@@ -57,50 +82,26 @@ def get_news_links(url: str) -> list[str]:
     # Bỏ trùng nhưng giữ thứ tự
     return list(dict.fromkeys(links))
 
-def scrape_article(url: str) -> Dict:
-    response = requests.get(url, headers=HEADERS)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    #title
-    title: Optional[str] = None
-    h1 = soup.find("h1", class_="c-title entry-title tittle")
-    title = h1.get_text(strip=True) if h1 else None
-    
-    #media
-    img_div = soup.find("div", class_="imgthum")
-    img_tag = img_div.find("img") if img_div else None
-    media = img_tag["src"] if img_tag else None
-
-    #published_time
-    time_tag = soup.find("time", class_="arcg-timeago")
-    time = time_tag["datetime"]
-    time_utc = datetime.fromisoformat(time)
-    time_utc = time_utc.astimezone(pytz.UTC)
-    vn_tz = pytz.timezone("Asia/Ho_Chi_Minh")
-    dt_vn = time_utc.astimezone(vn_tz)
-    published_time = dt_vn.isoformat()
-
-    #author
-    author_tag = soup.find("span", class_="auth-name")
-    a_tag = author_tag.find("a")
-    author = a_tag.get_text(strip=True)
-
-    #content
-    content_tag = soup.find("div", class_="keyfeatures")
-    hightlights = content_tag.find_all("li")
-    content = ""
-    for hightlight in hightlights:
-        content += hightlight.get_text(strip=True)
-
-    return {
-        "url": url,
-        "title": title,
-        "media": media,
-        "published_time": published_time,
-        "author": author,
-        "content": content
-    } 
+async def fetch_article(url: str) -> str:
+    return await fetch_text(url)
+
+async def scrape_article(url: str) -> Article:
+    return await run_extract(extract_article, await fetch_article(url), url)
+
+def extract_article(html: str, url: str, with_content: bool = True) -> Article:
+    values = EXTRACTOR.extract(html, skip=() if with_content else ("content",))
+    return make_article("coingape", url, **values)
+
+
+async def crawl(url: str = COINGAPE_RSS_FEED_URL, query: ArticleQuery = ALL) -> List[Article]:
+    links = await get_news_links(url, query)
+    return await scrape_new_links("coingape", links, fetch_article, extract_article, query=query)
+
+
+async def iter_crawl(url: str = COINGAPE_RSS_FEED_URL, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    links = await get_news_links(url, query)
+    async for article in iter_new_links("coingape", links, fetch_article, extract_article, query=query):
+        yield article
 
 
 # if __name__ == "__main__":
@@ -1,111 +1,104 @@
-from typing import Dict, Optional
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
-import feedparser
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/116.0 Safari/537.36"
-    )
-}
-
-# COINTELEGERAPH_RSS = "https://cointelegraph.com/rss"
-
-def get_article_links(url: str) -> list:
-    feed = feedparser.parse(url)
+from typing import AsyncIterator, List, Optional
+
+from bs4 import Tag
+
+from app.core import config, metrics
+from app.core.article import Article, make_article
+from app.core.extraction import Collect, Extractor, Field, Match, Rule, attr
+from app.core.feeds import entry_published, fetch_feed
+from app.core.http_client import fetch_text
+from app.core.normalize import parse_datetime
+from app.core.parsing import only
+from app.core.pipeline import run_extract
+from app.services.crawler import iter_new_links, scrape_new_links
+from app.services.query import ALL, ArticleQuery, in_window
+
+COINTELEGRAPH_URL = config.source_url("cointelegraph", "https://cointelegraph.com/rss")
+
+_CONTENT_CLASSES = (
+    "post-content", "post__content", "post_content",
+    "post-content-wrapper", "post_content-wrapper",
+)
+
+# Chỉ parse các phần trang mà extractor cần (p: fallback khi không thấy container)
+ARTICLE_PARTS = only(
+    names=("h1", "time", "picture", "main", "p"),
+    classes=("post-meta__author", "post-meta__author-name") + _CONTENT_CLASSES,
+)
+
+
+def _picture_source(tag: Tag) -> Optional[str]:
+    # srcset "url 1x, url 2x": lấy url đầu tiên
+    srcset = tag.get("srcset")
+    return srcset.split()[0] if srcset and srcset.split() else None
+
+
+def _link_or_text(tag: Tag) -> Optional[str]:
+    a = tag.find("a")
+    return (a.get_text(strip=True) if a else tag.get_text(strip=True)) or None
+
+
+_PICTURE = Match("picture")
+
+EXTRACTOR = Extractor(
+    ARTICLE_PARTS,
+    title=Field(Rule(Match("h1", classes=("post__title",))), Rule(Match("h1"))),
+    # <time datetime="..."> (không parse được -> None)
+    published=Field(Rule(Match("time"), attr("datetime")), parse=parse_datetime),
+    author=Field(
+        Rule(Match("div", classes=("post-meta__author",)), _link_or_text),
+        Rule(Match("span", classes=("post-meta__author-name",)), _link_or_text),
+    ),
+    # Ảnh đầu tiên trong <picture>: ưu tiên <img src>, fallback <source srcset>
+    media=Field(
+        Rule(Match("img", attrs={"src": True}, within=_PICTURE), attr("src")),
+        Rule(Match("source", within=_PICTURE), _picture_source),
+    ),
+    # Các <p> trong container nội dung, không có thì trong <main> / cả trang
+    content=Collect(
+        Match("p"),
+        containers=(tuple(Match("div", classes=(c,)) for c in _CONTENT_CLASSES), Match("main")),
+    ),
+)
+
+async def get_article_links(url: str, query: ArticleQuery = ALL) -> list:
+    with metrics.timed("link_discovery"):
+        feed = await fetch_feed(url)
     today_links = []
 
-    # Ngày hôm nay (UTC+7)
-    now_vn = datetime.now(ZoneInfo("Asia/Ho_Chi_Minh")).date()
+    # Khoảng ngày đăng được yêu cầu (mặc định: không giới hạn)
+    window = query.window()
 
     for entry in feed.entries:
+        if not in_window(entry_published(entry), window):
+            continue
         today_links.append(entry.get("link", ""))
         break #chỉ lấy link đầu tiên (link tổng hợp từ cointelegraph)
 
     return today_links
 
-def scrape_article(url: str) -> Dict:
-    response = requests.get(url, headers=HEADERS, timeout=15)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    # --- title ---
-    title: Optional[str] = None
-    h1 = soup.find("h1", class_="post__title") or soup.find("h1")
-    if h1:
-        title = h1.get_text(strip=True)
-
-    # --- published_time từ <time datetime="..."> ---
-    pub_dt = None
-    t = soup.find("time", attrs={"datetime": True})
-    if t and t.get("datetime"):
-        dt_str = t["datetime"]
-        try:
-            pub_dt = datetime.fromisoformat(dt_str.replace("Z", "+00:00")).astimezone(timezone.utc)
-        except Exception:
-            pub_dt = dt_str
-
-    # --- author ---
-    author: Optional[str] = None
-    author_block = soup.find("div", class_="post-meta__author") or soup.find("span", class_="post-meta__author-name")
-    if author_block:
-        a = author_block.find("a")
-        author = (a.get_text(strip=True) if a else author_block.get_text(strip=True)) or None
-
-    # --- description ---
-    desc: Optional[str] = None
-    meta_desc = soup.find("meta", {"property": "og:description"})
-    if meta_desc and meta_desc.get("content"):
-        desc = meta_desc["content"]
-
-    # --- media (ảnh đầu tiên trong <picture>) ---
-    media: Optional[str] = None
-    picture = soup.find("picture")
-    if picture:
-        # Ưu tiên lấy <img src>
-        img = picture.find("img")
-        if img and img.get("src"):
-            media = img["src"]
-        else:
-            # fallback: lấy source đầu tiên
-            source = picture.find("source")
-            if source and source.get("srcset"):
-                media = source["srcset"].split()[0]  # lấy url đầu tiên
-
-    # --- content ---
-    content: Optional[str] = None
-    article_container = soup.select_one(
-        "div.post-content, div.post__content, div.post_content, "
-        "div.post-content-wrapper, div.post_content-wrapper"
-    )
-    paragraphs = []
-    if article_container:
-        p_tags = article_container.find_all("p")
-    else:
-        main = soup.find("main") or soup
-        p_tags = main.find_all("p")
-
-    for p in p_tags:
-        txt = p.get_text(" ", strip=True)
-        if txt:
-            paragraphs.append(txt)
-
-    if paragraphs:
-        content = "\n\n".join(paragraphs)
-
-    return {
-        "url": url,
-        "title": title,
-        "media": media,
-        "published_time": pub_dt.astimezone(ZoneInfo("Asia/Ho_Chi_Minh")) if isinstance(pub_dt, datetime) else pub_dt,
-        "author": author,
-        "content": content,
-    }
+async def fetch_article(url: str) -> str:
+    return await fetch_text(url, timeout=15)
+
+async def scrape_article(url: str) -> Article:
+    return await run_extract(extract_article, await fetch_article(url), url)
+
+def extract_article(html: str, url: str, with_content: bool = True) -> Article:
+    values = EXTRACTOR.extract(html, skip=() if with_content else ("content",))
+    return make_article("cointelegraph", url, **values)
+
+
+async def crawl(url: str = COINTELEGRAPH_URL, query: ArticleQuery = ALL) -> List[Article]:
+    links = await get_article_links(url, query)
+    return await scrape_new_links("cointelegraph", links, fetch_article, extract_article, query=query)
+
+
+async def iter_crawl(url: str = COINTELEGRAPH_URL, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    links = await get_article_links(url, query)
+    async for article in iter_new_links(
+        "cointelegraph", links, fetch_article, extract_article, query=query,
+    ):
+        yield article
 
 
 # if __name__ == "__main__":
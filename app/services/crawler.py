@@ -0,0 +1,166 @@
+"""
+Bước scrape dùng chung: chỉ fetch + parse các link chưa có trong kho bài viết.
+
+`query` quyết định có trích nội dung hay không; bài trích thiếu nội dung
+(fields không có "content") được trả về nhưng không ghi vào kho. Bài ghi vào
+kho cũng được đưa vào hàng đợi của index tìm kiếm (index ở nền).
+
+Link chưa scrape xong khi hết deadline của request luôn bị bỏ qua (không làm
+hỏng lượt crawl) và được ghi vào deadline.skipped.
+
+Đọc / ghi kho (SQLite, có lock dùng chung với backfill và reextract) chạy qua
+asyncio.to_thread để không chặn event loop.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from app.core import deadline, metrics
+from app.core.article import Article
+from app.core.article_store import canonical_url, get_article_store
+from app.core.feeds import FeedResult, entry_published
+from app.core.pipeline import Extract, Fetch, run_extract, run_pipeline
+from app.services.query import ALL, ArticleQuery, in_window
+from app.services.search_index import get_search_index
+
+logger = logging.getLogger(__name__)
+
+
+def _should_store(article: Article) -> bool:
+    # Bài không lấy được tiêu đề (trang chưa load xong...) thì không lưu để lần sau thử lại
+    return bool(article.title)
+
+
+def _save(articles: List[Article]) -> None:
+    get_article_store().upsert_many(articles)
+    get_search_index().add_later(articles)
+
+
+def _count_scraped(source: str, scraped: List[Article], query: ArticleQuery) -> List[Article]:
+    stored = [article for article in scraped if _should_store(article)]
+    metrics.ARTICLES.labels(source).inc(len(stored))
+    if len(stored) < len(scraped):
+        metrics.EXTRACTION_FAILURES.labels(source, "no_title").inc(len(scraped) - len(stored))
+    return stored if query.wants_content else []
+
+
+async def scrape_new_links(
+    source: str,
+    links: List[str],
+    fetch: Fetch,
+    extract: Extract,
+    concurrency: Optional[int] = None,
+    skip_errors: bool = False,
+    query: ArticleQuery = ALL,
+) -> List[Article]:
+    """
+    Trả về bài viết cho `links` (giữ thứ tự). Bài đã scrape trước đó lấy từ kho,
+    chỉ các link mới mới bị fetch + parse (qua pipeline), rồi được ghi lại vào kho.
+
+    skip_errors=True: link lỗi bị bỏ qua thay vì làm hỏng cả lượt crawl.
+    """
+    store = get_article_store()
+    links = list(dict.fromkeys(links))
+    articles = await asyncio.to_thread(store.get_many, links)
+    new_links = [link for link in links if canonical_url(link) not in articles]
+
+    scraped: List[Article] = []
+    results = run_pipeline(new_links, fetch, query.extractor(extract), fetch_concurrency=concurrency)
+    try:
+        async for link, article in results:
+            if isinstance(article, deadline.DeadlineExceeded):
+                deadline.skip(link)
+                continue
+            if isinstance(article, BaseException):
+                if skip_errors:
+                    logger.warning("Skipping %s: %s", link, article)
+                    continue
+                raise article
+            scraped.append(article)
+            articles[canonical_url(link)] = article
+    finally:
+        await results.aclose()
+
+    await asyncio.to_thread(_save, _count_scraped(source, scraped, query))
+
+    ordered = (articles.get(canonical_url(link)) for link in links)
+    return [a for a in ordered if a is not None]
+
+
+async def iter_new_links(
+    source: str,
+    links: List[str],
+    fetch: Fetch,
+    extract: Extract,
+    concurrency: Optional[int] = None,
+    skip_errors: bool = False,
+    query: ArticleQuery = ALL,
+) -> AsyncIterator[Article]:
+    """
+    Bản streaming của scrape_new_links: bài đã có trong kho được trả ngay, bài
+    mới được trả theo thứ tự scrape xong (không giữ toàn bộ kết quả trong bộ
+    nhớ). Dừng đọc giữa chừng sẽ huỷ các lượt scrape còn lại.
+    """
+    store = get_article_store()
+    links = list(dict.fromkeys(links))
+    known = await asyncio.to_thread(store.get_many, links)
+    new_links = [link for link in links if canonical_url(link) not in known]
+
+    for link in links:
+        article = known.pop(canonical_url(link), None)
+        if article is not None:
+            yield article
+
+    results = run_pipeline(new_links, fetch, query.extractor(extract), fetch_concurrency=concurrency)
+    try:
+        async for link, article in results:
+            if isinstance(article, deadline.DeadlineExceeded):
+                deadline.skip(link)
+                continue
+            if isinstance(article, BaseException):
+                if skip_errors:
+                    logger.warning("Skipping %s: %s", link, article)
+                    continue
+                raise article
+            await asyncio.to_thread(_save, _count_scraped(source, [article], query))
+            yield article
+    finally:
+        await results.aclose()
+
+
+async def build_new_entries(
+    source: str,
+    feed: FeedResult,
+    build: Callable[[Dict], Article],
+    query: ArticleQuery = ALL,
+) -> List[Article]:
+    """
+    Giống scrape_new_links nhưng cho nguồn RSS có sẵn nội dung trong feed:
+    chỉ entry có GUID mới mới được `build` (parse HTML content...), entry đã
+    thấy lấy lại từ kho. Entry cũ mà kho chưa có (lần trước lỗi) thì build lại.
+    Entry ngoài khoảng ngày / quá `limit` của query không được build.
+
+    `build` (top-level, pickle được) chạy trong các process parse như extract
+    của trang bài viết.
+    """
+    window = query.window()
+    entries = query.take([e for e in feed.entries if in_window(entry_published(e), window)])
+    build = query.extractor(build)
+
+    store = get_article_store()
+    new_ids = {id(entry) for entry in feed.new_entries}
+    articles = await asyncio.to_thread(
+        store.get_many, [entry.get("link", "") for entry in entries if id(entry) not in new_ids]
+    )
+
+    items = [
+        None if id(entry) in new_ids else articles.get(canonical_url(entry.get("link", "")))
+        for entry in entries
+    ]
+    to_build = [i for i, article in enumerate(items) if article is None]
+    new_items = list(await asyncio.gather(*(run_extract(build, entries[i]) for i in to_build)))
+    for i, article in zip(to_build, new_items):
+        items[i] = article
+
+    await asyncio.to_thread(_save, _count_scraped(source, new_items, query))
+    return items
@@ -0,0 +1,39 @@
+from typing import AsyncIterator, List
+
+from app.core import config
+from app.core.article import Article, make_article
+from app.core.feeds import fetch_feed
+from app.core.parsing import make_soup
+from app.services.crawler import build_new_entries
+from app.services.query import ALL, ArticleQuery
+
+CRYPTONEWS_RSS_FEED_URL = config.source_url("cryptonews", "https://cryptonews.com/news/feed/")
+
+
+async def crawl(url: str = CRYPTONEWS_RSS_FEED_URL, query: ArticleQuery = ALL) -> List[Article]:
+    feed = await fetch_feed(url)
+    return await build_new_entries("cryptonews", feed, _parse_entry, query)
+
+
+async def iter_crawl(url: str = CRYPTONEWS_RSS_FEED_URL, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    # Nội dung có sẵn trong feed nên không có gì để stream từng bài
+    for article in await crawl(url, query):
+        yield article
+
+
+def _parse_entry(entry, with_content: bool = True) -> Article:
+    content_text = None
+    if with_content:
+        content_html = entry.get("content", [{}])[0].get("value", "")
+        content_text = make_soup(content_html).getText()
+
+    return make_article(
+        "cryptonews",
+        entry.get("link", ""),
+        title=entry.get("title", ""),
+        media=entry.get("links", [{}])[1].get("href",""),
+        published=entry.get("published"),
+        # "description": entry.get("title_detail", {}).get("value",""),
+        author=entry.get("authors"),
+        content=content_text,
+    )
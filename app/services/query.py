@@ -0,0 +1,128 @@
+"""
+Tham số truy vấn bài viết (limit, since/until, fields) dùng chung cho mọi route.
+
+Các tham số được đẩy xuống tới bước scrape để bớt việc phải làm:
+  - since/until lọc link theo ngày đăng có sẵn trước khi fetch (pubDate của
+    RSS, thẻ bài trên trang listing). Nguồn không có ngày ở bước đó (CoinGape)
+    thì lọc sau khi extract.
+  - limit cắt danh sách link trước khi fetch, sau khi đã lọc theo ngày.
+  - fields không có "content" -> bỏ bước trích nội dung. Bài thiếu nội dung
+    không được ghi vào kho bài viết.
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from typing import AsyncIterator, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from app.core.article import Article
+from app.core.normalize import VN_TZ, parse_datetime
+
+# (since, until): since <= thời gian đăng < until, None = không giới hạn
+Window = Tuple[Optional[datetime], Optional[datetime]]
+NO_WINDOW: Window = (None, None)
+
+
+def day_window(day: Optional[date] = None) -> Window:
+    """
+    Khoảng thời gian của ngày `day` theo giờ VN (mặc định hôm nay).
+    """
+    day = day or datetime.now(VN_TZ).date()
+    start = datetime.combine(day, time.min, VN_TZ)
+    return start, start + timedelta(days=1)
+
+
+def in_window(value, window: Window) -> bool:
+    since, until = window
+    if since is None and until is None:
+        return True
+    # published_time của Article đã là datetime có múi giờ: so sánh luôn
+    published = value if isinstance(value, datetime) and value.tzinfo else parse_datetime(value)
+    if published is None:
+        return False
+    return (since is None or published >= since) and (until is None or published < until)
+
+
+@dataclass(frozen=True)
+class ArticleQuery:
+    limit: Optional[int] = None
+    since: Optional[datetime] = None
+    until: Optional[datetime] = None
+    # None = mọi field
+    fields: Optional[FrozenSet[str]] = None
+
+    @property
+    def has_window(self) -> bool:
+        return self.since is not None or self.until is not None
+
+    @property
+    def wants_content(self) -> bool:
+        return self.fields is None or "content" in self.fields
+
+    @property
+    def is_everything(self) -> bool:
+        return self.limit is None and not self.has_window and self.fields is None
+
+    def window(self, default: Window = NO_WINDOW) -> Window:
+        """
+        Khoảng ngày đăng được yêu cầu; không có since/until thì dùng `default`
+        (vd. "hôm nay" cho các nguồn vốn chỉ lấy bài trong ngày).
+        """
+        return (self.since, self.until) if self.has_window else default
+
+    def take(self, items: List) -> List:
+        return items if self.limit is None else items[:self.limit]
+
+    def extractor(self, extract: Callable) -> Callable:
+        """
+        Hàm extract của site, bỏ phần nội dung khi không cần (vẫn pickle được).
+        """
+        return extract if self.wants_content else partial(extract, with_content=False)
+
+    def matches(self, article: Article) -> bool:
+        return in_window(article.published_time, self.window())
+
+    def select(self, articles: Iterable[Article]) -> List[Article]:
+        if not self.has_window:
+            return self.take(list(articles))
+        return self.take([a for a in articles if self.matches(a)])
+
+    def project(self, article: Article) -> Union[Article, Dict]:
+        if self.fields is None:
+            return article
+        return article.to_dict(self.fields)
+
+    def project_row(self, row: Dict) -> Dict:
+        """
+        project() cho dòng kết quả dạng dict (bài + các field gắn thêm như
+        cluster, score).
+        """
+        if self.fields is None:
+            return row
+        return {k: v for k, v in row.items() if k in self.fields}
+
+    def apply(self, articles: Iterable[Article]) -> List[Union[Article, Dict]]:
+        if self.is_everything:
+            return articles if isinstance(articles, list) else list(articles)
+        return [self.project(a) for a in self.select(articles)]
+
+    async def apply_stream(self, articles: AsyncIterator[Article]) -> AsyncIterator[Union[Article, Dict]]:
+        """
+        Bản streaming của apply(): dừng đọc (và huỷ phần scrape còn lại) ngay
+        khi đủ `limit` bài.
+        """
+        count = 0
+        try:
+            async for article in articles:
+                if self.has_window and not self.matches(article):
+                    continue
+                yield self.project(article)
+                count += 1
+                if self.limit is not None and count >= self.limit:
+                    break
+        finally:
+            aclose = getattr(articles, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+ALL = ArticleQuery()
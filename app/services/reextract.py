@@ -0,0 +1,171 @@
+"""
+Chạy lại extractor hiện tại trên các trang thô đã lưu trong page cache
+(app.core.page_cache): không cần mạng, không cần trình duyệt. Dùng sau khi sửa
+extractor của một site để điền lại các field bị thiếu cho bài đã scrape.
+
+    python -m app.services.reextract                      # mọi nguồn
+    python -m app.services.reextract theblock coingape    # chỉ một số nguồn
+    python -m app.services.reextract coingape --dry-run   # chỉ đếm bài sẽ thay đổi
+
+  - Nguồn scrape trang bài (Source.extract): phiên bản mới nhất của mỗi trang.
+  - Nguồn lấy bài từ feed (Source.build_entry): mọi body feed đã lưu, mỗi bài
+    lấy từ body mới nhất có nó.
+
+Trang được chia lô cho các process (mặc định mỗi CPU một process); mỗi process
+tự đọc + giải nén trang từ file cache nên process chính chỉ nhận lại bài.
+Chỉ bài có tiêu đề và khác bản trong kho mới được ghi lại.
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import feedparser
+
+from app.core.article import Article
+from app.core.article_store import canonical_url, close_article_store, get_article_store
+from app.core.page_cache import ARTICLE, FEED, PageRow, close_page_cache, connect, get_page_cache, read_blob
+from app.services.search_index import close_search_index, get_search_index
+from app.services.sources import SOURCES
+
+logger = logging.getLogger(__name__)
+
+# (thời điểm fetch của body feed, bài)
+FeedArticles = List[Tuple[float, Article]]
+
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _worker_connection(path: str) -> sqlite3.Connection:
+    # Mỗi process parse mở file cache một lần
+    global _conn
+    if _conn is None:
+        _conn = connect(path, readonly=True)
+    return _conn
+
+
+def _extract_page(url: str, source: str, kind: str, body: bytes) -> List[Article]:
+    if kind == FEED:
+        build = SOURCES[source].build_entry
+        return [build(entry) for entry in feedparser.parse(body).entries]
+    return [SOURCES[source].extract(body.decode("utf-8", "replace"), url)]
+
+
+def _extract_pages(path: str, pages: List[PageRow]) -> Tuple[List[Article], FeedArticles, int]:
+    """
+    Chạy trong process parse: (bài từ trang bài, bài từ feed, số trang lỗi)
+    của một lô trang.
+    """
+    conn = _worker_connection(path)
+    from_pages: List[Article] = []
+    from_feeds: FeedArticles = []
+    errors = 0
+    for url, source, kind, fetched_at, digest in pages:
+        body = read_blob(conn, digest)
+        if body is None:
+            # Bị xoá khỏi cache trong lúc chạy
+            continue
+        try:
+            articles = _extract_page(url, source, kind, body)
+        except Exception as e:
+            logger.warning("Re-extracting %s failed: %s", url, e)
+            errors += 1
+            continue
+        if kind == FEED:
+            from_feeds.extend((fetched_at, article) for article in articles)
+        else:
+            from_pages.extend(articles)
+    return from_pages, from_feeds, errors
+
+
+def _changed(articles: Iterable[Article]) -> List[Article]:
+    articles = [a for a in articles if a.url and a.title]
+    stored = get_article_store().get_many(a.url for a in articles)
+    return [a for a in articles if stored.get(canonical_url(a.url)) != a]
+
+
+def _save(articles: List[Article]) -> None:
+    get_article_store().upsert_many(articles)
+    # Bài mới lưu được (trước đây thiếu tiêu đề) được thêm, bài đã sửa được index lại
+    get_search_index().add_many(articles)
+
+
+def reextract(
+    sources: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    dry_run: bool = False,
+) -> Dict[str, int]:
+    names = list(sources) if sources else list(SOURCES)
+    cache = get_page_cache()
+    pages = cache.latest(ARTICLE, [n for n in names if SOURCES[n].extract])
+    feeds = cache.versions(FEED, [n for n in names if SOURCES[n].build_entry])
+    work = pages + feeds
+    chunks = [work[i:i + chunk_size] for i in range(0, len(work), chunk_size)]
+    stats = {"pages": len(work), "articles": 0, "changed": 0, "errors": 0}
+
+    # Bài từ feed: giữ bản của body mới nhất cho mỗi URL
+    from_feeds: Dict[str, Tuple[float, Article]] = {}
+    executor = ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    with executor:
+        futures = [executor.submit(_extract_pages, cache.path, chunk) for chunk in chunks]
+        for future in as_completed(futures):
+            from_pages, feed_articles, errors = future.result()
+            stats["errors"] += errors
+            for fetched_at, article in feed_articles:
+                key = canonical_url(article.url)
+                if key not in from_feeds or from_feeds[key][0] < fetched_at:
+                    from_feeds[key] = (fetched_at, article)
+            stats["articles"] += len(from_pages)
+            changed = _changed(from_pages)
+            stats["changed"] += len(changed)
+            if changed and not dry_run:
+                _save(changed)
+
+    stats["articles"] += len(from_feeds)
+    changed = _changed(article for _, article in from_feeds.values())
+    stats["changed"] += len(changed)
+    if changed and not dry_run:
+        _save(changed)
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", help=f"trong: {', '.join(SOURCES)} (mặc định tất cả)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="số process (mặc định: số CPU)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="số trang mỗi lô gửi cho một process")
+    parser.add_argument("--dry-run", action="store_true", help="không ghi vào kho, chỉ đếm")
+    args = parser.parse_args()
+
+    unknown = set(args.sources) - set(SOURCES)
+    if unknown:
+        parser.error(f"unknown sources: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    start = time.perf_counter()
+    try:
+        stats = reextract(args.sources, args.workers, args.chunk_size, args.dry_run)
+    finally:
+        close_page_cache()
+        close_search_index()
+        close_article_store()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{stats['pages']} pages -> {stats['articles']} articles, {stats['changed']} changed"
+        f"{' (dry run, nothing written)' if args.dry_run else ''}, {stats['errors']} errors"
+        f" in {elapsed:.1f}s ({stats['pages'] / max(elapsed, 1e-9):.0f} pages/s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+"""
+Index full-text (BM25) cho mọi bài đã scrape, dùng FTS5 của SQLite.
+
+Bảng FTS5 dạng contentless: chỉ lưu postings (đã nén theo kiểu varint của
+FTS5), không lưu lại văn bản; bài đầy đủ được lấy từ kho bài viết theo URL.
+Index nằm trên đĩa nên khởi động lại không phải dựng lại; lúc start, bài có
+trong kho mà index chưa có (vd. scrape trước khi có index) được thêm bù ở nền.
+
+rowid của mỗi bài = (giây đăng bài << 20) + số thứ tự, nên thứ tự rowid là thứ
+tự thời gian và lọc since/until chỉ là một khoảng rowid.
+
+Postings được chia theo khoảng rowid (tức thời gian đăng) thành các segment,
+mỗi segment một bảng FTS5; segment mới nhất đủ SEARCH_SEGMENT_SIZE bài thì
+được đóng lại và mở segment mới. bm25() của FTS5 phải đọc toàn bộ postings
+của từ khoá trong bảng để tính IDF, nên chi phí một truy vấn phụ thuộc cỡ
+segment chứ không phụ thuộc cỡ cả kho. Truy vấn đi từ segment mới nhất, chỉ
+SEARCH_MAX_CANDIDATES bài khớp mới nhất được chấm điểm và xếp hạng; IDF tính
+trong từng segment (như shard của các search engine). Từ phổ biến như
+"bitcoin" chỉ chạm tới segment mới nhất, từ hiếm thì mọi bài khớp đều được xếp
+hạng.
+
+Bài crawler ghi vào kho được đưa vào hàng đợi (add_later) và một thread nền
+index theo lô, nên request không phải chờ ghi segment. Bài được ghi lại với nội dung
+khác (feed cập nhật bài, app.services.reextract) thì được index lại dưới rowid
+mới: docs trỏ sang rowid mới, dòng cũ bị xoá khỏi segment nếu SQLite hỗ trợ
+(contentless_delete, từ 3.43), nếu không thì chỉ bị tách khỏi docs; truy vấn
+luôn join docs nên không bao giờ trả về dòng cũ.
+Điểm BM25 tính trên title (x3), author (x2) và content (x1).
+"""
+import hashlib
+import heapq
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from app.core import config, metrics
+from app.core.article import Article
+from app.core.article_store import ArticleStore, canonical_url, get_article_store
+from app.services.query import NO_WINDOW, Window
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id     INTEGER PRIMARY KEY,
+    url    TEXT NOT NULL UNIQUE,
+    source TEXT NOT NULL,
+    digest TEXT  -- của phần đã index (NULL: index tạo trước khi có cột này)
+);
+-- rowid của bản cũ không xoá được khỏi segment: không được cấp lại
+CREATE TABLE IF NOT EXISTS stale (
+    id INTEGER PRIMARY KEY
+);
+-- Bảng FTS5 của từng segment và khoảng rowid [low, high) nó chứa
+CREATE TABLE IF NOT EXISTS segments (
+    name TEXT PRIMARY KEY,
+    low  INTEGER NOT NULL,
+    high INTEGER NOT NULL
+);
+"""
+
+_SEGMENT_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5(
+    title, content, author,
+    content = '',{delete}
+    tokenize = 'unicode61 remove_diacritics 2'
+)
+"""
+
+# Bảng contentless chỉ DELETE được khi tạo với tuỳ chọn này (SQLite >= 3.43)
+_CONTENTLESS_DELETE = "\n    contentless_delete = 1," if sqlite3.sqlite_version_info >= (3, 43, 0) else ""
+
+# Trọng số BM25 theo thứ tự cột của bảng FTS5
+_WEIGHTS = (3.0, 1.0, 2.0)
+
+# Số bit thấp của rowid dành cho các bài đăng cùng một giây
+_SEQ_BITS = 20
+_MAX_ID = 1 << 62
+
+# Số bài tối đa được index trong một transaction (thread nền, backfill)
+_BATCH = 500
+
+# "cụm từ trong ngoặc kép" hoặc một từ
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+# (url, source, score)
+Hit = Tuple[str, str, float]
+
+
+def match_expression(text: str) -> Optional[str]:
+    """
+    Chuyển chuỗi người dùng nhập thành biểu thức MATCH của FTS5: mọi từ đều
+    phải có (AND), cụm trong ngoặc kép phải liền nhau. Ký tự đặc biệt của cú
+    pháp FTS5 bị bỏ nên không thể gây lỗi cú pháp.
+    """
+    parts = []
+    for phrase, word in _QUERY_PART.findall(text):
+        tokens = _WORD.findall(phrase or word)
+        if tokens:
+            parts.append('"%s"' % " ".join(tokens))
+    return " ".join(parts) or None
+
+
+def _digest(article: Article) -> str:
+    published = article.published_time.isoformat() if article.published_time else ""
+    text = "\0".join((article.title or "", article.content or "", article.author or "", published))
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def _first_id(published: Optional[datetime]) -> int:
+    # Bài không có thời gian đăng xếp như cũ nhất
+    return int(published.timestamp()) << _SEQ_BITS if published else 0
+
+
+def _id_range(window: Window) -> Tuple[int, int]:
+    since, until = window
+    return (
+        _first_id(since) if since is not None else 0,
+        _first_id(until) if until is not None else _MAX_ID,
+    )
+
+
+class SearchIndex:
+    def __init__(self, path: str = config.SEARCH_DB_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(docs)")}
+        if "digest" not in columns:
+            self._conn.execute("ALTER TABLE docs ADD COLUMN digest TEXT")
+        # Mới nhất trước; segment đầu tiên luôn mở tới _MAX_ID
+        self._segments: List[Tuple[str, int, int]] = self._conn.execute(
+            "SELECT name, low, high FROM segments ORDER BY high DESC"
+        ).fetchall()
+        if not self._segments:
+            with self._conn:
+                self._open_segment(0)
+        # Không giới hạn: bỏ bài thì bài đó (hoặc bản sửa của nó) không bao giờ
+        # được index, mà backfill chỉ bù bài chưa có
+        self._queue: "queue.Queue[Optional[List[Article]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+
+    def close(self) -> None:
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM docs").fetchone()[0]
+
+    def _open_segment(self, low: int) -> None:
+        name = f"docs_fts_{len(self._segments)}"
+        self._conn.execute(_SEGMENT_SCHEMA.format(name=name, delete=_CONTENTLESS_DELETE))
+        self._conn.execute("INSERT INTO segments (name, low, high) VALUES (?, ?, ?)", (name, low, _MAX_ID))
+        self._segments.insert(0, (name, low, _MAX_ID))
+
+    def _roll_segment(self) -> None:
+        # Đóng segment mới nhất khi đã đủ lớn; bài đăng sau bài mới nhất của
+        # nó sẽ vào segment mới
+        name, low, _ = self._segments[0]
+        count, last = self._conn.execute(
+            "SELECT count(*), max(id) FROM docs WHERE id >= ?", (low,)
+        ).fetchone()
+        if count < config.SEARCH_SEGMENT_SIZE:
+            return
+        self._conn.execute("UPDATE segments SET high = ? WHERE name = ?", (last + 1, name))
+        self._segments[0] = (name, low, last + 1)
+        self._open_segment(last + 1)
+        logger.info("Search index: closed segment %s with %d articles", name, count)
+
+    def _segment_for(self, doc_id: int) -> str:
+        for name, low, high in self._segments:
+            if low <= doc_id < high:
+                return name
+        raise ValueError(f"no search segment for id {doc_id}")
+
+    def _next_id(self, published: Optional[datetime]) -> int:
+        first = _first_id(published)
+        last = self._conn.execute(
+            """
+            SELECT max(id) FROM (
+                SELECT id FROM docs WHERE id >= :low AND id < :high
+                UNION ALL SELECT id FROM stale WHERE id >= :low AND id < :high
+            )
+            """,
+            {"low": first, "high": first + (1 << _SEQ_BITS)},
+        ).fetchone()[0]
+        return first if last is None else last + 1
+
+    def _drop_row(self, doc_id: int) -> None:
+        try:
+            self._conn.execute(f"DELETE FROM {self._segment_for(doc_id)} WHERE rowid = ?", (doc_id,))
+        except sqlite3.OperationalError:
+            # Segment không có contentless_delete: postings cũ ở lại nhưng
+            # không còn dòng docs nào trỏ tới
+            self._conn.execute("INSERT OR IGNORE INTO stale (id) VALUES (?)", (doc_id,))
+
+    def add_many(self, articles: Iterable[Article], update: bool = True) -> int:
+        """
+        Thêm các bài chưa có trong index và (update=True) index lại các bài
+        đã có mà nội dung đổi; trả về số bài được thêm / index lại.
+        """
+        added = 0
+        with self._lock, self._conn:
+            for article in articles:
+                if not article.url:
+                    continue
+                key = canonical_url(article.url)
+                digest = _digest(article)
+                row = self._conn.execute("SELECT id, digest FROM docs WHERE url = ?", (key,)).fetchone()
+                if row is not None:
+                    old_id, old_digest = row
+                    if not update or old_digest == digest:
+                        continue
+                    self._conn.execute("DELETE FROM docs WHERE id = ?", (old_id,))
+                    self._drop_row(old_id)
+                doc_id = self._next_id(article.published_time)
+                self._conn.execute(
+                    "INSERT INTO docs (id, url, source, digest) VALUES (?, ?, ?, ?)",
+                    (doc_id, key, article.source, digest),
+                )
+                self._conn.execute(
+                    f"INSERT INTO {self._segment_for(doc_id)} (rowid, title, content, author) VALUES (?, ?, ?, ?)",
+                    (
+                        doc_id,
+                        article.title or "",
+                        article.content or "",
+                        article.author or "",
+                    ),
+                )
+                added += 1
+            if added:
+                self._roll_segment()
+        return added
+
+    def add_later(self, articles: Iterable[Article]) -> None:
+        """
+        Đưa bài vào hàng đợi index (không chặn), xem add_many.
+        """
+        articles = list(articles)
+        if not articles:
+            return
+        self._start_writer()
+        self._queue.put(articles)
+
+    def _start_writer(self) -> None:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, name="search-index", daemon=True)
+                    self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch: List[Article] = []
+            while item is not None:
+                batch.extend(item)
+                if len(batch) >= _BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.add_many(batch)
+                except sqlite3.Error as e:
+                    logger.warning("Search index write failed: %s", e)
+            if item is None:
+                return
+
+    def flush(self) -> None:
+        """
+        Index hết các bài đang chờ và dừng thread ghi.
+        """
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _search_segment(
+        self, name: str, match: str, low: int, high: int, sources: List[str], budget: int,
+    ) -> List[Tuple[float, int]]:
+        """
+        (rank, rowid) của tối đa `budget` bài khớp mới nhất trong khoảng rowid
+        [low, high) của segment (rank của bm25(): càng nhỏ càng khớp).
+        """
+        # Join docs cả khi không lọc nguồn: bỏ các dòng của bản cũ đã được index lại
+        sql = f"SELECT bm25({name}, {', '.join(map(str, _WEIGHTS))}), {name}.rowid FROM {name}"
+        sql += f" JOIN docs d ON d.id = {name}.rowid"
+        where = f"{name} MATCH ? AND {name}.rowid >= ? AND {name}.rowid < ?"
+        if sources:
+            where += f" AND d.source IN ({','.join('?' * len(sources))})"
+        return self._conn.execute(
+            f"{sql} WHERE {where} ORDER BY {name}.rowid DESC LIMIT ?",
+            [match, low, high, *sources, budget],
+        ).fetchall()
+
+    def search(
+        self,
+        text: str,
+        sources: Optional[Iterable[str]] = None,
+        window: Window = NO_WINDOW,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Hit]:
+        """
+        (canonical_url, source, score) theo điểm BM25 giảm dần (điểm càng cao
+        càng khớp).
+        """
+        match = match_expression(text)
+        if match is None:
+            return []
+        sources = list(sources) if sources is not None else []
+        low, high = _id_range(window)
+
+        scored: List[Tuple[float, int]] = []
+        with self._lock, metrics.timed("search", "search"):
+            for name, segment_low, segment_high in self._segments:
+                budget = config.SEARCH_MAX_CANDIDATES - len(scored)
+                if budget <= 0:
+                    break
+                if segment_high <= low or segment_low >= high:
+                    continue
+                scored.extend(self._search_segment(
+                    name, match, max(low, segment_low), min(high, segment_high), sources, budget,
+                ))
+            top = heapq.nsmallest(offset + limit, scored)[offset:]
+            if not top:
+                return []
+            docs = dict(
+                (doc_id, (url, source))
+                for doc_id, url, source in self._conn.execute(
+                    f"SELECT id, url, source FROM docs WHERE id IN ({','.join('?' * len(top))})",
+                    [doc_id for _, doc_id in top],
+                )
+            )
+        return [(*docs[doc_id], round(-rank, 4)) for rank, doc_id in top if doc_id in docs]
+
+    def backfill(self, store: ArticleStore) -> int:
+        """
+        Thêm các bài có trong kho mà index chưa có.
+        """
+        if self.count() >= store.count():
+            return 0
+        added = 0
+        batch: List[Article] = []
+        for article in store.iter_articles():
+            batch.append(article)
+            if len(batch) >= _BATCH:
+                added += self.add_many(batch, update=False)
+                batch.clear()
+        added += self.add_many(batch, update=False)
+        logger.info("Search index: backfilled %d articles", added)
+        return added
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex()
+        return _index
+
+
+def backfill_search_index() -> int:
+    return get_search_index().backfill(get_article_store())
+
+
+def close_search_index() -> None:
+    global _index
+    with _index_lock:
+        index, _index = _index, None
+    if index is not None:
+        index.close()
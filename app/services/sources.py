@@ -0,0 +1,232 @@
+"""
+Danh sách nguồn tin và lớp cache/scheduler phía trên các service.
+
+Endpoint đọc dữ liệu qua get_source_articles(): trả về ngay từ cache nếu có,
+chỉ scrape trực tiếp khi cache còn trống (cold start). Scheduler chạy nền sẽ
+làm mới cache của từng nguồn theo chu kỳ riêng.
+
+Truy vấn có limit/since/until/fields được lọc trên cache; khi cache trống thì
+chỉ scrape đúng phần được yêu cầu (kết quả không được đưa vào cache).
+
+Mọi lượt scrape đều là single-flight (app.core.single_flight): request giống
+nhau đến cùng lúc chờ chung một lượt, và giữa các worker process chỉ một
+worker scrape một nguồn (hoặc một truy vấn) tại một thời điểm, các worker khác
+dùng kết quả nó ghi ra.
+
+Các lượt scrape dùng chung chạy ngoài deadline của request đã kích hoạt chúng
+(app.core.deadline). Request có giới hạn thời gian mà cache trống thì tự
+scrape trong deadline của nó, xem _scrape_within_deadline.
+"""
+import asyncio
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+from app.core import config, deadline, metrics
+from app.core.article import Article, from_dict
+from app.core.cache import CacheEntry, SWRCache
+from app.core.near_duplicates import get_near_duplicate_index
+from app.core.scheduler import Job, Scheduler
+from app.core.single_flight import Published, SingleFlight, get_shared_results
+from app.services.query import ALL, ArticleQuery
+from app.services import (
+    coindesk_service,
+    coingape_service,
+    cointelegraph_service,
+    cryptonews_service,
+    theblock_service,
+    utoday_service,
+)
+
+
+@dataclass(frozen=True)
+class Source:
+    name: str
+    # crawl(query=...) / stream(query=...)
+    crawl: Callable[..., Awaitable[List[Article]]]
+    stream: Callable[..., AsyncIterator[Article]]
+    # Chu kỳ poll (giây); dữ liệu được coi là fresh thêm một nửa chu kỳ
+    interval: float
+    # Dựng lại bài từ trang thô đã lưu (app.services.reextract): extract(html,
+    # url) cho nguồn scrape trang bài, build_entry(entry) cho nguồn lấy bài từ feed
+    extract: Optional[Callable[[str, str], Article]] = None
+    build_entry: Optional[Callable[[dict], Article]] = None
+
+    @property
+    def ttl(self) -> float:
+        return self.interval * 1.5
+
+
+SOURCES: Dict[str, Source] = {
+    s.name: s
+    for s in (
+        Source(
+            "coindesk", coindesk_service.crawl, coindesk_service.iter_crawl,
+            config.poll_interval("coindesk", 120),
+            build_entry=coindesk_service._parse_entry,
+        ),
+        Source(
+            "cryptonews", cryptonews_service.crawl, cryptonews_service.iter_crawl,
+            config.poll_interval("cryptonews", 120),
+            build_entry=cryptonews_service._parse_entry,
+        ),
+        Source(
+            "cointelegraph", cointelegraph_service.crawl, cointelegraph_service.iter_crawl,
+            config.poll_interval("cointelegraph", 300),
+            extract=cointelegraph_service.extract_article,
+        ),
+        Source(
+            "utoday", utoday_service.crawl, utoday_service.iter_crawl,
+            config.poll_interval("utoday", 180),
+            extract=utoday_service.extract_article,
+        ),
+        Source(
+            "theblock", theblock_service.crawl, theblock_service.iter_crawl,
+            config.poll_interval("theblock", 600),
+            extract=theblock_service.extract_article,
+        ),
+        Source(
+            "coingape", coingape_service.crawl, coingape_service.iter_crawl,
+            config.poll_interval("coingape", 600),
+            extract=coingape_service.extract_article,
+        ),
+    )
+}
+
+article_cache = SWRCache(stale_window=config.CACHE_STALE_WINDOW)
+
+# Lượt scrape theo truy vấn (cache trống) đang chạy trong process này
+_query_flights = SingleFlight()
+
+
+def _decode(data: List[dict]) -> List[Article]:
+    return [from_dict(item) for item in data]
+
+
+def _query_key(name: str, query: ArticleQuery) -> str:
+    fields = ",".join(sorted(query.fields)) if query.fields is not None else "*"
+    since = query.since.isoformat() if query.since else ""
+    until = query.until.isoformat() if query.until else ""
+    return f"{name}-q-{query.limit}-{since}-{until}-{fields}"
+
+
+def _loader(source: Source) -> Callable[[], Awaitable[Published]]:
+    # Gắn nhãn nguồn cho metric của mọi bước bên dưới lượt crawl; bài mới
+    # được đưa vào index bài gần trùng ngay sau mỗi lượt
+    async def scrape() -> List[Article]:
+        articles = await source.crawl()
+        await asyncio.to_thread(get_near_duplicate_index().add_many, articles)
+        return articles
+
+    async def crawl() -> Union[Published, List[Article]]:
+        with metrics.source_scope(source.name), deadline.scope(None):
+            if not config.SHARED_RESULTS_ENABLED:
+                return await scrape()
+            # Kết quả worker khác ghi trong vòng một chu kỳ poll vẫn là mới
+            return await get_shared_results().load(source.name, scrape, _decode, source.interval)
+    return crawl
+
+
+async def _scrape_query(source: Source, query: ArticleQuery) -> List[Article]:
+    async def scrape() -> List[Article]:
+        return await source.crawl(query=query)
+
+    async def shared() -> List[Article]:
+        if not config.SHARED_RESULTS_ENABLED:
+            return await scrape()
+        results = get_shared_results()
+        published = await results.load(_query_key(source.name, query), scrape, _decode, source.interval)
+        await asyncio.to_thread(results.prune, config.SHARED_QUERY_RESULT_TTL)
+        return published.data
+
+    async def unbounded() -> List[Article]:
+        with deadline.scope(None):
+            return await shared()
+
+    with metrics.source_scope(source.name):
+        return await _query_flights.run((source.name, query), unbounded)
+
+
+async def _scrape_within_deadline(source: Source, query: ArticleQuery) -> CacheEntry:
+    """
+    Request có deadline khi cache trống: scrape riêng trong deadline đó thay
+    vì chờ / dẫn lượt scrape dùng chung (bài bị bỏ vì hết giờ sẽ làm thiếu
+    kết quả của người khác). Chỉ kết quả đầy đủ của cả nguồn mới vào cache.
+    """
+    with metrics.source_scope(source.name):
+        articles = await source.crawl(query=query)
+    if query.is_everything and not deadline.current().skipped:
+        await asyncio.to_thread(get_near_duplicate_index().add_many, articles)
+        return article_cache.set(source.name, articles, source.ttl)
+    return CacheEntry(articles, source.ttl, article_cache.stale_window)
+
+
+async def _peek(source: Source) -> Optional[CacheEntry]:
+    """
+    Entry trong cache; cache của process này trống thì dùng kết quả đầy đủ mà
+    worker khác đã ghi (nếu còn dùng được) thay vì scrape.
+    """
+    entry = article_cache.peek(source.name)
+    if entry is not None or not config.SHARED_RESULTS_ENABLED:
+        return entry
+    published = await asyncio.to_thread(get_shared_results().read, source.name, _decode)
+    if published is None or published.age >= source.ttl + article_cache.stale_window:
+        return None
+    return article_cache.set(source.name, published.data, source.ttl, published.fetched_at)
+
+
+async def refresh_source(name: str) -> CacheEntry:
+    source = SOURCES[name]
+    return await article_cache.refresh(name, _loader(source), source.ttl)
+
+
+async def get_source_articles(
+    name: str, query: ArticleQuery = ALL, project: bool = True,
+) -> CacheEntry:
+    """
+    project=False: chỉ lọc theo since/until/limit, giữ nguyên mọi field (để
+    bên gọi còn sắp xếp / gộp trước khi áp fields).
+    """
+    source = SOURCES[name]
+    entry = await _peek(source)
+    if (entry is None or not entry.is_usable) and deadline.is_bounded():
+        entry = await _scrape_within_deadline(source, query)
+        data = query.apply(entry.data) if project else query.select(entry.data)
+        return replace(entry, data=data)
+    if query.is_everything:
+        return await article_cache.get(name, _loader(source), source.ttl)
+
+    if entry is None or not entry.is_usable:
+        # Cache trống: chỉ scrape phần được yêu cầu thay vì cả nguồn
+        data = await _scrape_query(source, query)
+        entry = CacheEntry(data, source.ttl, article_cache.stale_window)
+    else:
+        if not entry.is_fresh:
+            article_cache.refresh(name, _loader(source), source.ttl)
+        data = entry.data
+    data = query.apply(data) if project else query.select(data)
+    return replace(entry, data=data)
+
+
+async def stream_source_articles(name: str, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    """
+    Trả từng bài: từ cache nếu còn dùng được, nếu không thì scrape trực tiếp và
+    trả mỗi bài ngay khi scrape xong.
+    """
+    source = SOURCES[name]
+    metrics.set_source(name)
+    entry = await _peek(source)
+    if entry is not None and entry.is_usable:
+        if not entry.is_fresh:
+            article_cache.refresh(name, _loader(source), source.ttl)
+        for article in query.apply(entry.data):
+            yield article
+        return
+    async for article in query.apply_stream(source.stream(query=query)):
+        yield article
+
+
+def build_scheduler() -> Scheduler:
+    return Scheduler(
+        Job(name, source.interval, lambda name=name: refresh_source(name))
+        for name, source in SOURCES.items()
+    )
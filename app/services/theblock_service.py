@@ -1,45 +1,94 @@
-from typing import Optional
-from fastapi import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import asyncio
+import re
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urljoin
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
-from datetime import datetime
-import pytz
-import requests
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/116.0 Safari/537.36"
-    )
-}
-
-def get_article_links(url: str):
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(options=options)
-
-    driver.get(url)
-
-    try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "articleCard"))
-        )
-    except:
-        driver.quit()
-        return []
-
-    html = driver.page_source
-    driver.quit()
-    soup = BeautifulSoup(html, 'lxml')
-
-    tz_hcm = pytz.timezone('Asia/Ho_Chi_Minh')
-    today_hcm = datetime.now(tz_hcm).date()
+from bs4 import SoupStrainer, Tag
+from datetime import date
+
+from app.core import config, metrics
+from app.core.article import Article, make_article
+from app.core.browser_pool import get_browser_pool
+from app.core.extraction import Collect, Extractor, Field, Match, Rule, attr, text
+from app.core.normalize import parse_local
+from app.core.parsing import make_soup, only
+from app.core.page_cache import LISTING, record_page
+from app.core.pipeline import run_extract
+from app.core.tiered_fetch import fetch_static_first, requires
+from app.services.crawler import iter_new_links, scrape_new_links
+from app.services.query import ALL, ArticleQuery, Window, day_window, in_window
+
+THEBLOCK_URL = config.source_url("theblock", "https://www.theblock.co/category/policy")
+
+# Chỉ parse các phần trang mà extractor cần
+LISTING_PARTS = only(classes=("articleCard",))
+ARTICLE_PARTS = only(
+    names=("h1", "img"),
+    classes=("categoryLink", "quickTake"),
+    extra=(SoupStrainer("a", href=re.compile("/author/")),),
+)
+
+
+
+def _category_time(tag: Tag) -> Optional[str]:
+    # "Policy • August 18, 2025, 7:31AM EDT": bỏ "EDT", tự gắn US/Eastern
+    if "•" not in tag.text:
+        return None
+    return tag.text.split("•")[-1].replace("EDT", "").strip()
+
+
+_QUICK_TAKE = Match("div", classes=("quickTake",))
+
+EXTRACTOR = Extractor(
+    ARTICLE_PARTS,
+    title=Field(Rule(Match("h1"))),
+    author=Field(Rule(Match("a", attrs={"href": lambda href: href and "/author/" in href}))),
+    media=Field(Rule(Match("img"), attr("src"))),
+    published=Field(
+        Rule(Match("div", classes=("categoryLink",)), _category_time),
+        parse=lambda value: parse_local(value, "%B %d, %Y, %I:%M%p", "America/New_York"),
+    ),
+    # Text trong các span của quickTake, không có span thì lấy các li
+    content=Collect(
+        Match("span", within=_QUICK_TAKE),
+        Match("li", within=_QUICK_TAKE),
+        value=text,
+        sep="\n",
+    ),
+)
+
+# HTML tĩnh dùng được khi đã có các phần này, nếu không phải render bằng trình duyệt
+LISTING_READY = requires(classes=("articleCard",))
+ARTICLE_READY = requires(names=("h1",))
+
+async def get_article_links(url: str, query: ArticleQuery = ALL) -> list:
+    """
+    Link bài đăng trong khoảng since/until của query (mặc định: hôm nay, giờ
+    VN), tối đa `limit` link.
+    """
+    with metrics.timed("link_discovery"):
+        html = await fetch_static_first(url, LISTING_READY, _fetch_listing, page="listing")
+        record_page(url, html, LISTING)
+        if not html:
+            return []
+        window = query.window(day_window())
+        links = await asyncio.to_thread(extract_article_links, html, window=window, url=url)
+        return query.take(list(dict.fromkeys(links)))
+
+def _fetch_listing(url: str) -> str:
+    """page_source của trang category sau khi các articleCard xuất hiện ("" nếu quá hạn)."""
+    return get_browser_pool().render(url, (By.CLASS_NAME, "articleCard"), timeout=15) or ""
+
+def extract_article_links(
+    html: str, today: Optional[date] = None, window: Optional[Window] = None, url: str = THEBLOCK_URL,
+) -> list:
+    """
+    Lấy link các bài đăng trong ngày `today` (giờ VN, mặc định hôm nay) từ
+    HTML trang category `url`, hoặc trong khoảng `window` nếu có.
+    """
+    soup = make_soup(html, LISTING_PARTS)
+
+    window = window or day_window(today)
 
     links = []
 
@@ -49,98 +98,47 @@ def get_article_links(url: str):
             continue
 
         time_text = meta.get_text(strip=True)
-        try:
-            cleaned_time_text = time_text.split('•')[0].strip()
-            dt_naive = datetime.strptime(cleaned_time_text, '%B %d, %Y, %I:%M%p EDT')
-            dt_edt = pytz.timezone('US/Eastern').localize(dt_naive)
-            dt_hcm = dt_edt.astimezone(tz_hcm)
-            if dt_hcm.date() != today_hcm:
-                continue
-            a_tag = article.find('a', href=True)
-            if a_tag:
-                links.append("https://www.theblock.co" + a_tag['href'])
-        except:
+        cleaned_time_text = time_text.split('•')[0].strip()
+        dt_edt = parse_local(cleaned_time_text, '%B %d, %Y, %I:%M%p EDT', "America/New_York")
+        if dt_edt is None or not in_window(dt_edt, window):
             continue
+        a_tag = article.find('a', href=True)
+        if a_tag:
+            links.append(urljoin(url, a_tag['href']))
 
     return links
 
-def scrape_article(url: str) -> dict:
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36")
-    driver = webdriver.Chrome(options=options)
-
-    driver.get(url)
-
-    try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.TAG_NAME, "h1"))
-        )
-    except:
-        driver.quit()
-        return {
-            "url": url,
-            "title": None
-        }
-
-    html = driver.page_source
-    driver.quit()
-
-    soup = BeautifulSoup(html, "html.parser")
-
-    #title
-    h1 = soup.find("h1")
-    title = h1.get_text(strip=True) if h1 else None
-
-    #author
-    a = soup.find("a", href=lambda x: x and "/author/" in x)
-    author = a.get_text(strip=True) if a else None
-    
-    #media
-    img = soup.find("img")
-    media = img["src"] if img else None
-
-    #published time
-    date_iso = None
-    div = soup.find("div", class_="categoryLink")
-    if div and "•" in div.text:
-        date_str = div.text.split("•")[-1].strip()
-        # Bỏ "EDT" đi, tự gắn US/Eastern
-        date_str = date_str.replace("EDT", "").strip()
-        dt_naive = datetime.strptime(date_str, "%B %d, %Y, %I:%M%p")
-
-        eastern = pytz.timezone("US/Eastern")
-        dt_est = eastern.localize(dt_naive)
-
-        hcm = pytz.timezone("Asia/Ho_Chi_Minh")
-        dt_hcm = dt_est.astimezone(hcm)
-
-        date_iso = dt_hcm.isoformat(timespec="seconds")
-
-    #content
-    quick_take = soup.find("div", class_="quickTake")
-    content = ""
-
-    if quick_take:
-        # Lấy text trong span
-        spans = quick_take.find_all("span")
-        texts = [span.get_text(strip=True) for span in spans if span.get_text(strip=True)]
-
-        # Nếu không có span, fallback lấy text trong li
-        if not texts:
-            lis = quick_take.find_all("li")
-            texts = [li.get_text(strip=True) for li in lis if li.get_text(strip=True)]
-
-        content = "\n".join(texts)
-
-    return {
-        "url": url,
-        "title": title,
-        "media": media,
-        "published_time": date_iso,
-        "author": author,
-        "content": content
-    }
+async def fetch_article(url: str) -> str:
+    return await fetch_static_first(url, ARTICLE_READY, _fetch_article)
+
+def _fetch_article(url: str) -> str:
+    # Quá hạn -> extract ra bài không có tiêu đề
+    return get_browser_pool().render(url, (By.TAG_NAME, "h1"), timeout=15) or ""
+
+async def scrape_article(url: str) -> Article:
+    return await run_extract(extract_article, await fetch_article(url), url)
+
+def extract_article(html: str, url: str, with_content: bool = True) -> Article:
+    values = EXTRACTOR.extract(html, skip=() if with_content else ("content",))
+    return make_article("theblock", url, **values)
+
+
+async def crawl(url: str = THEBLOCK_URL, query: ArticleQuery = ALL) -> List[Article]:
+    # Link đã được khử trùng lặp (giữ nguyên thứ tự xuất hiện)
+    links = await get_article_links(url, query)
+
+    # Không để văng cả job chỉ vì 1 link hỏng
+    return await scrape_new_links(
+        "theblock", links, fetch_article, extract_article, skip_errors=True, query=query,
+    )
+
+
+async def iter_crawl(url: str = THEBLOCK_URL, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    links = await get_article_links(url, query)
+    async for article in iter_new_links(
+        "theblock", links, fetch_article, extract_article, skip_errors=True, query=query,
+    ):
+        yield article
 
 
 # if __name__ == "__main__":
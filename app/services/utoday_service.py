@@ -1,214 +1,225 @@
-from typing import Dict, Optional, List
+from typing import AsyncIterator, List, Optional
 import json
+import logging
 import re
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
-from datetime import datetime, timezone
-from zoneinfo import ZoneInfo
-import feedparser
-
-HEADERS = {
-    "User-Agent": (
-        "Mozilla/5.0 (X11; Linux x86_64) "
-        "AppleWebKit/537.36 (KHTML, like Gecko) "
-        "Chrome/116.0 Safari/537.36"
-    )
-}
-
-UTODAY_RSS = "https://u.today/rss.php"
-VN_TZ = ZoneInfo("Asia/Ho_Chi_Minh")
-
-
-def get_article_links(url: str = UTODAY_RSS) -> List[str]:
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from datetime import date, datetime, timezone
+
+from app.core import config, metrics
+from app.core.article import Article, make_article
+from app.core.extraction import Collect, Extractor, Field, Match, Rule, attr, phrases
+from app.core.feeds import fetch_feed
+from app.core.http_client import fetch_text
+from app.core.normalize import parse_datetime, parse_rfc822
+from app.core.parsing import only
+from app.core.pipeline import run_extract
+from app.services.crawler import iter_new_links, scrape_new_links
+from app.services.query import ALL, ArticleQuery, Window, day_window, in_window
+
+logger = logging.getLogger(__name__)
+
+UTODAY_RSS = config.source_url("utoday", "https://u.today/rss.php")
+
+# Chỉ parse các phần trang mà extractor cần
+ARTICLE_PARTS = only(
+    names=("h1", "meta", "time", "header", "article", "main"),
+    classes=(
+        "author-brief__name", "author", "post-author", "article__author", "post-meta__author",
+        "post-header", "article__header",
+        "article__text", "article__body", "post-content",
+    ),
+    extra=(SoupStrainer("script", type="application/ld+json"),),
+)
+
+# Đoạn có thể là quảng cáo / điều khoản
+AD_FILTER = phrases(
+    "subscribe to daily newsletter",
+    "advertisement",
+    "ad ",
+    "disclaimer:",
+    "read u.today on google news",
+)
+
+
+async def get_article_links(url: str = UTODAY_RSS, query: ArticleQuery = ALL) -> List[str]:
     """
-    Lấy link bài viết U.Today đăng trong ngày hôm nay (giờ VN).
+    Lấy link bài viết U.Today đăng trong khoảng since/until của query (mặc
+    định: hôm nay, giờ VN), tối đa `limit` link.
     """
-    feed = feedparser.parse(url)
-    today_links: List[str] = []
+    with metrics.timed("link_discovery"):
+        feed = await fetch_feed(url)
+        return query.take(links_in_window(feed.entries, query.window(day_window())))
+
+
+def links_published_on(entries: List[dict], day: Optional[date] = None) -> List[str]:
+    """
+    Link của các entry RSS đăng trong ngày `day` (giờ VN, mặc định hôm nay).
+    """
+    return links_in_window(entries, day_window(day))
 
-    # Ngày hôm nay (UTC+7)
-    now_vn = datetime.now(VN_TZ).date()
 
-    for entry in feed.entries:
+def links_in_window(entries: List[dict], window: Window) -> List[str]:
+    today_links: List[str] = []
+
+    for entry in entries:
         pub_str = entry.get("published") or entry.get("pubDate")
         if not pub_str:
             continue
 
-        try:
-            # vd: Mon, 18 Aug 2025 07:31:09 +0000
-            pub_dt = datetime.strptime(pub_str, "%a, %d %b %Y %H:%M:%S %z")
-            pub_dt_vn = pub_dt.astimezone(VN_TZ)
-            if pub_dt_vn.date() == now_vn:
-                link = entry.get("link", "")
-                if link:
-                    today_links.append(link)
-        except Exception as e:
-            print("Lỗi parse pubDate:", e, pub_str)
+        # vd: Mon, 18 Aug 2025 07:31:09 +0000
+        pub_dt = parse_rfc822(pub_str)
+        if pub_dt is None:
+            logger.warning("Unparseable U.Today pubDate: %r", pub_str)
+            continue
+        if in_window(pub_dt, window):
+            link = entry.get("link", "")
+            if link:
+                today_links.append(link)
 
     return today_links
 
 
+def _json_ld_published(tag: Tag) -> Optional[str]:
+    """
+    datePublished trong JSON-LD <script type="application/ld+json"> của bài.
+    """
+    try:
+        data = json.loads(tag.string or "")
+    except ValueError:
+        return None
+    # Có thể là 1 object hoặc list
+    for obj in data if isinstance(data, list) else [data]:
+        # Bài viết thường có "@type": "NewsArticle" | "Article"
+        if isinstance(obj, dict) and obj.get("@type") in ("NewsArticle", "Article", "ReportageNewsArticle", "BlogPosting"):
+            published = obj.get("datePublished") or obj.get("dateCreated")
+            if published:
+                return published
+    return None
+
+
+_BODY_DATE = re.compile(r"\b(\w{3}),\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*-\s*(\d{1,2}):(\d{2})\b")
+
+
+def _body_text_datetime(soup: BeautifulSoup) -> Optional[datetime]:
+    """
+    Cuối cùng: chuỗi ngày dạng "Mon, 18/08/2025 - 7:31" trong text của trang
+    (ít gặp). Chỉ chạy khi không có meta / JSON-LD / <time> nào dùng được.
+    """
+    m = _BODY_DATE.search(soup.get_text(" ", strip=True))
+    if not m:
+        return None
+    try:
+        # Không có timezone -> giả định UTC
+        return datetime(
+            year=int(m.group(4)),
+            month=int(m.group(3)),
+            day=int(m.group(2)),
+            hour=int(m.group(5)),
+            minute=int(m.group(6)),
+            tzinfo=timezone.utc,
+        )
+    except ValueError:
+        return None
+
+
+# U.Today thường để thời gian ở meta article:published_time hoặc JSON-LD
+PUBLISHED = Field(
+    Rule(Match("meta", attrs={"property": "article:published_time"}), attr("content")),
+    Rule(Match("meta", attrs={"name": "article:published_time"}), attr("content")),
+    Rule(Match("script", attrs={"type": "application/ld+json"}), _json_ld_published),
+    Rule(Match("time"), attr("datetime")),
+    parse=parse_datetime,
+    fallback=_body_text_datetime,
+)
+
+_AUTHOR_BLOCK = Match(classes=("author", "post-author", "article__author", "post-meta__author"))
+_ARTICLE = Match("article")
+
+EXTRACTOR = Extractor(
+    ARTICLE_PARTS,
+    # U.Today đặt tiêu đề trong <h1>
+    title=Field(Rule(Match("h1"))),
+    published=PUBLISHED,
+    author=Field(
+        Rule(Match("meta", attrs={"name": "author"}), attr("content")),
+        Rule(Match("a", within=Match("div", classes=("author-brief__name",)))),
+        # fallback các vị trí phổ biến khác: link trong khối tác giả, hoặc cả khối
+        Rule(Match("a", within=_AUTHOR_BLOCK)),
+        Rule(_AUTHOR_BLOCK),
+    ),
+    media=Field(
+        Rule(Match("meta", attrs={"property": "og:image"}), attr("content")),
+        Rule(Match("meta", attrs={"name": "og:image"}), attr("content")),
+        # Fallback: ảnh trong header
+        Rule(Match("img", attrs={"src": True}, within=Match("header")), attr("src")),
+        Rule(Match("img", attrs={"src": True}, within=Match(classes=("post-header",))), attr("src")),
+        Rule(Match("img", attrs={"src": True}, within=Match(classes=("article__header",))), attr("src")),
+    ),
+    # Thân bài: p + li (nếu có bullet) trong container đầu tiên tìm thấy;
+    # không có container nào thì lấy trong toàn bộ phần đã parse
+    content=Collect(
+        Match(("p", "li")),
+        containers=(
+            (
+                Match("div", classes=("article__text", "article__body", "post-content")),
+                Match(classes=("content",), within=_ARTICLE),
+                _ARTICLE,
+            ),
+            Match("main"),
+        ),
+        skip=AD_FILTER,
+    ),
+)
+
+
+_PUBLISHED_ONLY = Extractor(published=PUBLISHED)
+# Cùng các field nhưng parse cả trang: cho trang không theo bố cục quen thuộc
+# (ngày chỉ có trong text, thân bài không nằm trong container nào)
+_FULL_PAGE = Extractor(**EXTRACTOR.fields)
+
+
 def _parse_meta_datetime(soup: BeautifulSoup) -> Optional[datetime]:
     """
-    U.Today thường để thời gian ở các meta:
-      - <meta property="article:published_time" content="2025-08-18T07:31:09+00:00">
-      - JSON-LD trong <script type="application/ld+json">
-    Trả về datetime timezone-aware (UTC) nếu parse được.
+    Thời gian đăng (giờ VN) từ meta / JSON-LD / <time> / text của trang.
     """
-    # 1) Open Graph article:published_time
-    og_pub = soup.find("meta", {"property": "article:published_time"}) or soup.find(
-        "meta", {"name": "article:published_time"}
-    )
-    if og_pub and og_pub.get("content"):
-        try:
-            return datetime.fromisoformat(og_pub["content"].replace("Z", "+00:00")).astimezone(timezone.utc)
-        except Exception:
-            pass
-
-    # 2) Thử JSON-LD
-    for tag in soup.find_all("script", type="application/ld+json"):
-        try:
-            data = json.loads(tag.string or "")
-            # Có thể là 1 object hoặc list
-            candidates = data if isinstance(data, list) else [data]
-            for obj in candidates:
-                if isinstance(obj, dict):
-                    # Bài viết thường có "@type": "NewsArticle" | "Article"
-                    if obj.get("@type") in ("NewsArticle", "Article", "ReportageNewsArticle", "BlogPosting"):
-                        dt_str = obj.get("datePublished") or obj.get("dateCreated")
-                        if dt_str:
-                            return datetime.fromisoformat(dt_str.replace("Z", "+00:00")).astimezone(timezone.utc)
-        except Exception:
-            continue
+    return _PUBLISHED_ONLY.run(soup)["published"]
 
-    # 3) Fallback: <time datetime="...">
-    t = soup.find("time", attrs={"datetime": True})
-    if t and t.get("datetime"):
-        dt_str = t["datetime"]
-        try:
-            return datetime.fromisoformat(dt_str.replace("Z", "+00:00")).astimezone(timezone.utc)
-        except Exception:
-            pass
-
-    # 4) Cuối cùng: parse chuỗi ngày dạng "Mon, 18/08/2025 - 7:31" nếu có trong trang (ít gặp trong meta)
-    # Lấy toàn bộ text rồi regex tìm mẫu d/m/Y - H:M
-    body_text = soup.get_text(" ", strip=True)
-    m = re.search(r"\b(\w{3}),\s*(\d{1,2})/(\d{1,2})/(\d{4})\s*-\s*(\d{1,2}):(\d{2})\b", body_text)
-    if m:
-        try:
-            # Không có timezone -> giả định UTC (rồi convert về UTC-aware)
-            dt = datetime(
-                year=int(m.group(4)),
-                month=int(m.group(3)),
-                day=int(m.group(2)),
-                hour=int(m.group(5)),
-                minute=int(m.group(6)),
-            ).replace(tzinfo=timezone.utc)
-            return dt
-        except Exception:
-            pass
 
-    return None
+async def fetch_article(url: str) -> str:
+    return await fetch_text(url, timeout=20)
+
+
+async def scrape_article(url: str) -> Article:
+    return await run_extract(extract_article, await fetch_article(url), url)
 
 
-def scrape_article(url: str) -> Dict:
+def extract_article(html: str, url: str, with_content: bool = True) -> Article:
     """
     Scrape bài U.Today:
     - title
     - media (ảnh cover)
     - published_time (UTC+7)
     - author
-    - content (p, li trong thân bài)
+    - content (p, li trong thân bài; bỏ qua nếu with_content=False)
     """
-    response = requests.get(url, headers=HEADERS, timeout=20)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+    skip = () if with_content else ("content",)
+    values = EXTRACTOR.extract(html, skip=skip)
+    if values["published"] is None or (with_content and not values["content"]):
+        # ARTICLE_PARTS bỏ phần còn lại của <body>: fallback cần cả trang
+        values = _FULL_PAGE.extract(html, skip=skip)
+    return make_article("utoday", url, **values)
 
-    # --- title ---
-    # U.Today đặt tiêu đề trong <h1>
-    title: Optional[str] = None
-    h1 = soup.find("h1")
-    if h1:
-        title = h1.get_text(strip=True)
-
-    # --- published_time ---
-    pub_dt_utc = _parse_meta_datetime(soup)
-
-    # --- author ---
-    author: Optional[str] = None
-    meta_author = soup.find("meta", {"name": "author"})
-    if meta_author and meta_author.get("content"):
-        author = meta_author["content"].strip()
-
-    if not author:
-        # U.Today: div.author-brief__name a
-        a_tag = soup.select_one("div.author-brief__name a")
-        if a_tag:
-            author = a_tag.get_text(strip=True)
-
-    if not author:
-        # fallback các vị trí phổ biến khác
-        author_block = soup.select_one(".author, .post-author, .article__author, .post-meta__author")
-        if author_block:
-            a = author_block.find("a")
-            author = (a.get_text(strip=True) if a else author_block.get_text(strip=True)) or None
-
-    # --- media (ảnh cover) ---
-    media: Optional[str] = None
-    og_img = soup.find("meta", {"property": "og:image"}) or soup.find("meta", {"name": "og:image"})
-    if og_img and og_img.get("content"):
-        media = og_img["content"].strip()
-    if not media:
-        # Fallback: thẻ img đầu tiên gần tiêu đề hoặc trong header
-        header_img = soup.select_one("header img, .post-header img, .article__header img")
-        if header_img and header_img.get("src"):
-            media = header_img["src"]
-
-    # --- content ---
-    # U.Today body thường nằm trong các container dưới; ta gom p/li lại:
-    container = (
-        soup.select_one(
-            "div.article__text, div.article__body, div.post-content, article .content, article"
-        )
-        or soup.find("article")
-        or soup.find("main")
-        or soup.body
-    )
-
-    paragraphs: List[str] = []
-    if container:
-        # Lọc đoạn văn bản: p + li (nếu có bullet)
-        for p in container.find_all(["p", "li"]):
-            # Bỏ các đoạn có thể là quảng cáo/điều khoản
-            txt = p.get_text(" ", strip=True)
-            if not txt:
-                continue
-            if any(
-                bad in txt.lower()
-                for bad in [
-                    "subscribe to daily newsletter",
-                    "advertisement",
-                    "ad ",
-                    "disclaimer:",
-                    "read u.today on google news",
-                ]
-            ):
-                continue
-            paragraphs.append(txt)
-
-    content: Optional[str] = "\n\n".join(paragraphs) if paragraphs else None
-
-    return {
-        "url": url,
-        "title": title,
-        "media": media,
-        "published_time": (
-            pub_dt_utc.astimezone(VN_TZ) if isinstance(pub_dt_utc, datetime) else None
-        ),
-        "author": author,
-        "content": content,
-    }
+
+async def crawl(url: str = UTODAY_RSS, query: ArticleQuery = ALL) -> List[Article]:
+    links = await get_article_links(url, query)
+    # Fetch song song -> tổng thời gian ~ bài chậm nhất
+    return await scrape_new_links("utoday", links, fetch_article, extract_article, query=query)
+
+
+async def iter_crawl(url: str = UTODAY_RSS, query: ArticleQuery = ALL) -> AsyncIterator[Article]:
+    links = await get_article_links(url, query)
+    async for article in iter_new_links("utoday", links, fetch_article, extract_article, query=query):
+        yield article
 
 
 # if __name__ == "__main__":
@@ -0,0 +1,85 @@
+"""
+So sánh hai cách render trang Selenium trên trang thật (cần Chrome và mạng):
+
+  - full: như trước khi có FetchProfile (page load "normal", không chặn gì)
+  - profile: profile cấu hình hiện tại (xem app.core.browser_pool.configured_profile)
+
+Mỗi trang được render -n lần với mỗi profile (một trình duyệt riêng cho mỗi
+profile); in trung vị thời gian tới lúc có page_source và số byte đã tải.
+
+    python -m benchmarks.browser_fetch                  # các trang listing mặc định
+    python -m benchmarks.browser_fetch -n 5 theblock
+    BROWSER_PAGE_LOAD_STRATEGY=normal python -m benchmarks.browser_fetch   # chỉ chặn tài nguyên
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from app.core.browser_pool import FULL_PROFILE, BrowserPool, FetchProfile, _transferred_bytes, configured_profile
+from app.services import coingape_service, theblock_service
+
+# tên -> (url, selector chờ, every)
+PAGES = {
+    "theblock": (theblock_service.THEBLOCK_URL, (By.CLASS_NAME, "articleCard"), False),
+    "coingape": (coingape_service.COINGAPE_RSS_FEED_URL, (By.CSS_SELECTOR, coingape_service.LINK_CSS), True),
+}
+
+
+def measure(profile: FetchProfile, url: str, ready, every: bool, repeat: int) -> dict:
+    pool = BrowserPool(size=1, profile=profile)
+    condition = EC.presence_of_all_elements_located(ready) if every else EC.presence_of_element_located(ready)
+    seconds, transferred, sizes = [], [], []
+    try:
+        for _ in range(repeat):
+            with pool.lease() as driver:
+                start = time.perf_counter()
+                driver.get(url)
+                WebDriverWait(driver, 30, poll_frequency=0.1).until(condition)
+                html = driver.page_source
+                seconds.append(time.perf_counter() - start)
+                transferred.append(_transferred_bytes(driver) or 0)
+                sizes.append(len(html))
+    finally:
+        pool.shutdown()
+    return {
+        "seconds": statistics.median(seconds),
+        "bytes": statistics.median(transferred),
+        "html": statistics.median(sizes),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help=f"trong: {', '.join(PAGES)} (mặc định tất cả)")
+    parser.add_argument("-n", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    unknown = set(args.pages) - set(PAGES)
+    if unknown:
+        parser.error(f"unknown pages: {', '.join(sorted(unknown))}")
+
+    profiles = {"full": FULL_PROFILE, "profile": configured_profile()}
+    print(f"{'page':<10} {'profile':<8} {'seconds':>8} {'KB tải':>10} {'KB html':>8}")
+    for name in args.pages or PAGES:
+        url, ready, every = PAGES[name]
+        results = {label: measure(profile, url, ready, every, args.repeat) for label, profile in profiles.items()}
+        for label, result in results.items():
+            print(
+                f"{name:<10} {label:<8} {result['seconds']:>8.2f} "
+                f"{result['bytes'] / 1024:>10.0f} {result['html'] / 1024:>8.0f}"
+            )
+        full, fast = results["full"], results["profile"]
+        print(
+            f"{name:<10} {'':<8} x{full['seconds'] / max(fast['seconds'], 1e-9):>7.1f} "
+            f"x{full['bytes'] / max(fast['bytes'], 1):>9.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,340 @@
+"""
+Load test các endpoint của api_router trên một máy, không cần mạng.
+
+Harness khởi động mock server (benchmarks.mock_upstream) thay cho các site
+thật, chạy app bằng uvicorn với các nguồn trỏ vào mock (SOURCE_URL_<SOURCE>)
+và một DATA_DIR tạm, rồi lần lượt dồn tải vào từng endpoint bằng -c client
+đồng thời trong -d giây (vòng kín: mỗi client gửi request tiếp ngay khi nhận
+xong response). Với mỗi endpoint in throughput, p50/p95/p99, số lỗi, CPU và
+peak RSS của cả cây process server (uvicorn, các worker, process parse).
+
+    python -m benchmarks.loadtest                             # mọi endpoint, 10 client, 20s
+    python -m benchmarks.loadtest -k news -c 50 -d 30
+    python -m benchmarks.loadtest --workers 4 --latency 0.2 --error-rate 0.05
+    python -m benchmarks.loadtest --output before.json        # lưu kết quả ...
+    python -m benchmarks.loadtest --compare before.json       # ... và so lần sau với nó
+
+Các biến môi trường khác (PARSE_WORKERS, POLL_INTERVAL_<SOURCE>, ...) được
+truyền nguyên cho app, nên so sánh cấu hình chỉ cần chạy lại với env khác.
+Request đầu tiên tới mỗi endpoint (scrape lần đầu qua mock) được đo riêng
+(cột "first"). CPU / RSS đọc từ /proc (chỉ Linux). Client chạy trên cùng máy
+nên cũng chiếm CPU: nên đặt -c vừa phải so với số core.
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.mock_upstream import UPSTREAMS, mock_url
+
+# Tham số bắt buộc / đại diện cho từng endpoint
+ENDPOINT_PARAMS: Dict[str, Dict[str, str]] = {
+    "/v1/search": {"q": "bitcoin"},
+}
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def api_endpoints() -> List[str]:
+    from fastapi import FastAPI
+
+    from app.api.v1.api_router import router
+
+    app = FastAPI()
+    app.include_router(router)
+    return [path for path, methods in app.openapi()["paths"].items() if "get" in methods]
+
+
+# --- Tài nguyên của server (đọc /proc) ---
+
+def _process_tree(root: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # Tên process nằm trong (), có thể chứa dấu cách
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, ()))
+    return tree
+
+
+def _cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime, stime (field 14, 15 của stat)
+    return (int(fields[11]) + int(fields[12])) / _CLOCK_TICKS
+
+
+def _rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class ResourceMonitor:
+    """
+    CPU (tổng của cây process) và peak RSS của server trong một khoảng đo.
+    """
+
+    def __init__(self, root: int, interval: float = 0.2):
+        self.root = root
+        self.interval = interval
+        self.available = os.path.isdir("/proc")
+        self.cpu: Dict[int, float] = {}
+        self.peak_rss = 0
+
+    def _sample(self) -> None:
+        rss = 0
+        for pid in _process_tree(self.root):
+            try:
+                self.cpu[pid] = _cpu_seconds(pid)
+                rss += _rss_bytes(pid)
+            except OSError:
+                # Process vừa thoát
+                continue
+        self.peak_rss = max(self.peak_rss, rss)
+
+    async def measure(self, stop: asyncio.Event) -> Tuple[Optional[float], Optional[int]]:
+        """
+        Lấy mẫu tới khi `stop` được set; trả về (giây CPU, peak RSS).
+        """
+        if not self.available:
+            await stop.wait()
+            return None, None
+        self._sample()
+        before = dict(self.cpu)
+        self.peak_rss = 0
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._sample()
+        used = sum(cpu - before.get(pid, 0.0) for pid, cpu in self.cpu.items())
+        return used, self.peak_rss
+
+
+# --- Tải ---
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def _client_loop(client: httpx.AsyncClient, url: str, params: dict, until: float, latencies: List[float], errors: Dict[str, int]) -> None:
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        try:
+            response = await client.get(url, params=params)
+            await response.aread()
+            if response.status_code >= 400:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+        except httpx.HTTPError as e:
+            errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+async def load_endpoint(base: str, path: str, concurrency: int, duration: float, server_pid: int) -> dict:
+    url = base + path
+    params = ENDPOINT_PARAMS.get(path, {})
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=120) as client:
+        # Request đầu tiên: scrape qua mock nếu cache còn trống
+        start = time.perf_counter()
+        first = await client.get(url, params=params)
+        first_seconds = time.perf_counter() - start
+
+        latencies: List[float] = []
+        errors: Dict[str, int] = {}
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(ResourceMonitor(server_pid).measure(stop))
+        started = time.monotonic()
+        until = started + duration
+        await asyncio.gather(*(
+            _client_loop(client, url, params, until, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.monotonic() - started
+        stop.set()
+        cpu, rss = await monitor
+
+    return {
+        "first_status": first.status_code,
+        "first": first_seconds,
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "errors": errors,
+        "cpu": cpu / elapsed if cpu is not None else None,
+        "rss": rss,
+    }
+
+
+# --- Process mock / app ---
+
+def _wait_ready(url: str, process: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{' '.join(process.args)} exited with {process.returncode}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def start_mock(args) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.mock_upstream",
+        "--port", str(args.mock_port),
+        "--latency", str(args.latency),
+        "--jitter", str(args.jitter),
+        "--error-rate", str(args.error_rate),
+    ], stdout=subprocess.DEVNULL, start_new_session=True)
+    _wait_ready(f"http://127.0.0.1:{args.mock_port}/", process)
+    return process
+
+
+def app_env(args, data_dir: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env["DATA_DIR"] = data_dir
+    for source in UPSTREAMS:
+        env[f"SOURCE_URL_{source.upper()}"] = mock_url(source, args.mock_port)
+    # Mock chạy local: không giới hạn tốc độ, không cần Chrome (trang
+    # TheBlock / CoinGape đã lưu là HTML tĩnh); env có sẵn vẫn được ưu tiên
+    env.setdefault("RATE_LIMIT_127_0_0_1", "0")
+    env.setdefault("BROWSER_PREWARM", "0")
+    return env
+
+
+def start_app(args, data_dir: str) -> subprocess.Popen:
+    process = subprocess.Popen([
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--port", str(args.port),
+        "--workers", str(args.workers),
+        "--log-level", "warning",
+        "--no-access-log",
+    ], env=app_env(args, data_dir), start_new_session=True)
+    _wait_ready(f"http://127.0.0.1:{args.port}/upstreams", process)
+    return process
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    # Process con còn sót (vd. process parse của worker) cùng session
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+# --- Báo cáo ---
+
+def _fmt(value: Optional[float], scale: float = 1.0, digits: int = 0) -> str:
+    return "-" if value is None else f"{value * scale:.{digits}f}"
+
+
+def report(results: Dict[str, dict], baseline: Optional[Dict[str, dict]] = None) -> None:
+    header = f"{'endpoint':<22} {'first s':>8} {'req':>7} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>6} {'cpu %':>6} {'rss MB':>7}"
+    if baseline:
+        header += f" {'rps Δ':>7} {'p99 Δ':>7}"
+    print(header)
+    for path, r in results.items():
+        line = (
+            f"{path:<22} {r['first']:>8.2f} {r['requests']:>7} {r['rps']:>8.1f} "
+            f"{_fmt(r['p50'], 1000, 1):>8} {_fmt(r['p95'], 1000, 1):>8} {_fmt(r['p99'], 1000, 1):>8} "
+            f"{sum(r['errors'].values()):>6} {_fmt(r['cpu'], 100):>6} {_fmt(r['rss'], 1 / 2**20):>7}"
+        )
+        old = (baseline or {}).get(path)
+        if old:
+            line += f" {r['rps'] / max(old['rps'], 1e-9) - 1:>+7.0%} {r['p99'] / max(old['p99'], 1e-9) - 1:>+7.0%}"
+        print(line)
+        if r["first_status"] >= 400:
+            print(f"{'':<22} first request: HTTP {r['first_status']}")
+        if r["errors"]:
+            print(f"{'':<22} errors: {', '.join(f'{k} x{v}' for k, v in sorted(r['errors'].items()))}")
+
+
+async def run(args, endpoints: List[str], server_pid: int) -> Dict[str, dict]:
+    base = f"http://127.0.0.1:{args.port}"
+    results = {}
+    for path in endpoints:
+        results[path] = await load_endpoint(base, path, args.concurrency, args.duration, server_pid)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="chỉ các endpoint có chuỗi này")
+    parser.add_argument("-c", "--concurrency", type=int, default=10, help="số client đồng thời")
+    parser.add_argument("-d", "--duration", type=float, default=20.0, help="số giây tải mỗi endpoint")
+    parser.add_argument("--workers", type=int, default=1, help="số worker uvicorn")
+    parser.add_argument("--port", type=int, default=8800, help="cổng của app")
+    parser.add_argument("--mock-port", type=int, default=8900, help="cổng đầu tiên của mock server")
+    parser.add_argument("--latency", type=float, default=0.05, help="độ trễ của mock (giây)")
+    parser.add_argument("--jitter", type=float, default=0.05, help="độ trễ ngẫu nhiên thêm của mock (giây)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="tỉ lệ response lỗi của mock (0..1)")
+    parser.add_argument("--output", help="ghi kết quả ra file JSON")
+    parser.add_argument("--compare", help="so với kết quả JSON của lần chạy trước")
+    args = parser.parse_args()
+
+    endpoints = [path for path in api_endpoints() if args.filter in path]
+    if not endpoints:
+        parser.error(f"no endpoint matches {args.filter!r}")
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as data_dir:
+        mock = start_mock(args)
+        try:
+            app = start_app(args, data_dir)
+            try:
+                results = asyncio.run(run(args, endpoints, app.pid))
+            finally:
+                stop(app)
+        finally:
+            stop(mock)
+
+    report(results, baseline)
+    if args.output:
+        settings = {k: v for k, v in vars(args).items() if k not in ("output", "compare")}
+        with open(args.output, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Mock server thay cho các site thật khi load test (benchmarks.loadtest): phục
+vụ feed / trang listing / trang bài đã ghi trong benchmarks/fixtures, với độ
+trễ và tỉ lệ lỗi tuỳ chỉnh.
+
+    python -m benchmarks.mock_upstream --port 8900 --latency 0.05 --error-rate 0.01
+
+Mỗi nguồn một cổng (port, port+1, ... theo thứ tự UPSTREAMS) để link tương
+đối trong trang (vd. "/post/..." của TheBlock) vẫn trỏ đúng nguồn. Trỏ app vào
+mock bằng SOURCE_URL_<SOURCE> = mock_url(source, port).
+
+  - Đường dẫn của URL feed / listing gốc -> fixture feed / listing; mọi đường
+    dẫn khác -> fixture trang bài (nguồn không scrape trang bài thì 404).
+  - Origin của site thật trong body được thay bằng origin của mock, để các
+    link bài cũng trỏ về mock.
+  - Ngày của fixture (benchmarks.run.FIXTURE_DAY và ngày trước đó) được đổi
+    thành hôm nay / hôm qua, để bộ lọc "bài hôm nay" có dữ liệu.
+  - Có ETag / If-None-Match như feed thật.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import socket
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import uvicorn
+
+from app.services import (
+    coindesk_service,
+    coingape_service,
+    cointelegraph_service,
+    cryptonews_service,
+    theblock_service,
+    utoday_service,
+)
+from app.services.query import VN_TZ
+from benchmarks.run import FIXTURE_DAY, fixture
+
+# nguồn -> (URL feed / listing gốc, fixture của nó, fixture trang bài)
+UPSTREAMS: Dict[str, Tuple[str, str, Optional[str]]] = {
+    "coindesk": (coindesk_service.COINDESK_RSS_FEED_URL, "feed.xml", None),
+    "cryptonews": (cryptonews_service.CRYPTONEWS_RSS_FEED_URL, "feed.xml", None),
+    "cointelegraph": (cointelegraph_service.COINTELEGRAPH_URL, "feed.xml", "article.html"),
+    "utoday": (utoday_service.UTODAY_RSS, "feed.xml", "article.html"),
+    "theblock": (theblock_service.THEBLOCK_URL, "listing.html", "article.html"),
+    "coingape": (coingape_service.COINGAPE_RSS_FEED_URL, "listing.html", "article.html"),
+}
+
+# Các cách ghi ngày trong fixture (RSS, ISO, TheBlock, Cointelegraph)
+_DATE_FORMATS = ("%a, %d %b %Y", "%Y-%m-%d", "%B %d, %Y", "%b %d, %Y")
+
+
+def mock_url(source: str, port: int, host: str = "127.0.0.1") -> str:
+    """
+    URL feed / listing của `source` trên mock chạy ở cổng gốc `port`.
+    """
+    url = urlsplit(UPSTREAMS[source][0])
+    path = url.path + (f"?{url.query}" if url.query else "")
+    return f"http://{host}:{port + list(UPSTREAMS).index(source)}{path}"
+
+
+def _shift_dates(body: bytes, today: date) -> bytes:
+    for old, new in ((FIXTURE_DAY, today), (FIXTURE_DAY - timedelta(days=1), today - timedelta(days=1))):
+        for fmt in _DATE_FORMATS:
+            body = body.replace(old.strftime(fmt).encode(), new.strftime(fmt).encode())
+    return body
+
+
+class Page:
+    def __init__(self, body: bytes, content_type: bytes):
+        self.body = body
+        self.content_type = content_type
+        self.etag = b'"' + hashlib.blake2b(body, digest_size=8).hexdigest().encode() + b'"'
+
+
+class Upstream:
+    def __init__(self, source: str, port: int, host: str, today: date):
+        url, index_name, article_name = UPSTREAMS[source]
+        parts = urlsplit(url)
+        self.index_path = parts.path.rstrip("/") or "/"
+        origin = f"{parts.scheme}://{parts.netloc}".encode()
+        mock_origin = f"http://{host}:{port}".encode()
+
+        def load(name: str) -> bytes:
+            return _shift_dates(fixture(source, name), today).replace(origin, mock_origin)
+
+        index_type = b"application/rss+xml" if index_name.endswith(".xml") else b"text/html; charset=utf-8"
+        self.index = Page(load(index_name), index_type)
+        self.article = Page(load(article_name), b"text/html; charset=utf-8") if article_name else None
+
+    def page(self, path: str) -> Optional[Page]:
+        if (path.rstrip("/") or "/") == self.index_path:
+            return self.index
+        return self.article
+
+
+class MockApp:
+    """
+    App ASGI chung cho mọi cổng; nguồn được chọn theo cổng nhận kết nối.
+    """
+
+    def __init__(self, port: int, host: str, latency: float, jitter: float, error_rate: float, error_status: int):
+        today = datetime.now(VN_TZ).date()
+        self.upstreams = {
+            port + i: Upstream(source, port + i, host, today) for i, source in enumerate(UPSTREAMS)
+        }
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        page = self.upstreams[scope["server"][1]].page(scope["path"])
+        headers = dict(scope["headers"])
+        if self.error_rate and random.random() < self.error_rate:
+            status, body, extra = self.error_status, b"injected error", [(b"content-type", b"text/plain")]
+        elif page is None:
+            status, body, extra = 404, b"not found", [(b"content-type", b"text/plain")]
+        elif headers.get(b"if-none-match") == page.etag:
+            status, body, extra = 304, b"", [(b"etag", page.etag)]
+        else:
+            status, body, extra = 200, page.body, [(b"content-type", page.content_type), (b"etag", page.etag)]
+
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-length", str(len(body)).encode()), *extra],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def bind(host: str, port: int) -> List[socket.socket]:
+    sockets = []
+    for i in range(len(UPSTREAMS)):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port + i))
+        sockets.append(sock)
+    return sockets
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900, help="cổng của nguồn đầu tiên")
+    parser.add_argument("--latency", type=float, default=0.0, help="độ trễ mỗi response (giây)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="cộng thêm ngẫu nhiên 0..jitter giây")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="tỉ lệ response lỗi (0..1)")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+
+    app = MockApp(args.port, args.host, args.latency, args.jitter, args.error_rate, args.error_status)
+    server = uvicorn.Server(uvicorn.Config(app, lifespan="off", log_level="warning", access_log=False))
+    for source in UPSTREAMS:
+        print(f"{source:<14} {mock_url(source, args.port, args.host)}", flush=True)
+    server.run(sockets=bind(args.host, args.port))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
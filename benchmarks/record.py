@@ -0,0 +1,123 @@
+"""
+Ghi lại fixture cho benchmark từ các trang thật.
+
+Feed và trang bài HTTP được tải bằng client dùng chung; trang TheBlock/CoinGape
+được render qua browser pool và lưu nguyên page_source (đúng HTML mà extractor
+nhận được). Bài được ghi là bài đầu tiên của từng nguồn.
+
+    python -m benchmarks.record                  # tất cả nguồn
+    python -m benchmarks.record utoday theblock  # chỉ một số nguồn
+
+Sau khi ghi lại fixture nên cập nhật baseline:
+    python -m benchmarks.run --update-baseline
+Lưu ý: benchmark lọc "bài hôm nay" theo benchmarks.run.FIXTURE_DAY.
+"""
+import asyncio
+import logging
+import os
+import sys
+
+import feedparser
+
+from app.core.browser_pool import shutdown_browser_pool
+from app.core.http_client import close_client, fetch_bytes
+from app.core.parsing import make_soup
+from app.services import (
+    coindesk_service,
+    coingape_service,
+    cointelegraph_service,
+    cryptonews_service,
+    theblock_service,
+    utoday_service,
+)
+from benchmarks.run import FIXTURES
+
+logger = logging.getLogger(__name__)
+
+
+def save(source: str, name: str, data) -> None:
+    os.makedirs(os.path.join(FIXTURES, source), exist_ok=True)
+    path = os.path.join(FIXTURES, source, name)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(data)
+    logger.info("Wrote %s (%d KiB)", path, len(data) // 1024)
+
+
+async def record_feed(source: str, url: str) -> list:
+    body = await fetch_bytes(url)
+    save(source, "feed.xml", body)
+    return feedparser.parse(body).entries
+
+
+async def record_coindesk():
+    await record_feed("coindesk", coindesk_service.COINDESK_RSS_FEED_URL)
+
+
+async def record_cryptonews():
+    await record_feed("cryptonews", cryptonews_service.CRYPTONEWS_RSS_FEED_URL)
+
+
+async def record_utoday():
+    entries = await record_feed("utoday", utoday_service.UTODAY_RSS)
+    save("utoday", "article.html", await utoday_service.fetch_article(entries[0].link))
+
+
+async def record_cointelegraph():
+    entries = await record_feed("cointelegraph", cointelegraph_service.COINTELEGRAPH_URL)
+    save("cointelegraph", "article.html", await cointelegraph_service.fetch_article(entries[0].link))
+
+
+async def record_coingape():
+    url = coingape_service.COINGAPE_RSS_FEED_URL
+    html = await asyncio.to_thread(coingape_service._fetch_listing, url)
+    save("coingape", "listing.html", html)
+    links = coingape_service.extract_news_links(html, url)
+    save("coingape", "article.html", await coingape_service.fetch_article(links[0]))
+
+
+async def record_theblock():
+    html = await asyncio.to_thread(theblock_service._fetch_listing, theblock_service.THEBLOCK_URL)
+    save("theblock", "listing.html", html)
+    save("theblock", "article.html", await theblock_service.fetch_article(_first_card_link(html)))
+
+
+def _first_card_link(html: str) -> str:
+    # Bài đầu tiên trên trang, bất kể ngày đăng
+    card = make_soup(html, theblock_service.LISTING_PARTS).find("article", class_="articleCard")
+    return "https://www.theblock.co" + card.find("a", href=True)["href"]
+
+
+RECORDERS = {
+    "coindesk": record_coindesk,
+    "cryptonews": record_cryptonews,
+    "utoday": record_utoday,
+    "cointelegraph": record_cointelegraph,
+    "coingape": record_coingape,
+    "theblock": record_theblock,
+}
+
+
+async def main(names) -> int:
+    failed = 0
+    try:
+        for name in names:
+            try:
+                await RECORDERS[name]()
+            except Exception:
+                logger.exception("Recording %s failed", name)
+                failed += 1
+    finally:
+        await close_client()
+        await asyncio.to_thread(shutdown_browser_pool)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    names = sys.argv[1:] or list(RECORDERS)
+    unknown = set(names) - set(RECORDERS)
+    if unknown:
+        sys.exit(f"Unknown source(s): {', '.join(sorted(unknown))}")
+    sys.exit(asyncio.run(main(names)))
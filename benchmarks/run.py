@@ -0,0 +1,260 @@
+"""
+Benchmark offline cho các extractor và bước xử lý feed của từng nguồn.
+
+Chạy trên các trang/feed đã lưu trong benchmarks/fixtures (không cần mạng,
+không cần Chrome: các trang Selenium được lưu dưới dạng page_source). Mỗi case
+chạy trong một process riêng để đo peak RSS, và được so với baseline.json.
+
+    python -m benchmarks.run                     # chạy + so với baseline
+    python -m benchmarks.run -k utoday -n 50     # chỉ các case có "utoday"
+    python -m benchmarks.run --update-baseline   # ghi kết quả làm baseline mới
+
+Exit code 1 nếu có case chậm hơn / cấp phát nhiều hơn baseline quá --tolerance.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Callable, Dict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+
+# Ngày của các fixture (để bộ lọc "bài hôm nay" có dữ liệu)
+FIXTURE_DAY = date(2025, 8, 18)
+
+
+def fixture(*parts: str) -> bytes:
+    with open(os.path.join(FIXTURES, *parts), "rb") as f:
+        return f.read()
+
+
+# --- Các case: setup() đọc fixture và trả về hàm cần đo ---
+
+def _feed_case(source: str, process: Callable[[list], object]) -> Callable[[], object]:
+    import feedparser
+
+    body = fixture(source, "feed.xml")
+    return lambda: process(feedparser.parse(body).entries)
+
+
+def coindesk_feed():
+    from app.services import coindesk_service
+    return _feed_case("coindesk", lambda entries: [coindesk_service._parse_entry(e) for e in entries])
+
+
+def cryptonews_feed():
+    from app.services import cryptonews_service
+    return _feed_case("cryptonews", lambda entries: [cryptonews_service._parse_entry(e) for e in entries])
+
+
+def utoday_feed():
+    from app.services import utoday_service
+    return _feed_case("utoday", lambda entries: utoday_service.links_published_on(entries, FIXTURE_DAY))
+
+
+def cointelegraph_feed():
+    return _feed_case("cointelegraph", lambda entries: entries[:1])
+
+
+def _article_case(source: str, module) -> Callable[[], object]:
+    html = fixture(source, "article.html").decode("utf-8")
+    url = f"https://{source}.example/article"
+    return lambda: module.extract_article(html, url)
+
+
+def utoday_article():
+    from app.services import utoday_service
+    return _article_case("utoday", utoday_service)
+
+
+def utoday_meta_datetime():
+    from app.core.parsing import make_soup
+    from app.services import utoday_service
+
+    soup = make_soup(fixture("utoday", "article.html"), utoday_service.ARTICLE_PARTS)
+    return lambda: utoday_service._parse_meta_datetime(soup)
+
+
+def cointelegraph_article():
+    from app.services import cointelegraph_service
+    return _article_case("cointelegraph", cointelegraph_service)
+
+
+def coingape_article():
+    from app.services import coingape_service
+    return _article_case("coingape", coingape_service)
+
+
+def theblock_article():
+    from app.services import theblock_service
+    return _article_case("theblock", theblock_service)
+
+
+def _fields_case(source: str, module) -> Callable[[], object]:
+    # Chỉ bước trích field (một lần duyệt cây), trên cây đã parse sẵn
+    from app.core.parsing import make_soup
+
+    soup = make_soup(fixture(source, "article.html"), module.ARTICLE_PARTS)
+    return lambda: module.EXTRACTOR.run(soup)
+
+
+def utoday_fields():
+    from app.services import utoday_service
+    return _fields_case("utoday", utoday_service)
+
+
+def cointelegraph_fields():
+    from app.services import cointelegraph_service
+    return _fields_case("cointelegraph", cointelegraph_service)
+
+
+def coingape_fields():
+    from app.services import coingape_service
+    return _fields_case("coingape", coingape_service)
+
+
+def theblock_fields():
+    from app.services import theblock_service
+    return _fields_case("theblock", theblock_service)
+
+
+def coingape_listing():
+    from app.services import coingape_service
+
+    html = fixture("coingape", "listing.html").decode("utf-8")
+    return lambda: coingape_service.extract_news_links(html, coingape_service.COINGAPE_RSS_FEED_URL)
+
+
+def theblock_listing():
+    from app.services import theblock_service
+
+    html = fixture("theblock", "listing.html").decode("utf-8")
+    return lambda: theblock_service.extract_article_links(html, FIXTURE_DAY)
+
+
+CASES: Dict[str, Callable[[], Callable[[], object]]] = {
+    "coindesk.feed": coindesk_feed,
+    "cryptonews.feed": cryptonews_feed,
+    "utoday.feed": utoday_feed,
+    "cointelegraph.feed": cointelegraph_feed,
+    "utoday.article": utoday_article,
+    "utoday.meta_datetime": utoday_meta_datetime,
+    "cointelegraph.article": cointelegraph_article,
+    "coingape.article": coingape_article,
+    "theblock.article": theblock_article,
+    "utoday.fields": utoday_fields,
+    "cointelegraph.fields": cointelegraph_fields,
+    "coingape.fields": coingape_fields,
+    "theblock.fields": theblock_fields,
+    "coingape.listing": coingape_listing,
+    "theblock.listing": theblock_listing,
+}
+
+
+def measure(name: str, repeat: int, warmup: int) -> Dict[str, float]:
+    """
+    Chạy trong process con: thời gian (median/mean/min), peak bộ nhớ Python
+    cấp phát cho một lần chạy (tracemalloc) và peak RSS của process.
+    """
+    run = CASES[name]()
+    for _ in range(warmup):
+        run()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    run()
+    _, peak_alloc = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "mean_ms": round(statistics.fmean(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_alloc_kib": round(peak_alloc / 1024, 1),
+        # ru_maxrss: KiB trên Linux, byte trên macOS
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def run_isolated(name: str, repeat: int, warmup: int) -> Dict[str, float]:
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(measure, name, repeat, warmup).result()
+
+
+def compare(name: str, result: Dict[str, float], baseline: Dict, tolerance: float) -> str:
+    base = baseline.get(name)
+    if not base:
+        return "new"
+    # So theo min_ms: ít nhiễu hơn median trên máy dùng chung
+    regressions = [
+        f"{metric} +{(result[metric] / base[metric] - 1) * 100:.0f}%"
+        for metric in ("min_ms", "peak_alloc_kib")
+        if base.get(metric) and result[metric] > base[metric] * (1 + tolerance)
+    ]
+    if regressions:
+        return "REGRESSION (" + ", ".join(regressions) + ")"
+    change = (result["min_ms"] / base["min_ms"] - 1) * 100 if base.get("min_ms") else 0
+    return f"ok ({change:+.0f}%)"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", default="", help="chỉ chạy case có tên chứa chuỗi này")
+    parser.add_argument("-n", "--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=0.2, help="mức chậm hơn cho phép (0.2 = 20%%)")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", action="store_true", help="in kết quả dạng JSON")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    results = {}
+    failed = False
+    if not args.json:
+        print(f"{'case':<24}{'median ms':>11}{'min ms':>9}{'alloc KiB':>11}{'RSS KiB':>10}  vs baseline")
+    for name in CASES:
+        if args.filter not in name:
+            continue
+        result = results[name] = run_isolated(name, args.repeat, args.warmup)
+        verdict = compare(name, result, baseline, args.tolerance)
+        failed |= verdict.startswith("REGRESSION")
+        if not args.json:
+            print(
+                f"{name:<24}{result['median_ms']:>11.2f}{result['min_ms']:>9.2f}"
+                f"{result['peak_alloc_kib']:>11.1f}{result['peak_rss_kib']:>10}  {verdict}"
+            )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
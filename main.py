@@ -1,6 +1,57 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from app.api.metrics import router as metrics_router
+from app.api.profiles import ProfilingMiddleware, router as profiles_router
+from app.api.upstreams import router as upstreams_router
+from app.api.v1.deadlines import ClientDisconnected
+from app.api.v1.responses import FastJSONResponse
 from app.api.v1.api_router import router as api_router
+from app.core import config
+from app.core.article_store import close_article_store
+from app.core.browser_pool import get_browser_pool, shutdown_browser_pool
+from app.core.http_client import close_client
+from app.core.near_duplicates import close_near_duplicate_index
+from app.core.page_cache import close_page_cache
+from app.core.pipeline import prewarm_parse_executor, shutdown_parse_executor
+from app.services.search_index import backfill_search_index, close_search_index
+from app.services.sources import build_scheduler
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    loop = asyncio.get_running_loop()
+    # Khởi động sẵn process parse và Chrome ở nền, không chặn app start
+    loop.run_in_executor(None, prewarm_parse_executor)
+    if config.BROWSER_PREWARM:
+        loop.run_in_executor(None, get_browser_pool().prewarm)
+    # Bài đã có trong kho nhưng chưa được index tìm kiếm
+    loop.run_in_executor(None, backfill_search_index)
+    scheduler = build_scheduler()
+    if config.SCHEDULER_ENABLED:
+        scheduler.start()
+    yield
+    await scheduler.stop()
+    await close_client()
+    await asyncio.to_thread(shutdown_browser_pool)
+    shutdown_parse_executor()
+    close_page_cache()
+    close_article_store()
+    close_near_duplicate_index()
+    close_search_index()
+
+
+app = FastAPI(title="Coindesk NEWS API", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+@app.exception_handler(ClientDisconnected)
+async def client_disconnected(request: Request, exc: ClientDisconnected) -> Response:
+    # Không còn ai nhận response; 499 như nginx để log phân biệt được
+    return Response(status_code=499)
 
-app = FastAPI(title="Coindesk NEWS API")
 
-app.include_router(api_router)
\ No newline at end of file
+app.include_router(api_router)
+app.include_router(metrics_router)
+app.include_router(upstreams_router)
+app.include_router(profiles_router)
+app.add_middleware(ProfilingMiddleware)